@@ -2,25 +2,81 @@
 from __future__ import annotations
 
 import asyncio
-from datetime import timedelta
+from datetime import datetime, timedelta
 import logging
-from typing import cast
+import random
+import time
+from typing import Any, Callable, cast
 
 from homeassistant import core
 from homeassistant.config_entries import SOURCE_IMPORT, ConfigEntry
 from homeassistant.const import CONF_IP_ADDRESS, CONF_PORT, Platform
-from homeassistant.core import HomeAssistant
-from homeassistant.helpers import config_validation as cv
+from homeassistant.core import HomeAssistant, ServiceCall, SupportsResponse, callback
+from homeassistant.helpers import config_validation as cv, device_registry as dr
+from homeassistant.helpers.dispatcher import async_dispatcher_send
 from homeassistant.helpers.entity import DeviceInfo
+from homeassistant.helpers.event import async_track_time_interval
+from homeassistant.helpers.storage import Store
 from homeassistant.helpers.update_coordinator import DataUpdateCoordinator, UpdateFailed
 import homeassistant.util.dt as dt_util
 import voluptuous as vol
 
-from .const import DEFAULT_NAME, DEFAULT_PORT, DOMAIN
-from .utils import AnycubicPrinter
+from .client import (
+    UNKNOWN_STATUS,
+    AnycubicError,
+    AnycubicPrinter,
+    CircuitBreaker,
+    ConnectionPool,
+    FileIndex,
+    PrinterProfile,
+    PrinterStatus,
+)
+from .client.profiles import DEFAULT_PROFILE
+from .client.protocol import NO_USB_KEY, QUERY_COMMANDS
+from .const import (
+    BREAKER_OPEN,
+    CONF_BREAKER_PROBE_INTERVAL,
+    CONF_BREAKER_THRESHOLD,
+    CONF_FLEET_POLLING,
+    CONF_IDLE_TIMEOUT,
+    CONF_KEEP_ALIVE,
+    CONF_MAX_BACKOFF,
+    CONF_SCAN_INTERVAL_IDLE,
+    CONF_SCAN_INTERVAL_PRINTING,
+    DATA_FLEET,
+    DATA_POOLS,
+    DATA_PROFILES,
+    DEFAULT_BREAKER_PROBE_INTERVAL,
+    DEFAULT_BREAKER_THRESHOLD,
+    DEFAULT_IDLE_TIMEOUT,
+    DEFAULT_MAX_BACKOFF,
+    DEFAULT_NAME,
+    DEFAULT_PORT,
+    DEFAULT_SCAN_INTERVAL_IDLE,
+    DEFAULT_SCAN_INTERVAL_PRINTING,
+    DOMAIN,
+    EVENT_FILE_ADDED,
+    EVENT_FILE_REMOVED,
+    EVENT_PRINTER,
+    FILES_TTL,
+    PROGRESS_UPDATE_INTERVAL,
+    SERVICE_BULK_COMMAND,
+    STATUS_PRINTING,
+    STORAGE_VERSION,
+    STORE_SAVE_DELAY,
+    USB_REMOVED,
+)
+from .events import PrinterEvent, job_events
+from .fleet import FleetPoller
+from .history import SIGNAL_HISTORY_UPDATED, JobHistory
+from .preview import PreviewCache
+from .progress import SIGNAL_PROGRESS, ProgressModel
+from .services import BULK_COMMAND_SCHEMA, bulk_command
+from .statistics import async_import_job_statistics
 
 _LOGGER = logging.getLogger(__name__)
-PLATFORMS = [Platform.SENSOR, Platform.BINARY_SENSOR]
+PLATFORMS = [Platform.SENSOR, Platform.BINARY_SENSOR, Platform.CAMERA]
+DATA_SECTIONS = ("info", "name", "status", "files")
 
 CONFIG_SCHEMA = vol.Schema(
     {
@@ -49,54 +105,364 @@ class AnycubicDataUpdateCoordinator(DataUpdateCoordinator):
         self,
         hass: HomeAssistant,
         config: ConfigEntry,
-        interval: int,
     ) -> None:
         """Set up Datacordinator."""
+        self.printing_interval = timedelta(
+            seconds=config.options.get(
+                CONF_SCAN_INTERVAL_PRINTING,
+                DEFAULT_SCAN_INTERVAL_PRINTING,
+            ),
+        )
+        self.idle_interval = timedelta(
+            seconds=config.options.get(
+                CONF_SCAN_INTERVAL_IDLE,
+                DEFAULT_SCAN_INTERVAL_IDLE,
+            ),
+        )
+        self.max_backoff = timedelta(
+            seconds=config.options.get(CONF_MAX_BACKOFF, DEFAULT_MAX_BACKOFF),
+        )
+        self.entry_id = config.entry_id
+        self.unique_id = cast(str, config.unique_id)
+        self.failures = 0
+        # Polled by the fleet poller rather than its own timer
+        self.fleet_managed: bool = config.options.get(CONF_FLEET_POLLING, False)
+        self.poll_interval = self.idle_interval
+        # Monotonic time each section of the data was last fetched from the printer
+        self._fetched: dict[str, float] = {}
         super().__init__(
             hass,
             _LOGGER,
             name=f"anycubic-{config.entry_id}",
-            update_interval=timedelta(seconds=interval),
+            update_interval=None if self.fleet_managed else self.poll_interval,
         )
         _LOGGER.debug(
             f"Setup {config.data[CONF_IP_ADDRESS]}:{config.data.get(CONF_PORT, DEFAULT_PORT)}",
         )
-        self.printer = AnycubicPrinter(
+        self.printer = async_get_printer(
+            hass,
             config.data[CONF_IP_ADDRESS],
             config.data.get(CONF_PORT, DEFAULT_PORT),
+            CircuitBreaker(
+                threshold=config.options.get(
+                    CONF_BREAKER_THRESHOLD,
+                    DEFAULT_BREAKER_THRESHOLD,
+                ),
+                probe_interval=config.options.get(
+                    CONF_BREAKER_PROBE_INTERVAL,
+                    DEFAULT_BREAKER_PROBE_INTERVAL,
+                ),
+            ),
         )
+        self.files = FileIndex()
+        # Whether there was a USB key when the files were last listed
+        self.usb_present: bool | None = None
+        self.progress = ProgressModel()
+        self.history: JobHistory | None = None
+        self._unsub_progress: Callable[[], None] | None = None
         self.data = {
             "info": {},
-            "status": {},
+            "status": UNKNOWN_STATUS,
             "last_read_time": None,
             "name": DEFAULT_NAME,
-            "files": {},
+            "files": self.files,
+        }
+        # Sections of the data that changed in the last update
+        self.changed_sections: set[str] = set()
+        self._store: Store = async_get_store(hass, config.entry_id)
+        # Whether the data was restored and not yet confirmed by the printer
+        self.stale = False
+
+    async def async_restore(self) -> bool:
+        """
+        Restore the last known state of the printer, which is stale until refreshed.
+
+        Snapshots saved before the files, status and profile were kept only have the
+        name and system information.
+        """
+        if not (cached := await self._store.async_load()):
+            return False
+        if cached.get("profile"):
+            self.printer.profile = PrinterProfile.from_dict(cached["profile"])
+            profiles = self.hass.data.get(DOMAIN, {}).get(DATA_PROFILES, {})
+            profiles.setdefault(self.printer.profile.key, self.printer.profile)
+        if "files" in cached:
+            self.usb_present = cached["files"] is not None
+            self.files.update(map(tuple, cached["files"] or []))
+        try:
+            status = PrinterStatus(*cached.get("status", ()))
+        except TypeError:
+            status = UNKNOWN_STATUS
+        self.data = {
+            **self.data,
+            "name": cached["name"],
+            "info": cached["info"],
+            "status": status,
+        }
+        self.stale = True
+        return True
+
+    def _snapshot(self) -> dict[str, Any]:
+        """Last known state of the printer, as stored."""
+        return {
+            "name": self.data["name"],
+            "info": self.data["info"],
+            "files": list(self.files.items()) if self.usb_present else None,
+            "status": list(self.data["status"]),
+            "profile": (
+                self.printer.profile.as_dict() if self.printer.profile.model else None
+            ),
         }
 
     async def _async_update_data(self):
-        """Update data from printer."""
+        """Update data from printer and schedule next update based on its state."""
+        files_version = self.files.version
+        profile = self.printer.profile
+        try:
+            data = await self._async_fetch_data()
+        except UpdateFailed:
+            # Printer may have been rebooted, so refetch everything once reconnected
+            self.invalidate("info", "name", "files")
+            self.changed_sections = set()
+            self.failures += 1
+            interval = self._backoff_interval()
+            breaker = self.printer.breaker
+            if breaker.state == BREAKER_OPEN:
+                # Probing is cheap, so check if the printer is back at every probe
+                interval = min(interval, timedelta(seconds=breaker.probe_interval))
+            self._set_poll_interval(interval)
+            raise
+        self.failures = 0
+        # The file index is updated in place, so compare versions rather than data
+        self.changed_sections = {
+            s for s in DATA_SECTIONS if s != "files" and data[s] != self.data[s]
+        }
+        if self.files.version != files_version:
+            self.changed_sections.add("files")
+        if self.stale:
+            # Entities show the restored data as stale until then
+            self.changed_sections.update(DATA_SECTIONS)
+        if self.changed_sections or self.printer.profile != profile:
+            # Saved from the data at the time of writing, so polls are written at most
+            # once per delay and the latest state is saved when Home Assistant stops
+            self._store.async_delay_save(self._snapshot, STORE_SAVE_DELAY)
+        if not self.stale:
+            # The restored status may be long gone, so it is not compared
+            self._fire_events(job_events(self.data["status"], data["status"]))
+        self.stale = False
+        self.progress.resync(data["status"], time.monotonic())
+        if self.history is not None and (
+            record := await self.history.async_track(
+                data["status"],
+                data["last_read_time"],
+            )
+        ):
+            async_import_job_statistics(
+                self.hass,
+                self.unique_id,
+                data["name"] or DEFAULT_NAME,
+                self.history,
+                record,
+            )
+            async_dispatcher_send(
+                self.hass,
+                f"{SIGNAL_HISTORY_UPDATED}_{self.entry_id}",
+            )
+        if data["status"].code == STATUS_PRINTING:
+            self._set_poll_interval(self.printing_interval)
+            self._start_progress()
+        else:
+            self._set_poll_interval(self.idle_interval)
+            self.async_stop_progress()
+        return data
+
+    def _start_progress(self) -> None:
+        """Start estimating progress in between polls."""
+        if self._unsub_progress is None:
+            self._unsub_progress = async_track_time_interval(
+                self.hass,
+                self._async_progress_tick,
+                PROGRESS_UPDATE_INTERVAL,
+            )
+
+    @callback
+    def async_stop_progress(self) -> None:
+        """Stop estimating progress in between polls."""
+        if self._unsub_progress is not None:
+            self._unsub_progress()
+            self._unsub_progress = None
+
+    @callback
+    def _async_progress_tick(self, _now: datetime) -> None:
+        """Let progress sensors update their estimate."""
+        async_dispatcher_send(self.hass, f"{SIGNAL_PROGRESS}_{self.entry_id}")
+
+    async def async_shutdown(self) -> None:
+        """Stop estimating progress along with updates."""
+        self.async_stop_progress()
+        await super().async_shutdown()
+
+    def _set_poll_interval(self, interval: timedelta) -> None:
+        """Set the interval until the next update."""
+        self.poll_interval = interval
+        if not self.fleet_managed:
+            self.update_interval = interval
+
+    def _backoff_interval(self) -> timedelta:
+        """Exponential backoff with jitter after consecutive failed updates."""
+        backoff = min(
+            self.printing_interval * 2 ** (self.failures - 1),
+            self.max_backoff,
+        )
+        return backoff * random.uniform(0.8, 1.2)
+
+    def invalidate(self, *sections: str) -> None:
+        """Fetch sections of the data from the printer again on next update."""
+        for section in sections:
+            self._fetched.pop(section, None)
+
+    def _stale_sections(self) -> list[str]:
+        """
+        Sections of the data to fetch in addition to the status.
+
+        System information and name only change on reboot or rename, while the file
+        list is refreshed periodically, or on every update while there is no USB key.
+        """
+        sections = [s for s in ("info", "name") if s not in self._fetched]
+        files_fetched = self._fetched.get("files")
+        if (
+            files_fetched is None
+            or not self.usb_present
+            or time.monotonic() - files_fetched > FILES_TTL
+        ):
+            sections.append("files")
+        return [s for s in sections if self._supports(s)]
+
+    def _supports(self, section: str) -> bool:
+        """Check if the model of the printer supports fetching a section of the data."""
+        return self.printer.profile.supports(QUERY_COMMANDS[section])
+
+    def _job_changed(self, status: PrinterStatus) -> bool:
+        """Check if a job started or ended since the last update."""
+        previous: PrinterStatus = self.data["status"]
+        return bool(
+            previous.code != status.code or previous.file_name != status.file_name,
+        )
+
+    async def _async_fetch_data(self) -> dict[str, Any]:
+        """Fetch data from printer."""
         try:
-            sys_info = await self.printer.get_sys_info()
-            assert sys_info is not None, "Failed to fetch information"
-        except (asyncio.TimeoutError, AssertionError) as e:
+            data: dict[str, Any] = {}
+            if self.printer.profile == DEFAULT_PROFILE:
+                # Printers may leave commands they do not support unanswered, which
+                # fails the whole batch, so the model is probed before polling it
+                info = (await self.printer.query("info"))["info"]
+                await self._async_update_profile(info)
+                data["info"] = info
+            sections = ["status", *self._stale_sections()]
+            data.update(
+                await self.printer.query(*(s for s in sections if s not in data)),
+            )
+            if (info := data.get("info")) and self._profile_outdated(info):
+                await self._async_update_profile(info)
+            if (
+                "files" not in data
+                and self._supports("files")
+                and self._job_changed(data["status"])
+            ):
+                # Files may have been added or removed along with a job
+                data.update(await self.printer.query("files"))
+        except (
+            asyncio.TimeoutError,
+            OSError,
+            AnycubicError,
+            ValueError,
+        ) as e:
             raise UpdateFailed(e) from e
-        status = await self.printer.get_status()
-        name = await self.printer.get_name()
-        files = await self.printer.get_files()
+        if pool := self.printer.pool:
+            _LOGGER.debug(
+                f"Connections to {pool.ip}:{pool.port}: {pool.connects} opened, {pool.reused} reused",
+            )
+        if "files" in data and data["files"] is None:
+            # Listed again on next update, the files are as last listed until then
+            del data["files"]
+        now = time.monotonic()
+        self._fetched.update((section, now) for section in data)
+        if "files" in data:
+            self._update_files(data["files"])
         return {
-            "info": sys_info,
-            "name": name,
-            "status": status,
-            "files": dict(files or []),
+            **self.data,
+            **data,
+            "files": self.files,
             "last_read_time": dt_util.utcnow(),
         }
 
+    def _profile_outdated(self, info: dict[str, str]) -> bool:
+        """Check if the profile of the printer is not the one of its model and firmware."""
+        profile = self.printer.profile
+        return (profile.model, profile.firmware_version) != (
+            info["model"],
+            info.get("firmware_version", ""),
+        )
+
+    async def _async_update_profile(self, info: dict[str, str]) -> None:
+        """Use the profile of the model and firmware, probing the printer if unknown."""
+        profiles: dict[str, PrinterProfile] = self.hass.data.get(DOMAIN, {}).get(
+            DATA_PROFILES,
+            {},
+        )
+        key = f"{info['model']} {info.get('firmware_version', '')}"
+        if (profile := profiles.get(key)) is None:
+            profile = await self.printer.probe()
+            profiles[profile.key] = profile
+        self.printer.profile = profile
+
+    def _update_files(self, files: list[tuple[str, str]] | tuple[()]) -> None:
+        """Update the file index and fire events for files added or removed."""
+        loaded = self.files.loaded
+        added, removed = self.files.update(files)
+        usb_removed = files is NO_USB_KEY and self.usb_present
+        self.usb_present = files is not NO_USB_KEY
+        if not loaded or self.stale:
+            # Files were already there when set up, or changed since the snapshot
+            return
+        if usb_removed:
+            self._fire_events([PrinterEvent(USB_REMOVED)])
+        for event_type, changed in (
+            (EVENT_FILE_ADDED, added),
+            (EVENT_FILE_REMOVED, removed),
+        ):
+            for file_name, file_number in changed:
+                self.hass.bus.async_fire(
+                    event_type,
+                    {
+                        "entry_id": self.entry_id,
+                        "file_name": file_name,
+                        "file_number": file_number,
+                    },
+                )
+
+    def _fire_events(self, events: list[PrinterEvent]) -> None:
+        """Fire events of the printer, which are also device triggers."""
+        if not events:
+            return
+        device = dr.async_get(self.hass).async_get_device({(DOMAIN, self.unique_id)})
+        for event in events:
+            _LOGGER.debug(f"Printer event {event}")
+            self.hass.bus.async_fire(
+                EVENT_PRINTER,
+                {
+                    "device_id": device.id if device else None,
+                    "entry_id": self.entry_id,
+                    **event.as_dict(),
+                },
+            )
+
     @property
     def device_info(self) -> DeviceInfo:
         """Device info."""
-        unique_id = cast(str, self.config_entry.unique_id)
         return DeviceInfo(
-            identifiers={(DOMAIN, unique_id)},
+            identifiers={(DOMAIN, self.unique_id)},
             name=self.data["name"],
             model=self.data["info"].get("model", None),
             sw_version=self.data["info"].get("firmware_version", None),
@@ -104,14 +470,60 @@ class AnycubicDataUpdateCoordinator(DataUpdateCoordinator):
         )
 
 
+@callback
+def async_get_store(hass: HomeAssistant, entry_id: str) -> Store:
+    """Get the store of the last known state of the printer of a config entry."""
+    return Store(hass, STORAGE_VERSION, f"{DOMAIN}.{entry_id}")
+
+
+@callback
+def async_get_printer(
+    hass: HomeAssistant,
+    ip: str,
+    port: int,
+    breaker: CircuitBreaker | None = None,
+) -> AnycubicPrinter:
+    """Get a printer sharing the connection pool of any configured printer at the address."""
+    pools: dict[tuple[str, int], ConnectionPool] = hass.data.get(DOMAIN, {}).get(
+        DATA_POOLS,
+        {},
+    )
+    printer = AnycubicPrinter(ip, port, pool=pools.get((ip, port)))
+    if breaker is not None:
+        printer.breaker = breaker
+    return printer
+
+
 async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     """Set up Anycubic Printer from a config entry."""
     if DOMAIN not in hass.data:
-        hass.data[DOMAIN] = {}
-    coordinator = AnycubicDataUpdateCoordinator(hass, entry, 60)
-    await coordinator.async_config_entry_first_refresh()
+        hass.data[DOMAIN] = {DATA_POOLS: {}, DATA_PROFILES: {}}
+    address = (entry.data[CONF_IP_ADDRESS], entry.data.get(CONF_PORT, DEFAULT_PORT))
+    if pool := hass.data[DOMAIN][DATA_POOLS].pop(address, None):
+        pool.close()  # Left over from a previous attempt at setting up
+    if entry.options.get(CONF_KEEP_ALIVE, False):
+        hass.data[DOMAIN][DATA_POOLS][address] = ConnectionPool(
+            *address,
+            idle_timeout=entry.options.get(CONF_IDLE_TIMEOUT, DEFAULT_IDLE_TIMEOUT),
+        )
+    entry.async_on_unload(entry.add_update_listener(async_reload_entry))
+    coordinator = AnycubicDataUpdateCoordinator(hass, entry)
+    entry.async_on_unload(coordinator.async_stop_progress)
+    coordinator.history = JobHistory(hass, coordinator.unique_id)
+    await coordinator.history.async_load()
+    # Printers seen before are set up from what is known of them, without waiting
+    if not (restored := await coordinator.async_restore()):
+        await coordinator.async_config_entry_first_refresh()
     hass.data[DOMAIN][entry.entry_id] = {"coordinator": coordinator}
-    hass.config_entries.async_setup_platforms(entry, PLATFORMS)
+    if coordinator.fleet_managed:
+        if DATA_FLEET not in hass.data[DOMAIN]:
+            hass.data[DOMAIN][DATA_FLEET] = FleetPoller(hass)
+        fleet: FleetPoller = hass.data[DOMAIN][DATA_FLEET]
+        fleet.register(entry.entry_id, coordinator, poll_now=restored)
+        entry.async_on_unload(lambda: fleet.unregister(entry.entry_id))
+    elif restored:
+        hass.async_create_task(coordinator.async_refresh())
+    await hass.config_entries.async_forward_entry_setups(entry, PLATFORMS)
     return True
 
 
@@ -120,11 +532,39 @@ async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     unload_ok = await hass.config_entries.async_unload_platforms(entry, PLATFORMS)
     if unload_ok:
         hass.data[DOMAIN].pop(entry.entry_id)
+        address = (entry.data[CONF_IP_ADDRESS], entry.data.get(CONF_PORT, DEFAULT_PORT))
+        if pool := hass.data[DOMAIN][DATA_POOLS].pop(address, None):
+            pool.close()
     return unload_ok
 
 
+async def async_remove_entry(hass: HomeAssistant, entry: ConfigEntry) -> None:
+    """Remove the last known information, job history and previews of the printer."""
+    await async_get_store(hass, entry.entry_id).async_remove()
+    if entry.unique_id is not None:
+        await JobHistory(hass, entry.unique_id).async_remove()
+        await PreviewCache(hass, entry.unique_id).async_remove()
+
+
+async def async_reload_entry(hass: HomeAssistant, entry: ConfigEntry) -> None:
+    """Reload config entry when options are updated."""
+    await hass.config_entries.async_reload(entry.entry_id)
+
+
 async def async_setup(hass: core.HomeAssistant, config: dict) -> bool:
     """Set up the Anycubic component."""
+
+    async def async_bulk_command(service_call: ServiceCall) -> dict[str, Any]:
+        """Send a command to many printers at once."""
+        return await bulk_command(hass, service_call)
+
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_BULK_COMMAND,
+        async_bulk_command,
+        BULK_COMMAND_SCHEMA,
+        supports_response=SupportsResponse.OPTIONAL,
+    )
     if DOMAIN not in config:
         return True
 
@@ -7,12 +7,11 @@ from homeassistant.components.binary_sensor import (
 )
 from homeassistant.config_entries import ConfigEntry
 from homeassistant.core import HomeAssistant
-from homeassistant.helpers.entity import DeviceInfo
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
-from homeassistant.helpers.update_coordinator import CoordinatorEntity
 
 from . import AnycubicDataUpdateCoordinator
 from .const import DOMAIN, STATUS_PRINTING
+from .entity import AnycubicEntity
 
 
 async def async_setup_entry(
@@ -32,11 +31,9 @@ async def async_setup_entry(
     async_add_entities(entities)
 
 
-class AnycubicPrintingBinarySensor(CoordinatorEntity, BinarySensorEntity):
+class AnycubicPrintingBinarySensor(AnycubicEntity, BinarySensorEntity):
     """Binary sensor indicting if its currently printing."""
 
-    coordinator: AnycubicDataUpdateCoordinator
-
     def __init__(
         self,
         coordinator: AnycubicDataUpdateCoordinator,
@@ -49,19 +46,9 @@ class AnycubicPrintingBinarySensor(CoordinatorEntity, BinarySensorEntity):
         self._attr_unique_id = f"printing-{device_id}"
         self._attr_device_class = BinarySensorDeviceClass.RUNNING
 
-    @property
-    def device_info(self) -> DeviceInfo:
-        """Device info."""
-        return self.coordinator.device_info
-
     @property
     def is_on(self) -> bool | None:
         """Return true if printing right now."""
-        if not (status := self.coordinator.data["status"]):
+        if not (status := self.coordinator.data["status"]).code:
             return None
-        return bool(status.get("code") == STATUS_PRINTING)
-
-    @property
-    def available(self) -> bool:
-        """Return if entity is available."""
-        return self.coordinator.last_update_success and self.coordinator.data["status"]
+        return bool(status.code == STATUS_PRINTING)
@@ -0,0 +1,133 @@
+"""Camera entity showing the preview of the current print."""
+from __future__ import annotations
+
+import asyncio
+import logging
+
+from homeassistant.components.camera import Camera
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.entity_platform import AddEntitiesCallback
+
+from . import AnycubicDataUpdateCoordinator
+from .client import AnycubicError
+from .const import (
+    CONF_PREFETCH_PREVIEWS,
+    DATA_PREFETCH,
+    DOMAIN,
+    PREVIEW_PREFETCH_MAX_CONCURRENT,
+    STATUS_PAUSED,
+    STATUS_PRINTING,
+)
+from .entity import AnycubicEntity
+from .preview import PreviewCache
+
+_LOGGER = logging.getLogger(__name__)
+
+
+async def async_setup_entry(
+    hass: HomeAssistant,
+    config_entry: ConfigEntry,
+    async_add_entities: AddEntitiesCallback,
+) -> None:
+    """Set up the preview camera."""
+    coordinator: AnycubicDataUpdateCoordinator = hass.data[DOMAIN][
+        config_entry.entry_id
+    ]["coordinator"]
+    device_id = config_entry.unique_id
+    assert device_id is not None
+    cache = PreviewCache(hass, device_id)
+    camera = AnycubicPreviewCamera(coordinator, device_id, cache)
+    if config_entry.options.get(CONF_PREFETCH_PREVIEWS, False):
+        if DATA_PREFETCH not in hass.data[DOMAIN]:
+            hass.data[DOMAIN][DATA_PREFETCH] = asyncio.Semaphore(
+                PREVIEW_PREFETCH_MAX_CONCURRENT,
+            )
+        camera.prefetch_semaphore = hass.data[DOMAIN][DATA_PREFETCH]
+    async_add_entities([camera])
+
+
+class AnycubicPreviewCamera(AnycubicEntity, Camera):
+    """Preview of the file currently being printed."""
+
+    _attr_icon = "mdi:image"
+
+    def __init__(
+        self,
+        coordinator: AnycubicDataUpdateCoordinator,
+        device_id: str,
+        cache: PreviewCache,
+    ) -> None:
+        """Set up camera."""
+        super().__init__(coordinator)
+        Camera.__init__(self)
+        self._cache = cache
+        self._attr_name = "Anycubic Printer Preview"
+        self._attr_unique_id = f"preview-{device_id}"
+        self.content_type = "image/png"
+        # Shared by all printers prefetching the previews of their files, if enabled
+        self.prefetch_semaphore: asyncio.Semaphore | None = None
+        self._prefetch: asyncio.Task | None = None
+
+    async def async_added_to_hass(self) -> None:
+        """Prefetch the previews of the files already known."""
+        await super().async_added_to_hass()
+        self.async_on_remove(self._cancel_prefetch)
+        if self.coordinator.files.loaded:
+            self._start_prefetch()
+
+    @callback
+    def _handle_coordinator_update(self) -> None:
+        """Prefetch the previews of files added to the USB key."""
+        if "files" in self.coordinator.changed_sections:
+            self._start_prefetch()
+        super()._handle_coordinator_update()
+
+    @callback
+    def _start_prefetch(self) -> None:
+        """Prefetch the previews of the files on the USB key in the background."""
+        if self.prefetch_semaphore is None:
+            return
+        self._cancel_prefetch()
+        self._prefetch = self.hass.async_create_background_task(
+            self._async_prefetch(),
+            f"{DOMAIN} preview prefetch {self.entity_id}",
+        )
+
+    @callback
+    def _cancel_prefetch(self) -> None:
+        """Stop prefetching previews."""
+        if self._prefetch is not None:
+            self._prefetch.cancel()
+            self._prefetch = None
+
+    async def _async_prefetch(self) -> None:
+        """Prefetch previews, giving up until the files change if the printer fails."""
+        assert self.prefetch_semaphore is not None
+        try:
+            await self._cache.async_prefetch(
+                list(self.coordinator.files.items()),
+                self.coordinator.printer.get_preview,
+                self.prefetch_semaphore,
+            )
+        except (asyncio.TimeoutError, OSError) as e:
+            _LOGGER.debug(f"Stopped prefetching previews: {e}")
+
+    async def async_camera_image(
+        self,
+        width: int | None = None,
+        height: int | None = None,
+    ) -> bytes | None:
+        """Return PNG preview of the current job."""
+        status = self.coordinator.data["status"]
+        if status.code not in (STATUS_PRINTING, STATUS_PAUSED):
+            return None
+        try:
+            return await self._cache.async_get(
+                status.file_number,
+                status.file_name,
+                self.coordinator.printer.get_preview,
+            )
+        except (asyncio.TimeoutError, OSError, ValueError, AnycubicError) as e:
+            _LOGGER.debug(f"Failed to get preview: {e}")
+            return None
@@ -0,0 +1,33 @@
+"""
+Async client for Wi-Fi enabled Anycubic printers.
+
+The client does not depend on Home Assistant, so it can also be used from scripts
+and from the command line with `python -m client`.
+"""
+from .files import FileIndex
+from .printer import (
+    AnycubicPrinter,
+    CircuitBreaker,
+    CircuitOpenError,
+    ConnectionPool,
+    IncompleteReplyError,
+    discover_printers,
+    fan_out,
+)
+from .profiles import PrinterProfile
+from .protocol import UNKNOWN_STATUS, AnycubicError, PrinterStatus
+
+__all__ = [
+    "AnycubicError",
+    "AnycubicPrinter",
+    "CircuitBreaker",
+    "CircuitOpenError",
+    "ConnectionPool",
+    "FileIndex",
+    "IncompleteReplyError",
+    "PrinterProfile",
+    "PrinterStatus",
+    "UNKNOWN_STATUS",
+    "discover_printers",
+    "fan_out",
+]
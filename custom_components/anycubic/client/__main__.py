@@ -0,0 +1,176 @@
+"""
+Command line interface of the client.
+
+Commands are sent to all printers given at once, and the result of each printer is
+written as a line of JSON as soon as it answers. For example:
+
+    PYTHONPATH=custom_components/anycubic python -m client status 192.168.1.10 192.168.1.11
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+from functools import partial
+import ipaddress
+import json
+import sys
+from typing import Any, Awaitable, Callable
+
+from .const import DEFAULT_PORT, FAN_OUT_MAX_CONCURRENT
+from .files import FileIndex
+from .printer import AnycubicPrinter, discover_printers, fan_out
+from .protocol import AnycubicError
+
+Operation = Callable[[AnycubicPrinter], Awaitable[Any]]
+
+
+async def _status(printer: AnycubicPrinter) -> dict[str, Any]:
+    """Name and status of a printer."""
+    data = await printer.query("name", "status")
+    return {"name": data["name"], "status": data["status"].as_dict()}
+
+
+async def _files(printer: AnycubicPrinter) -> dict[str, str]:
+    """File numbers of the files on the USB key by file name."""
+    return dict(await printer.get_files())
+
+
+async def _probe(printer: AnycubicPrinter) -> dict[str, Any]:
+    """Commands supported by a printer and the layout of its statuses."""
+    return (await printer.probe()).as_dict()
+
+
+async def _rename(template: str, printers: list[str], printer: AnycubicPrinter) -> str:
+    """Rename a printer, formatting `{ip}` and `{index}` in the name."""
+    index = printers.index(f"{printer.ip}:{printer.port}") + 1
+    name = template.format(ip=printer.ip, index=index)
+    if not await printer.set_name(name):
+        raise AnycubicError(f'Failed to rename to "{name}"', "ERROR")
+    return name
+
+
+async def _print(file_name: str, printer: AnycubicPrinter) -> str:
+    """Start printing a file, looked up by name like in Home Assistant."""
+    files = FileIndex()
+    files.update(await printer.get_files())
+    if (file_number := files.number(file_name)) is None:
+        raise ValueError(f'No file "{file_name}" on the printer')
+    if not await printer.start_print(file_number):
+        raise AnycubicError(f'Failed to print "{file_name}"', "ERROR")
+    return file_number
+
+
+async def _set_status(status: str, printer: AnycubicPrinter) -> str:
+    """Pause, resume or stop the current job."""
+    if not await printer.set_status(status):
+        raise AnycubicError(f"Failed to {status}", "ERROR")
+    return status
+
+
+def _parse_printer(value: str, default_port: int) -> tuple[str, int]:
+    """Address of a printer, given as `host` or `host:port`."""
+    host, _, port = value.partition(":")
+    return host, int(port) if port else default_port
+
+
+def _write(line: dict[str, Any]) -> None:
+    """Write a line of JSON to the output as soon as it is known."""
+    sys.stdout.write(json.dumps(line, ensure_ascii=False) + "\n")
+    sys.stdout.flush()
+
+
+async def _run(args: argparse.Namespace) -> int:
+    """Run a command on the printers, returning the exit code."""
+    if args.command == "discover":
+        network = ipaddress.ip_network(args.subnet, strict=False)
+        found = await discover_printers(
+            (str(host) for host in network.hosts()),
+            args.port,
+            max_concurrent=args.concurrency,
+        )
+        for ip, info in found.values():
+            _write({"printer": f"{ip}:{args.port}", "result": info})
+        return 0
+    addresses = [_parse_printer(value, args.port) for value in args.printers]
+    operations: dict[str, Operation] = {
+        "status": _status,
+        "info": AnycubicPrinter.get_sys_info,
+        "files": _files,
+        "probe": _probe,
+        "pause": partial(_set_status, "pause"),
+        "resume": partial(_set_status, "resume"),
+        "stop": partial(_set_status, "stop"),
+    }
+    if args.command == "rename":
+        keys = [f"{host}:{port}" for host, port in addresses]
+        operations["rename"] = partial(_rename, args.name, keys)
+    elif args.command == "print":
+        operations["print"] = partial(_print, args.file)
+    failed = 0
+    async for printer, result in fan_out(
+        (AnycubicPrinter(host, port) for host, port in addresses),
+        operations[args.command],
+        max_concurrent=args.concurrency,
+        timeout=args.timeout,
+    ):
+        line: dict[str, Any] = {"printer": f"{printer.ip}:{printer.port}"}
+        if isinstance(result, Exception):
+            failed += 1
+            line["error"] = str(result) or type(result).__name__
+        else:
+            line["result"] = result
+        _write(line)
+    return 1 if failed else 0
+
+
+def _parser() -> argparse.ArgumentParser:
+    """Parser of the command line."""
+    parser = argparse.ArgumentParser(
+        prog="python -m client",
+        description="Send commands to Anycubic printers, writing a line of JSON per printer.",
+    )
+    parser.add_argument(
+        "--port",
+        type=int,
+        default=DEFAULT_PORT,
+        help="port of printers given without one",
+    )
+    parser.add_argument(
+        "--concurrency",
+        type=int,
+        default=FAN_OUT_MAX_CONCURRENT,
+        help="maximum number of printers contacted at once",
+    )
+    parser.add_argument(
+        "--timeout",
+        type=float,
+        default=None,
+        help="seconds each printer has to complete the command",
+    )
+    commands = parser.add_subparsers(dest="command", required=True)
+    printers = argparse.ArgumentParser(add_help=False)
+    printers.add_argument("printers", nargs="+", metavar="HOST[:PORT]")
+    commands.add_parser("status", parents=[printers], help="name and status")
+    commands.add_parser("info", parents=[printers], help="system information")
+    commands.add_parser("files", parents=[printers], help="files on the USB key")
+    commands.add_parser("probe", parents=[printers], help="supported commands")
+    rename = commands.add_parser("rename", help="rename printers")
+    rename.add_argument("name", help="new name, where {ip} and {index} are replaced")
+    rename.add_argument("printers", nargs="+", metavar="HOST[:PORT]")
+    start = commands.add_parser("print", help="print the same file on all printers")
+    start.add_argument("file", help="file name or number")
+    start.add_argument("printers", nargs="+", metavar="HOST[:PORT]")
+    for status in ("pause", "resume", "stop"):
+        commands.add_parser(status, parents=[printers], help=f"{status} the job")
+    discover = commands.add_parser("discover", help="search a subnet for printers")
+    discover.add_argument("subnet", help="subnet such as 192.168.1.0/24")
+    return parser
+
+
+def main(argv: list[str] | None = None) -> int:
+    """Run the command line interface."""
+    return asyncio.run(_run(_parser().parse_args(argv)))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
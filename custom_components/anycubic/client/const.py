@@ -0,0 +1,20 @@
+"""Constants for the client."""
+
+DEFAULT_PORT = 6000
+# Seconds after which an unused pooled connection is closed
+DEFAULT_IDLE_TIMEOUT = 30
+DEFAULT_BREAKER_THRESHOLD = 3
+DEFAULT_BREAKER_PROBE_INTERVAL = 60
+# Seconds to wait for the connect probing whether an unreachable printer is back
+BREAKER_PROBE_TIMEOUT = 2.0
+# Discovery scans this many addresses at once, with a short connect timeout
+DISCOVERY_MAX_CONCURRENT = 64
+DISCOVERY_CONNECT_TIMEOUT = 0.5
+# Times a preview is requested before giving up if it keeps being cut off
+PREVIEW_ATTEMPTS = 3
+# Number of printers a command is sent to at once by default
+FAN_OUT_MAX_CONCURRENT = 16
+
+BREAKER_CLOSED = "closed"
+BREAKER_OPEN = "open"
+BREAKER_HALF_OPEN = "half_open"
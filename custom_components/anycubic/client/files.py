@@ -0,0 +1,90 @@
+"""Index of the files on the USB key of a printer."""
+from __future__ import annotations
+
+import os
+from typing import Iterable, Iterator, Mapping
+
+
+def _normalize(file_name: str) -> str:
+    """Name of a file without extension or case, for lenient lookups."""
+    return os.path.splitext(file_name)[0].casefold()
+
+
+class FileIndex(Mapping[str, str]):
+    """
+    File numbers of the files on the USB key by file name.
+
+    Files can be looked up by name in either direction, and names are matched
+    regardless of case or extension if there is no exact match. The index is
+    updated in place with each new listing, reporting what was added or removed.
+    """
+
+    def __init__(self) -> None:
+        """Set up empty index."""
+        self.loaded = False
+        # Incremented whenever files are added or removed
+        self.version = 0
+        self._numbers: dict[str, str] = {}
+        self._names: dict[str, str] = {}
+        self._normalized: dict[str, str] = {}
+
+    def __getitem__(self, file_name: str) -> str:
+        """File number of the file with exactly this name."""
+        return self._numbers[file_name]
+
+    def __iter__(self) -> Iterator[str]:
+        """Iterate over file names."""
+        return iter(self._numbers)
+
+    def __len__(self) -> int:
+        """Number of files."""
+        return len(self._numbers)
+
+    def update(
+        self,
+        files: Iterable[tuple[str, str]],
+    ) -> tuple[list[tuple[str, str]], list[tuple[str, str]]]:
+        """Replace the files with a new listing and return those added and removed."""
+        listing = dict(files)
+        added = [f for f in listing.items() if self._numbers.get(f[0]) != f[1]]
+        removed = [f for f in self._numbers.items() if listing.get(f[0]) != f[1]]
+        orphaned = set()
+        for file_name, file_number in removed:
+            del self._numbers[file_name]
+            if self._names.get(file_number) == file_name:
+                del self._names[file_number]
+            if self._normalized.get(key := _normalize(file_name)) == file_name:
+                del self._normalized[key]
+                orphaned.add(key)
+        for file_name, file_number in added:
+            self._numbers[file_name] = file_number
+            self._names[file_number] = file_name
+            self._normalized.setdefault(_normalize(file_name), file_name)
+        if orphaned:
+            # Another file may have the same name when ignoring case and extension
+            for file_name in self._numbers:
+                if (key := _normalize(file_name)) in orphaned:
+                    self._normalized.setdefault(key, file_name)
+        if added or removed:
+            self.version += 1
+        self.loaded = True
+        return added, removed
+
+    def number(self, file_name: str) -> str | None:
+        """
+        Find the number of a file by name.
+
+        The name may also be the number of a file, or match the name of a file
+        when ignoring case and extension.
+        """
+        if (file_number := self._numbers.get(file_name)) is not None:
+            return file_number
+        if file_name in self._names:
+            return file_name
+        if (match := self._normalized.get(_normalize(file_name))) is not None:
+            return self._numbers[match]
+        return None
+
+    def name(self, file_number: str) -> str | None:
+        """Find the name of a file by number."""
+        return self._names.get(file_number)
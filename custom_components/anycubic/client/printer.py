@@ -0,0 +1,937 @@
+"""Communication with the printer."""
+from __future__ import annotations
+
+import asyncio
+from collections import Counter, deque
+from contextlib import asynccontextmanager
+from dataclasses import asdict, dataclass, field
+from functools import partial
+import heapq
+import itertools
+import logging
+import math
+import time
+from typing import Any, AsyncIterator, Awaitable, Callable, Iterable, Sequence
+
+from .const import (
+    BREAKER_CLOSED,
+    BREAKER_HALF_OPEN,
+    BREAKER_OPEN,
+    BREAKER_PROBE_TIMEOUT,
+    DEFAULT_BREAKER_PROBE_INTERVAL,
+    DEFAULT_BREAKER_THRESHOLD,
+    DEFAULT_IDLE_TIMEOUT,
+    DISCOVERY_CONNECT_TIMEOUT,
+    DISCOVERY_MAX_CONCURRENT,
+    FAN_OUT_MAX_CONCURRENT,
+    PREVIEW_ATTEMPTS,
+)
+from .profiles import DEFAULT_PROFILE, PROBE_COMMANDS, PrinterProfile, probed_profile
+from .protocol import (
+    FILE_ENCODING,
+    QUERY_COMMANDS,
+    QUERY_PARSERS,
+    AnycubicError,
+    PrinterStatus,
+    Reply,
+    parse_files,
+    parse_name,
+    parse_status,
+    parse_sys_info,
+)
+
+_LOGGER = logging.getLogger(__name__)
+PREVIEW_WIDTH = 224
+PREVIEW_HEIGHT = 168
+# Reply payloads that are binary data of a fixed size rather than comma separated text
+BINARY_REPLY_SIZES = {"getPreview2": PREVIEW_WIDTH * PREVIEW_HEIGHT * 2}
+READ_TIMEOUT = 1.0
+CONNECT_TIMEOUT = 10.0
+# Number of requests kept in the statistics of each printer
+REQUEST_SAMPLES = 100
+# Commands that change the state of the printer, which go before anything else
+CONTROL_COMMANDS = {"gostart", "gopause", "goresume", "gostop", "setname"}
+# Commands that are slow and not urgent, which go after anything else
+BACKGROUND_COMMANDS = {"getPreview2"}
+PRIORITY_CONTROL = 0
+PRIORITY_POLL = 1
+PRIORITY_BACKGROUND = 2
+
+
+def percentile(values: list[float], percent: float) -> float | None:
+    """Nearest-rank percentile of the values."""
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = math.ceil(percent / 100 * len(ordered))
+    return ordered[min(max(rank, 1), len(ordered)) - 1]
+
+
+@dataclass
+class RequestSample:
+    """Timings of a single request to the printer."""
+
+    commands: str
+    timestamp: float = field(default_factory=time.time)
+    # Seconds since the start of the request, connect time is None if reused
+    connect_time: float | None = None
+    first_byte_time: float | None = None
+    round_trip: float | None = None
+    bytes_read: int = 0
+    timed_out: bool = False
+    error: str | None = None
+    started: float = field(default_factory=time.monotonic, repr=False)
+
+    def elapsed(self) -> float:
+        """Seconds since the start of the request."""
+        return time.monotonic() - self.started
+
+
+class PrinterStats:
+    """Ring buffer of the most recent requests to a printer."""
+
+    def __init__(self, size: int = REQUEST_SAMPLES) -> None:
+        """Set up empty statistics."""
+        self.samples: deque[RequestSample] = deque(maxlen=size)
+        self.requests = 0
+        self.timeouts = 0
+        # Number of errors by command and error type
+        self.errors: Counter[str] = Counter()
+
+    def record(self, sample: RequestSample) -> None:
+        """Record a finished request."""
+        self.samples.append(sample)
+        self.requests += 1
+        if sample.timed_out:
+            self.timeouts += 1
+
+    def record_error(self, command: str, error: str) -> None:
+        """Record an error of a command."""
+        self.errors[f"{command}: {error}"] += 1
+
+    def round_trip_percentile(self, percent: float) -> float | None:
+        """Percentile of the round-trip time of recent requests."""
+        return percentile(
+            [s.round_trip for s in self.samples if s.round_trip is not None],
+            percent,
+        )
+
+    @property
+    def error_rate(self) -> float | None:
+        """Fraction of recent requests that failed or got an error reply."""
+        if not self.samples:
+            return None
+        return sum(s.error is not None for s in self.samples) / len(self.samples)
+
+    def as_dict(self) -> dict[str, Any]:
+        """Statistics as a dict for diagnostics."""
+        return {
+            "requests": self.requests,
+            "timeouts": self.timeouts,
+            "errors": dict(self.errors),
+            "round_trip_p50": self.round_trip_percentile(50),
+            "round_trip_p95": self.round_trip_percentile(95),
+            "error_rate": self.error_rate,
+            "samples": [
+                {k: v for k, v in asdict(s).items() if k != "started"}
+                for s in self.samples
+            ],
+        }
+
+
+class CommandQueue:
+    """
+    Serialize the requests to a printer.
+
+    Waiting requests are sent by priority, control commands first and previews last,
+    and identical reads share the reply of the one already waiting or in flight.
+    """
+
+    def __init__(self) -> None:
+        """Set up empty queue."""
+        self.coalesced = 0
+        self._busy = False
+        self._waiters: list[tuple[int, int, asyncio.Future[None]]] = []
+        self._order = itertools.count()
+        self._reads: dict[tuple[tuple[str, ...], ...], asyncio.Future[ReplyFramer]] = {}
+
+    @staticmethod
+    def _priority(commands: Sequence[Sequence[str]]) -> int:
+        """Priority of a request, lowest first."""
+        names = {command[0] for command in commands}
+        if names & CONTROL_COMMANDS:
+            return PRIORITY_CONTROL
+        if names <= BACKGROUND_COMMANDS:
+            return PRIORITY_BACKGROUND
+        return PRIORITY_POLL
+
+    async def run(
+        self,
+        commands: Sequence[Sequence[str]],
+        send: Callable[[], Awaitable[ReplyFramer]],
+    ) -> ReplyFramer:
+        """Send a request once the printer is free, or share an identical read."""
+        priority = self._priority(commands)
+        key = tuple(tuple(command) for command in commands)
+        if priority != PRIORITY_CONTROL and (shared := self._reads.get(key)):
+            self.coalesced += 1
+            return await asyncio.shield(shared)
+        future: asyncio.Future[ReplyFramer] = asyncio.get_running_loop().create_future()
+        if priority != PRIORITY_CONTROL:
+            self._reads[key] = future
+        try:
+            async with self._slot(priority):
+                framer = await send()
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            future.exception()  # Only raised to the requests sharing it
+            raise
+        else:
+            future.set_result(framer)
+        finally:
+            if self._reads.get(key) is future:
+                del self._reads[key]
+        return framer
+
+    @asynccontextmanager
+    async def _slot(self, priority: int) -> AsyncIterator[None]:
+        """Wait for the turn of a request."""
+        if self._busy:
+            waiter: asyncio.Future[None] = asyncio.get_running_loop().create_future()
+            heapq.heappush(self._waiters, (priority, next(self._order), waiter))
+            try:
+                await waiter
+            except asyncio.CancelledError:
+                if waiter.done() and not waiter.cancelled():
+                    self._release()  # Turn was already handed over, pass it on
+                raise
+        self._busy = True
+        try:
+            yield
+        finally:
+            self._release()
+
+    def _release(self) -> None:
+        """Hand the turn over to the next request."""
+        while self._waiters:
+            *_, waiter = heapq.heappop(self._waiters)
+            if not waiter.done():
+                waiter.set_result(None)
+                return
+        self._busy = False
+
+
+class CircuitOpenError(ConnectionError):
+    """Request not sent as the printer is known to be unreachable."""
+
+
+class IncompleteReplyError(ConnectionResetError):
+    """The printer stopped replying before the replies to all commands were received."""
+
+    def __init__(self, framer: ReplyFramer) -> None:
+        """Keep what was received."""
+        super().__init__(f"Incomplete reply: {bytes(framer.buffer[:64])!r}")
+        self.framer = framer
+
+
+class CircuitBreaker:
+    """
+    Stop sending requests to a printer that keeps failing to answer.
+
+    After `threshold` consecutive failed requests the circuit opens, and requests
+    fail straight away rather than waiting for the connect to time out. Every
+    `probe_interval` seconds, a connect with a short timeout probes the printer.
+    Once it connects the circuit is half-open, and the next request closes it
+    again if it succeeds or reopens it if it fails.
+    """
+
+    def __init__(
+        self,
+        threshold: int = DEFAULT_BREAKER_THRESHOLD,
+        probe_interval: float = DEFAULT_BREAKER_PROBE_INTERVAL,
+        probe_timeout: float = BREAKER_PROBE_TIMEOUT,
+    ) -> None:
+        """Set up closed circuit."""
+        self.threshold = threshold
+        self.probe_interval = probe_interval
+        self.probe_timeout = probe_timeout
+        self.state = BREAKER_CLOSED
+        self.failures = 0
+        self.short_circuited = 0
+        # Monotonic time of the next probe while open
+        self._next_probe = 0.0
+
+    async def async_check(self, ip: str, port: int) -> None:
+        """Raise if the printer is unreachable, probing it when due."""
+        if self.state != BREAKER_OPEN:
+            return
+        if time.monotonic() >= self._next_probe:
+            try:
+                _, writer = await _open_connection(ip, port, self.probe_timeout)
+            except (asyncio.TimeoutError, OSError) as e:
+                _LOGGER.debug(f"Printer at {ip}:{port} still unreachable: {e!r}")
+                self._next_probe = time.monotonic() + self.probe_interval
+            else:
+                writer.close()
+                _LOGGER.debug(f"Printer at {ip}:{port} is reachable again")
+                self.state = BREAKER_HALF_OPEN
+                return
+        self.short_circuited += 1
+        raise CircuitOpenError(f"Printer at {ip}:{port} is unreachable")
+
+    def record_success(self) -> None:
+        """Close the circuit after the printer answered."""
+        self.state = BREAKER_CLOSED
+        self.failures = 0
+
+    def record_failure(self) -> None:
+        """Open the circuit after too many consecutive failures."""
+        self.failures += 1
+        if self.state == BREAKER_HALF_OPEN or self.failures >= self.threshold:
+            self.state = BREAKER_OPEN
+            self._next_probe = time.monotonic() + self.probe_interval
+
+    def as_dict(self) -> dict[str, Any]:
+        """State of the circuit for diagnostics."""
+        return {
+            "state": self.state,
+            "failures": self.failures,
+            "short_circuited": self.short_circuited,
+        }
+
+
+class ReplyFramer:
+    """
+    Incrementally frame the replies to a batch of commands.
+
+    Each reply echoes the command (and its arguments) followed by its payload.
+    Text replies terminate with `end`, error replies may simply stop after the
+    error code and binary replies (previews) are a fixed number of bytes, so the
+    end of each reply is recognized as soon as it has been received.
+    """
+
+    def __init__(
+        self,
+        commands: Sequence[Sequence[str]],
+        binary_sizes: dict[str, int] | None = None,
+    ) -> None:
+        """Set up framer for the replies to the commands."""
+        self.buffer = bytearray()
+        self._commands = commands
+        self._binary_sizes = (
+            BINARY_REPLY_SIZES if binary_sizes is None else binary_sizes
+        )
+        self._echoes = [",".join(command).encode() + b"," for command in commands]
+        self._frames: list[tuple[int, int]] = []
+        self._position = 0
+        self._payload_start: int | None = None
+
+    @property
+    def framed(self) -> int:
+        """Number of commands whose reply has been received in full."""
+        return len(self._frames)
+
+    @property
+    def complete(self) -> bool:
+        """Check if the replies to all commands have been received."""
+        return self.framed == len(self._commands)
+
+    def feed(self, data: bytes) -> bool:
+        """Add received data and return whether all replies have been received."""
+        self.buffer += data
+        while not self.complete and self._advance():
+            pass
+        return self.complete
+
+    def _advance(self) -> bool:
+        """Try to frame the reply to the next command."""
+        if self._payload_start is None:
+            echo = self._echoes[len(self._frames)]
+            echo_start = self.buffer.find(echo, self._position)
+            if echo_start == -1:
+                return False
+            self._payload_start = echo_start + len(echo)
+        start = self._payload_start
+        name = self._commands[len(self._frames)][0]
+        if self.buffer.startswith(b"ERROR", start):
+            end = self.buffer.find(b",", start)
+            if end == -1:
+                return False
+            payload_end = end
+            end += 1
+            if self.buffer.startswith(b"end", end):
+                end += 3
+        elif (size := self._binary_sizes.get(name)) is not None:
+            if len(self.buffer) < start + size:
+                return False
+            payload_end = end = start + size
+            if self.buffer.startswith(b",end", end):
+                end += 4
+        else:
+            # Search from the comma ending the echo, in case the payload is empty
+            terminator = self._find_terminator(start - 1)
+            if terminator == -1:
+                return False
+            payload_end = max(terminator, start)
+            end = terminator + 4
+        self._frames.append((start, payload_end))
+        self._position = end
+        self._payload_start = None
+        return True
+
+    def _find_terminator(self, start: int) -> int:
+        """Find the `,end` terminating a text reply, ignoring values starting with `end`."""
+        next_index = len(self._frames) + 1
+        next_echo = self._echoes[next_index] if next_index < len(self._echoes) else None
+        while (index := self.buffer.find(b",end", start)) != -1:
+            after = index + 4
+            if (
+                after == len(self.buffer)
+                or not self.buffer[after : after + 1].isalnum()
+                or (next_echo is not None and self.buffer.startswith(next_echo, after))
+            ):
+                return index
+            start = after
+        return -1
+
+    def payloads(self) -> list[bytes]:
+        """
+        Payload of the reply to each command.
+
+        If the replies are incomplete, whatever was received for the current command
+        is returned and nothing is returned for the commands after it.
+        """
+        view = memoryview(self.buffer)
+        payloads = [bytes(view[start:end]) for start, end in self._frames]
+        if not self.complete:
+            if self._payload_start is not None:
+                payloads.append(bytes(view[self._payload_start :]))
+            payloads += [b""] * (len(self._commands) - len(payloads))
+        return payloads
+
+    def replies(self) -> list[list[bytes]]:
+        """Comma separated payload of the reply to each command."""
+        replies = []
+        for index, payload in enumerate(self.payloads()):
+            reply = payload.split(b",") if payload else []
+            if index >= len(self._frames) and reply:
+                reply.pop()  # Last value may have been cut off
+            while reply and not reply[-1]:
+                reply.pop()
+            replies.append(reply)
+        return replies
+
+
+def _replies(commands: Sequence[Sequence[str]], framer: ReplyFramer) -> list[Reply]:
+    """Reply to each command, with error replies turned into errors."""
+    results: list[Reply] = []
+    for command, reply in zip(commands, framer.replies()):
+        if reply and reply[0].startswith(b"ERROR"):
+            results.append(
+                AnycubicError(
+                    f'Failed to run command "{",".join(command)}"',
+                    reply[0].decode(),
+                ),
+            )
+        else:
+            results.append(reply)
+    return results
+
+
+async def _open_connection(
+    ip: str,
+    port: int,
+    timeout: float = CONNECT_TIMEOUT,
+) -> tuple[asyncio.StreamReader, asyncio.StreamWriter]:
+    """Open a new connection to the printer."""
+    future = asyncio.open_connection(ip, port)
+    return await asyncio.wait_for(future, timeout=timeout)
+
+
+async def _read_replies(
+    reader: asyncio.StreamReader,
+    framer: ReplyFramer,
+    sample: RequestSample | None = None,
+) -> None:
+    """Read from the stream until the replies are complete."""
+    try:
+        while not framer.complete:
+            chunk = await asyncio.wait_for(reader.read(8192), timeout=READ_TIMEOUT)
+            if not chunk:
+                break  # Printer closed the connection
+            if sample is not None and sample.first_byte_time is None:
+                sample.first_byte_time = sample.elapsed()
+            framer.feed(chunk)
+    except asyncio.TimeoutError:
+        _LOGGER.debug(f"Timed out waiting for replies, got: {bytes(framer.buffer)!r}")
+        if sample is not None:
+            sample.timed_out = True
+
+
+def _encode(commands: Sequence[Sequence[str]]) -> bytes:
+    """Encode commands to send to the printer."""
+    return "".join(",".join(command) + "," for command in commands).encode()
+
+
+class PrinterConnection:
+    """Long-lived connection to a printer."""
+
+    def __init__(
+        self,
+        reader: asyncio.StreamReader,
+        writer: asyncio.StreamWriter,
+    ) -> None:
+        """Wrap the streams of an open connection."""
+        self.reader = reader
+        self.writer = writer
+        self.last_used = time.monotonic()
+
+    @property
+    def closed(self) -> bool:
+        """Check if the connection was closed by either side."""
+        return self.writer.is_closing() or self.reader.at_eof()
+
+    def close(self) -> None:
+        """Close the connection."""
+        self.writer.close()
+
+
+class ConnectionPool:
+    """
+    Small pool of long-lived connections to a single printer.
+
+    Requests are serialized over the pooled connections, so with the default size
+    of one all traffic to the printer goes over a single shared stream.
+    """
+
+    def __init__(
+        self,
+        ip: str,
+        port: int,
+        size: int = 1,
+        idle_timeout: float = DEFAULT_IDLE_TIMEOUT,
+    ) -> None:
+        """Set up pool."""
+        self.ip = ip
+        self.port = port
+        self.idle_timeout = idle_timeout
+        self.connects = 0
+        self.reused = 0
+        self._idle: list[PrinterConnection] = []
+        self._semaphore = asyncio.Semaphore(size)
+        self._idle_handle: asyncio.TimerHandle | None = None
+
+    async def send(
+        self,
+        commands: Sequence[Sequence[str]],
+        sample: RequestSample | None = None,
+    ) -> ReplyFramer:
+        """Send commands over a pooled connection and read the replies."""
+        async with self._semaphore:
+            while self._idle:
+                connection = self._idle.pop()
+                if connection.closed:
+                    connection.close()
+                    continue
+                try:
+                    framer = await self._exchange(connection, commands, sample)
+                except ConnectionError:
+                    # Printer dropped the idle connection, reconnect
+                    _LOGGER.debug(f"Reconnecting to {self.ip}:{self.port}")
+                    continue
+                self.reused += 1
+                return framer
+            reader, writer = await _open_connection(self.ip, self.port)
+            self.connects += 1
+            if sample is not None:
+                sample.connect_time = sample.elapsed()
+            connection = PrinterConnection(reader, writer)
+            return await self._exchange(connection, commands, sample)
+
+    async def _exchange(
+        self,
+        connection: PrinterConnection,
+        commands: Sequence[Sequence[str]],
+        sample: RequestSample | None = None,
+    ) -> ReplyFramer:
+        """Send commands on the connection and return it to the pool if still usable."""
+        framer = ReplyFramer(commands)
+        try:
+            connection.writer.write(_encode(commands))
+            await connection.writer.drain()
+            await _read_replies(connection.reader, framer, sample)
+        except BaseException:
+            connection.close()
+            raise
+        if not framer.buffer:
+            connection.close()
+            raise ConnectionResetError("Connection closed by printer")
+        if framer.complete and not connection.closed:
+            connection.last_used = time.monotonic()
+            self._idle.append(connection)
+            self._schedule_idle_close()
+        else:
+            # Leftover data from an incomplete reply would corrupt the next one
+            connection.close()
+        return framer
+
+    def _schedule_idle_close(self) -> None:
+        """Schedule closing of connections once they have been idle for too long."""
+        if self._idle_handle is None:
+            self._idle_handle = asyncio.get_running_loop().call_later(
+                self.idle_timeout,
+                self._close_idle,
+            )
+
+    def _close_idle(self) -> None:
+        """Close connections that have been idle for too long."""
+        self._idle_handle = None
+        now = time.monotonic()
+        for connection in list(self._idle):
+            if now - connection.last_used >= self.idle_timeout:
+                self._idle.remove(connection)
+                connection.close()
+        if self._idle:
+            self._schedule_idle_close()
+
+    def close(self) -> None:
+        """Close all connections."""
+        if self._idle_handle is not None:
+            self._idle_handle.cancel()
+            self._idle_handle = None
+        while self._idle:
+            self._idle.pop().close()
+
+
+@dataclass
+class AnycubicPrinter:
+    """Utility class to represent printer."""
+
+    ip: str
+    port: int
+    pool: ConnectionPool | None = field(default=None, repr=False, compare=False)
+    connect_timeout: float = field(default=CONNECT_TIMEOUT, repr=False, compare=False)
+    stats: PrinterStats = field(
+        default_factory=PrinterStats,
+        repr=False,
+        compare=False,
+    )
+    queue: CommandQueue = field(
+        default_factory=CommandQueue,
+        repr=False,
+        compare=False,
+    )
+    breaker: CircuitBreaker = field(
+        default_factory=CircuitBreaker,
+        repr=False,
+        compare=False,
+    )
+    profile: PrinterProfile = field(
+        default=DEFAULT_PROFILE,
+        repr=False,
+        compare=False,
+    )
+
+    async def _send_message(
+        self,
+        commands: Sequence[Sequence[str]],
+        incomplete_fails: bool = True,
+    ) -> ReplyFramer:
+        """Send commands to the printer through the queue and read the replies."""
+        return await self.queue.run(
+            commands,
+            partial(self._send_now, commands, incomplete_fails),
+        )
+
+    async def _send_now(
+        self,
+        commands: Sequence[Sequence[str]],
+        incomplete_fails: bool = True,
+    ) -> ReplyFramer:
+        """
+        Send commands to the printer and read the replies, recording timings.
+
+        Incomplete replies only count as failures of the printer for the circuit
+        breaker if `incomplete_fails`, as some are expected.
+        """
+        await self.breaker.async_check(self.ip, self.port)
+        sample = RequestSample(",".join(command[0] for command in commands))
+        try:
+            framer = await self._exchange(commands, sample)
+            if not framer.complete:
+                # Timed out or closed by the printer, which is no more usable
+                raise IncompleteReplyError(framer)
+        except Exception as e:
+            sample.error = type(e).__name__
+            self.stats.record_error(sample.commands, sample.error)
+            if isinstance(e, (asyncio.TimeoutError, OSError)) and (
+                incomplete_fails or not isinstance(e, IncompleteReplyError)
+            ):
+                self.breaker.record_failure()
+            raise
+        finally:
+            sample.round_trip = sample.elapsed()
+            self.stats.record(sample)
+        self.breaker.record_success()
+        sample.bytes_read = len(framer.buffer)
+        for command, payload in zip(commands, framer.payloads()):
+            if payload.startswith(b"ERROR"):
+                sample.error = payload.split(b",", 1)[0].decode()
+                self.stats.record_error(command[0], sample.error)
+        return framer
+
+    async def _exchange(
+        self,
+        commands: Sequence[Sequence[str]],
+        sample: RequestSample,
+    ) -> ReplyFramer:
+        """Send commands over the pool or a new connection and read the replies."""
+        if self.pool is not None:
+            return await self.pool.send(commands, sample)
+        reader, writer = await _open_connection(
+            self.ip,
+            self.port,
+            self.connect_timeout,
+        )
+        sample.connect_time = sample.elapsed()
+        framer = ReplyFramer(commands)
+        writer.write(_encode(commands))
+        try:
+            await _read_replies(reader, framer, sample)
+        finally:
+            writer.close()
+            await writer.wait_closed()
+        return framer
+
+    async def send_cmd(self, *commands: str, flatten: bool = True) -> str | list[str]:
+        """Send a command to the Printer."""
+        (response,) = await self.send_batch(commands)
+        if isinstance(response, AnycubicError):
+            raise response
+        if flatten is True and len(response) == 1:
+            return response[0]
+        return response
+
+    async def send_batch(
+        self,
+        *commands: Sequence[str],
+    ) -> list[list[str] | AnycubicError]:
+        """
+        Send several commands to the printer in a single write.
+
+        Each command is a sequence of the command name followed by its arguments.
+        The combined reply is split back up per command and errors are returned
+        in place of the response of the command that failed rather than raised.
+        """
+        return [
+            reply
+            if isinstance(reply, AnycubicError)
+            else [s.decode(FILE_ENCODING) for s in reply]
+            for reply in await self._request(commands)
+        ]
+
+    async def _request(self, commands: Sequence[Sequence[str]]) -> list[Reply]:
+        """Send several commands and return the undecoded reply to each one."""
+        return _replies(commands, await self._send_message(commands))
+
+    async def query(self, *queries: str) -> dict[str, Any]:
+        """
+        Fetch several pieces of information in one round-trip.
+
+        Supported queries are `info`, `status`, `name` and `files`.
+        Each reply is decoded only once, by the parser of the query.
+        """
+        commands = [(QUERY_COMMANDS[query],) for query in queries]
+        replies = await self._request(commands)
+        return {
+            query: (
+                parse_status(reply, self.profile.status_layout)
+                if query == "status"
+                else QUERY_PARSERS[query](reply)
+            )
+            for query, reply in zip(queries, replies)
+        }
+
+    async def probe(self) -> PrinterProfile:
+        """
+        Find out which commands the printer supports and the layout of its replies.
+
+        The commands are sent in a single batch. Replies are framed in order, so if
+        the printer does not answer a command, the commands after it are sent again
+        without it. Unanswered commands are not failures of the printer, unless it
+        does not even send its system information.
+        """
+        pending = ["getsysinfo", *PROBE_COMMANDS]
+        replies: dict[str, Reply] = {}
+        while pending:
+            commands = [(command,) for command in pending]
+            try:
+                framer = await self._send_message(commands, incomplete_fails=False)
+            except IncompleteReplyError as e:
+                if "getsysinfo" in pending and not e.framer.framed:
+                    self.breaker.record_failure()
+                    raise  # Nothing to probe without the model
+                framer = e.framer
+            answered = _replies(commands, framer)[: framer.framed]
+            replies.update(zip(pending, answered))
+            pending = pending[framer.framed + 1 :]
+        profile = probed_profile(parse_sys_info(replies["getsysinfo"]), replies)
+        _LOGGER.debug(f"Probed {self.ip}:{self.port}: {profile}")
+        return profile
+
+    async def get_status(self) -> PrinterStatus:
+        """Get and parse information from the printer."""
+        (reply,) = await self._request([("getstatus",)])
+        return parse_status(reply, self.profile.status_layout)
+
+    async def get_wifi(self) -> str | None:
+        """Get Wi-Fi name."""
+        (reply,) = await self._request([("getwifi",)])
+        return parse_name(reply)
+
+    async def get_name(self) -> str | None:
+        """Get printer name."""
+        (reply,) = await self._request([("getname",)])
+        return parse_name(reply)
+
+    async def set_name(self, name: str) -> bool:
+        """Set the printer name."""
+        try:
+            # Commands are sent as UTF-8, like the names are read back
+            await self.send_cmd("setname", name)
+            return True
+        except AnycubicError:
+            return False
+
+    async def get_mode(self) -> int:
+        """
+        Get mode.
+
+        Always seems to be 0.
+        """
+        return int(await self.send_cmd("getmode"))
+
+    async def get_files(self) -> list[tuple[str, str]]:
+        """List files on the USB Key."""
+        (reply,) = await self._request([("getfile",)])
+        return list(parse_files(reply) or [])
+
+    async def get_params(self) -> list[str]:
+        """
+        Not sure what these mean yet.
+
+        ['6', '0.5', '25.0', '1.7', '6.0', '4.0', '6.0', '8']
+        """
+        return await self.send_cmd("getpara")
+
+    async def get_preview(self, file_name: str) -> bytes:
+        """
+        Binary data for preview.
+
+        Little endian RGB565 pixels of a `PREVIEW_WIDTH`x`PREVIEW_HEIGHT` image.
+        Previews cut off by a timeout or a dropped connection are requested again,
+        as the printer can only send them whole. They do not count as failures of
+        the printer, as they are expected over a poor Wi-Fi link.
+        """
+        attempt = 1
+        while True:
+            try:
+                framer = await self._send_message(
+                    [("getPreview2", file_name)],
+                    incomplete_fails=False,
+                )
+            except IncompleteReplyError as e:
+                (payload,) = e.framer.payloads()
+                _LOGGER.debug(
+                    f'Preview of "{file_name}" cut off after {len(payload)} bytes (attempt {attempt})',
+                )
+                if attempt == PREVIEW_ATTEMPTS:
+                    raise
+                attempt += 1
+                continue
+            (payload,) = framer.payloads()
+            if payload.startswith(b"ERROR"):
+                raise AnycubicError(
+                    f'Failed to get preview of "{file_name}"',
+                    payload.decode(),
+                )
+            return payload
+
+    async def start_print(self, file_number: str) -> bool:
+        """Start a print job."""
+        try:
+            response = await self.send_cmd("gostart", file_number, flatten=False)
+            _LOGGER.debug(f"Starting {file_number}: {response}")
+            return True
+        except AnycubicError as e:
+            _LOGGER.debug(f"Not starting: {e}")
+        return False
+
+    async def set_status(self, status: str) -> bool:
+        """Set printer status."""
+        assert status in ["pause", "stop", "resume"]
+        try:
+            response = await self.send_cmd(f"go{status}", flatten=False)
+            _LOGGER.debug(f"Setting to {status}: {response}")
+            return True
+        except AnycubicError as e:
+            _LOGGER.debug(f"Failed to {status}: {e}")
+            return False
+
+    async def get_sys_info(self) -> dict[str, str]:
+        """Get printer system information."""
+        (reply,) = await self._request([("getsysinfo",)])
+        return parse_sys_info(reply)
+
+
+async def fan_out(
+    printers: Iterable[AnycubicPrinter],
+    operation: Callable[[AnycubicPrinter], Awaitable[Any]],
+    max_concurrent: int = FAN_OUT_MAX_CONCURRENT,
+    timeout: float | None = None,
+) -> AsyncIterator[tuple[AnycubicPrinter, Any]]:
+    """
+    Run an operation on many printers at once.
+
+    Each printer is yielded with the result of the operation, or the error it failed
+    with, as soon as it is done. At most `max_concurrent` printers are contacted at
+    once, and each has `timeout` seconds to complete the whole operation.
+    """
+    semaphore = asyncio.Semaphore(max_concurrent)
+
+    async def run(printer: AnycubicPrinter) -> tuple[AnycubicPrinter, Any]:
+        """Run the operation on a printer, returning the error if it fails."""
+        async with semaphore:
+            try:
+                return printer, await asyncio.wait_for(operation(printer), timeout)
+            except (asyncio.TimeoutError, OSError, AnycubicError, ValueError) as e:
+                return printer, e
+
+    for done in asyncio.as_completed([run(printer) for printer in printers]):
+        yield await done
+
+
+async def discover_printers(
+    hosts: Iterable[str],
+    port: int,
+    max_concurrent: int = DISCOVERY_MAX_CONCURRENT,
+    connect_timeout: float = DISCOVERY_CONNECT_TIMEOUT,
+) -> dict[str, tuple[str, dict[str, str]]]:
+    """
+    Probe hosts concurrently for printers.
+
+    Returns the address and system information of each printer found by identifier,
+    so a printer answering on several addresses is only listed once.
+    """
+    printers: dict[str, tuple[str, dict[str, str]]] = {}
+    async for printer, info in fan_out(
+        (AnycubicPrinter(ip, port, connect_timeout=connect_timeout) for ip in hosts),
+        AnycubicPrinter.get_sys_info,
+        max_concurrent,
+    ):
+        if isinstance(info, dict):
+            printers.setdefault(info["identifier"], (printer.ip, info))
+    return printers
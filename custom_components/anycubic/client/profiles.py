@@ -0,0 +1,100 @@
+"""Commands supported by each printer model and how their replies are laid out."""
+from __future__ import annotations
+
+import logging
+from typing import Any, NamedTuple
+
+from .protocol import PHOTON_STATUS_LAYOUT, AnycubicError, Reply, StatusLayout
+
+_LOGGER = logging.getLogger(__name__)
+
+# Commands whose support is probed, those sent by polls first
+PROBE_COMMANDS = ("getstatus", "getname", "getfile", "getwifi", "getmode", "getpara")
+# Error codes that report a state of the printer rather than an unsupported command
+STATE_ERRORS = {"getfile": {1}}  # No USB key
+
+
+class PrinterProfile(NamedTuple):
+    """
+    Commands a model supports, and the layout of its statuses.
+
+    Profiles are probed once per model and firmware version. The status layout is
+    None if the statuses of the model are not laid out like any known one.
+    """
+
+    model: str
+    firmware_version: str
+    commands: frozenset[str]
+    status_layout: StatusLayout | None = PHOTON_STATUS_LAYOUT
+
+    @property
+    def key(self) -> str:
+        """Key the profile is cached by."""
+        return f"{self.model} {self.firmware_version}"
+
+    def supports(self, command: str) -> bool:
+        """Check if the model supports a command."""
+        return command in self.commands
+
+    def as_dict(self) -> dict[str, Any]:
+        """Profile, for storage."""
+        return {
+            "model": self.model,
+            "firmware_version": self.firmware_version,
+            "commands": sorted(self.commands),
+            "status_layout": (
+                None if self.status_layout is None else list(self.status_layout)
+            ),
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict[str, Any]) -> PrinterProfile:
+        """Profile from storage."""
+        layout = data["status_layout"]
+        return cls(
+            data["model"],
+            data["firmware_version"],
+            frozenset(data["commands"]),
+            None if layout is None else StatusLayout(*layout),
+        )
+
+
+# Profile of printers that have not been probed, which are assumed to support it all
+DEFAULT_PROFILE = PrinterProfile("", "", frozenset(("getsysinfo", *PROBE_COMMANDS)))
+
+
+def probed_profile(
+    info: dict[str, str],
+    replies: dict[str, Reply],
+) -> PrinterProfile:
+    """
+    Profile of a printer from its replies to the probed commands.
+
+    Commands are supported if they got a reply, even an empty one, that is not an
+    error other than errors reporting a state. Commands the printer did not answer
+    are left out of the replies. If the printer was printing, the status layout is
+    only kept if the reply has at least as many values as the layout expects.
+    """
+    commands = set()
+    for command, reply in replies.items():
+        if isinstance(reply, AnycubicError):
+            if reply.type in STATE_ERRORS.get(command, ()):
+                commands.add(command)
+        else:
+            commands.add(command)
+    layout: StatusLayout | None = PHOTON_STATUS_LAYOUT
+    status = replies.get("getstatus")
+    if (
+        isinstance(status, list)
+        and status
+        and status[0] in (b"print", b"pause")
+        and len(status) < PHOTON_STATUS_LAYOUT.fields
+    ):
+        _LOGGER.debug(f"Unknown status layout of {info['model']}: {status!r}")
+        layout = None
+    return PrinterProfile(
+        info["model"],
+        info["firmware_version"],
+        frozenset(commands),
+        layout,
+    )
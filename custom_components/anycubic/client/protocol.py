@@ -0,0 +1,179 @@
+"""Parsing of the replies of the printer."""
+from __future__ import annotations
+
+import logging
+from typing import Any, Callable, List, NamedTuple, Union
+
+_LOGGER = logging.getLogger(__name__)
+
+# Names set through the app are UTF-8, while file names are GBK
+NAME_ENCODING = "utf8"
+FILE_ENCODING = "gbk"
+
+
+class AnycubicError(Exception):
+    """Subclassed Exception to facilitate catching."""
+
+    def __init__(self, message: str, error: str) -> None:
+        """Set error type."""
+        self.type: int | None = int(error[5:]) if len(error) > 5 else None
+        if self.type:
+            message = f"{message} (Error {self.type})"
+        super().__init__(message)
+
+
+Reply = Union[List[bytes], AnycubicError]
+
+
+class PrinterStatus(NamedTuple):
+    """
+    Status of the printer.
+
+    Details of the job are only set while printing or paused.
+    Statuses are immutable and compare by value, so unchanged statuses are detected.
+    """
+
+    code: str
+    file_name: str | None = None
+    file_number: str | None = None
+    progress: int | None = None
+    current_layer: int | None = None
+    total_layers: int | None = None
+    time_total: int | None = None
+    time_remaining: int | None = None
+    resin: float | None = None
+    type: str | None = None
+    layer_height: float | None = None
+
+    def as_dict(self) -> dict[str, Any]:
+        """Fields that are set, for state attributes."""
+        return {k: v for k, v in zip(self._fields, self) if v is not None}
+
+
+# Status before the printer has been reached
+UNKNOWN_STATUS = PrinterStatus("")
+
+
+class StatusLayout(NamedTuple):
+    """Position of each value in the reply to `getstatus` while printing."""
+
+    fields: int
+    file: int
+    total_layers: int
+    progress: int
+    current_layer: int
+    time_total: int
+    time_remaining: int
+    type: int
+    resin: int
+    layer_height: int
+
+
+# The file, total layers, progress, current layer, total and remaining time, resin
+# label, resin type, resin used, layer height and an unknown value
+PHOTON_STATUS_LAYOUT = StatusLayout(11, 1, 2, 3, 4, 5, 6, 8, 9, 10)
+
+
+def parse_status(
+    reply: Reply,
+    layout: StatusLayout | None = PHOTON_STATUS_LAYOUT,
+) -> PrinterStatus:
+    """
+    Parse the reply to `getstatus`.
+
+    While printing, the values of the job are read from where the layout of the
+    model puts them. Numbers are converted straight from the bytes received. If
+    the layout is unknown or does not match, only the code and file are kept.
+    """
+    if isinstance(reply, AnycubicError):
+        raise reply
+    if not reply:
+        raise AnycubicError("Empty status", "ERROR")
+    code = reply[0].decode()
+    if code not in ("print", "pause") or len(reply) < 2:
+        return PrinterStatus(code)
+    index = 1 if layout is None else layout.file
+    file_name, _, file_number = reply[index].decode(FILE_ENCODING).rpartition("/")
+    if layout is None or len(reply) < layout.fields:
+        return PrinterStatus(code, file_name or None, file_number or None)
+    try:
+        return PrinterStatus(
+            code,
+            file_name,
+            file_number,
+            progress=int(reply[layout.progress]),
+            current_layer=int(reply[layout.current_layer]),
+            total_layers=int(reply[layout.total_layers]),
+            time_total=int(reply[layout.time_total]),
+            time_remaining=int(reply[layout.time_remaining]),
+            resin=float(reply[layout.resin]),
+            type=reply[layout.type].decode(),
+            layer_height=float(reply[layout.layer_height]),
+        )
+    except ValueError:
+        _LOGGER.debug(f"Status does not match the layout of the model: {reply!r}")
+        return PrinterStatus(code, file_name or None, file_number or None)
+
+
+def parse_name(reply: Reply) -> str | None:
+    """Parse the reply to `getname`."""
+    if isinstance(reply, AnycubicError):
+        raise reply
+    if reply and reply[0]:
+        return reply[0].decode(NAME_ENCODING)
+    return None
+
+
+# Files listed when there is no USB key, told apart from a USB key without files
+NO_USB_KEY: tuple[()] = ()
+
+
+def parse_files(reply: Reply) -> list[tuple[str, str]] | tuple[()] | None:
+    """
+    Parse the reply to `getfile`.
+
+    The files are `NO_USB_KEY` if there is no USB key, and None if they could not
+    be listed for another reason, in which case they are unknown rather than gone.
+    """
+    if isinstance(reply, AnycubicError):
+        if reply.type == 1:
+            _LOGGER.debug("Failed to fetch files. No USB Key.")
+            return NO_USB_KEY
+        _LOGGER.error(f"Failed to get files: {reply}")
+        return None
+    files = []
+    for file in reply:
+        file_name, _, file_number = file.decode(FILE_ENCODING).rpartition("/")
+        files.append((file_name, file_number))
+    return files
+
+
+def parse_sys_info(reply: Reply) -> dict[str, str]:
+    """Parse the reply to `getsysinfo`."""
+    if isinstance(reply, AnycubicError):
+        raise reply
+    try:
+        model, version, identifier, *extra = reply
+    except ValueError:
+        raise AnycubicError(f"Incomplete system information: {reply!r}", "ERROR")
+    # Some models do not send the Wi-Fi network, or send more values after it
+    return {
+        "model": model.decode(),
+        "firmware_version": version.decode(),
+        "identifier": identifier.decode(),
+        "wifi_ssid": extra[0].decode(NAME_ENCODING) if extra else "",
+    }
+
+
+QUERY_COMMANDS = {
+    "info": "getsysinfo",
+    "status": "getstatus",
+    "name": "getname",
+    "files": "getfile",
+}
+QUERY_PARSERS: dict[str, Callable[[Reply], Any]] = {
+    "info": parse_sys_info,
+    "status": parse_status,
+    "name": parse_name,
+    "files": parse_files,
+}
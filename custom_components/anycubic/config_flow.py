@@ -2,16 +2,38 @@
 from __future__ import annotations
 
 import asyncio
+import ipaddress
 import socket
 from typing import Any
 
 from homeassistant import config_entries, data_entry_flow
 from homeassistant.const import CONF_IP_ADDRESS, CONF_PORT
+from homeassistant.core import callback
+from homeassistant.helpers import config_validation as cv
 import voluptuous as vol
 
-from . import _LOGGER
-from .const import DEFAULT_PORT, DOMAIN
-from .utils import AnycubicPrinter
+from . import _LOGGER, async_get_printer
+from .client import AnycubicError, discover_printers
+from .const import (
+    CONF_BREAKER_PROBE_INTERVAL,
+    CONF_BREAKER_THRESHOLD,
+    CONF_FLEET_POLLING,
+    CONF_IDLE_TIMEOUT,
+    CONF_KEEP_ALIVE,
+    CONF_MAX_BACKOFF,
+    CONF_PREFETCH_PREVIEWS,
+    CONF_SCAN_INTERVAL_IDLE,
+    CONF_SCAN_INTERVAL_PRINTING,
+    DEFAULT_BREAKER_PROBE_INTERVAL,
+    DEFAULT_BREAKER_THRESHOLD,
+    DEFAULT_IDLE_TIMEOUT,
+    DEFAULT_MAX_BACKOFF,
+    DEFAULT_PORT,
+    DEFAULT_SCAN_INTERVAL_IDLE,
+    DEFAULT_SCAN_INTERVAL_PRINTING,
+    DISCOVERY_MAX_HOSTS,
+    DOMAIN,
+)
 
 CONFIG_SCHEMA = vol.Schema(
     {
@@ -19,20 +41,32 @@ CONFIG_SCHEMA = vol.Schema(
         vol.Required(CONF_PORT, default=DEFAULT_PORT): int,
     },
 )
+CONF_PRINTERS = "printers"
 
 
 class ConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
     """Config flow for Printer."""
 
+    def __init__(self) -> None:
+        """Set up flow."""
+        self._port = DEFAULT_PORT
+        self._discovered: dict[str, dict[str, str]] = {}
+
     async def async_step_user(self, user_input: dict[str, Any] | None = None):
         """Handle flow started via the user interface."""
         errors: dict[str, str] = {}
-        if user_input is not None:
+        if user_input is not None and "/" in user_input[CONF_IP_ADDRESS]:
+            # A subnet was entered, search it for printers
+            try:
+                return await self._discover(user_input)
+            except ValueError:
+                errors["base"] = "invalid_subnet"
+        elif user_input is not None:
             try:
                 return await self._finalize(user_input)
             except data_entry_flow.AbortFlow as err:
                 raise err from None
-            except (asyncio.TimeoutError, AssertionError):
+            except (asyncio.TimeoutError, AnycubicError):
                 errors["base"] = "cannot_connect"
             except socket.gaierror:
                 errors["base"] = "invalid_ip"
@@ -46,14 +80,73 @@ class ConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
             errors=errors,
         )
 
+    async def _discover(self, user_input: dict[str, Any]):
+        """Search a subnet for printers that are not configured yet."""
+        network = ipaddress.ip_network(user_input[CONF_IP_ADDRESS], strict=False)
+        if network.num_addresses > DISCOVERY_MAX_HOSTS:
+            raise ValueError(f"Subnet {network} is too large to scan")
+        self._port = user_input.get(CONF_PORT, DEFAULT_PORT)
+        printers = await discover_printers(
+            (str(ip) for ip in network.hosts()),
+            self._port,
+        )
+        configured = self._async_current_ids()
+        self._discovered = {
+            ip: info
+            for identifier, (ip, info) in printers.items()
+            if identifier not in configured
+        }
+        _LOGGER.debug(f"Found {len(self._discovered)} new printers in {network}")
+        if not self._discovered:
+            return self.async_abort(reason="no_devices_found")
+        return await self.async_step_pick_printers()
+
+    async def async_step_pick_printers(
+        self,
+        user_input: dict[str, Any] | None = None,
+    ):
+        """Choose which of the discovered printers to add."""
+        if user_input is None:
+            printers = {
+                ip: f"{info['model']} ({ip})" for ip, info in self._discovered.items()
+            }
+            return self.async_show_form(
+                step_id="pick_printers",
+                data_schema=vol.Schema(
+                    {
+                        vol.Required(
+                            CONF_PRINTERS,
+                            default=list(printers),
+                        ): vol.All(cv.multi_select(printers), vol.Length(min=1)),
+                    },
+                ),
+            )
+        ip, *others = user_input[CONF_PRINTERS]
+        # Each of the other printers gets its own entry through an import flow
+        for other in others:
+            self.hass.async_create_task(
+                self.hass.config_entries.flow.async_init(
+                    DOMAIN,
+                    context={"source": config_entries.SOURCE_IMPORT},
+                    data={CONF_IP_ADDRESS: other, CONF_PORT: self._port},
+                ),
+            )
+        info = self._discovered[ip]
+        await self.async_set_unique_id(info["identifier"], raise_on_progress=False)
+        self._abort_if_unique_id_configured()
+        return self.async_create_entry(
+            title=info["model"],
+            data={CONF_IP_ADDRESS: ip, CONF_PORT: self._port},
+        )
+
     async def _finalize(self, user_input: dict[str, Any]):
         """Try to fetch required information and configure entitu."""
-        printer = AnycubicPrinter(
+        printer = async_get_printer(
+            self.hass,
             user_input[CONF_IP_ADDRESS],
             user_input.get(CONF_PORT, DEFAULT_PORT),
         )
         info = await printer.get_sys_info()
-        assert info, "Failed to fetch information"
         await self.async_set_unique_id(info["identifier"], raise_on_progress=False)
         self._abort_if_unique_id_configured()
         return self.async_create_entry(title=info["model"], data=user_input)
@@ -61,3 +154,81 @@ class ConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
     async def async_step_import(self, user_input: dict[str, Any]):
         """Handle import flow."""
         return await self.async_step_user(user_input)
+
+    @staticmethod
+    @callback
+    def async_get_options_flow(
+        config_entry: config_entries.ConfigEntry,
+    ) -> config_entries.OptionsFlow:
+        """Get the options flow for this handler."""
+        return OptionsFlowHandler(config_entry)
+
+
+class OptionsFlowHandler(config_entries.OptionsFlow):
+    """Options flow for Printer."""
+
+    def __init__(self, config_entry: config_entries.ConfigEntry) -> None:
+        """Initialize options flow."""
+        self.config_entry = config_entry
+
+    async def async_step_init(self, user_input: dict[str, Any] | None = None):
+        """Manage the options."""
+        if user_input is not None:
+            return self.async_create_entry(title="", data=user_input)
+
+        options = self.config_entry.options
+        return self.async_show_form(
+            step_id="init",
+            data_schema=vol.Schema(
+                {
+                    vol.Required(
+                        CONF_SCAN_INTERVAL_PRINTING,
+                        default=options.get(
+                            CONF_SCAN_INTERVAL_PRINTING,
+                            DEFAULT_SCAN_INTERVAL_PRINTING,
+                        ),
+                    ): vol.All(int, vol.Range(min=1)),
+                    vol.Required(
+                        CONF_SCAN_INTERVAL_IDLE,
+                        default=options.get(
+                            CONF_SCAN_INTERVAL_IDLE,
+                            DEFAULT_SCAN_INTERVAL_IDLE,
+                        ),
+                    ): vol.All(int, vol.Range(min=1)),
+                    vol.Required(
+                        CONF_MAX_BACKOFF,
+                        default=options.get(CONF_MAX_BACKOFF, DEFAULT_MAX_BACKOFF),
+                    ): vol.All(int, vol.Range(min=1)),
+                    vol.Required(
+                        CONF_BREAKER_THRESHOLD,
+                        default=options.get(
+                            CONF_BREAKER_THRESHOLD,
+                            DEFAULT_BREAKER_THRESHOLD,
+                        ),
+                    ): vol.All(int, vol.Range(min=1)),
+                    vol.Required(
+                        CONF_BREAKER_PROBE_INTERVAL,
+                        default=options.get(
+                            CONF_BREAKER_PROBE_INTERVAL,
+                            DEFAULT_BREAKER_PROBE_INTERVAL,
+                        ),
+                    ): vol.All(int, vol.Range(min=1)),
+                    vol.Required(
+                        CONF_KEEP_ALIVE,
+                        default=options.get(CONF_KEEP_ALIVE, False),
+                    ): bool,
+                    vol.Required(
+                        CONF_IDLE_TIMEOUT,
+                        default=options.get(CONF_IDLE_TIMEOUT, DEFAULT_IDLE_TIMEOUT),
+                    ): vol.All(int, vol.Range(min=1)),
+                    vol.Required(
+                        CONF_FLEET_POLLING,
+                        default=options.get(CONF_FLEET_POLLING, False),
+                    ): bool,
+                    vol.Required(
+                        CONF_PREFETCH_PREVIEWS,
+                        default=options.get(CONF_PREFETCH_PREVIEWS, False),
+                    ): bool,
+                },
+            ),
+        )
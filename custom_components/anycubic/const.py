@@ -1,7 +1,54 @@
 """Constants for integration."""
+from datetime import timedelta
+
+# Constants shared with the client, which does not depend on Home Assistant
+from .client.const import (  # noqa: F401
+    BREAKER_OPEN,
+    DEFAULT_BREAKER_PROBE_INTERVAL,
+    DEFAULT_BREAKER_THRESHOLD,
+    DEFAULT_IDLE_TIMEOUT,
+    DEFAULT_PORT,
+    FAN_OUT_MAX_CONCURRENT,
+)
+
 DOMAIN = "anycubic"
-DEFAULT_PORT = 6000
+# Version of the stored last known information of each printer
+STORAGE_VERSION = 1
+# Seconds changes of the state of a printer are gathered for before being stored
+STORE_SAVE_DELAY = 60
 DEFAULT_NAME = "Anycubic Printer"
+DEFAULT_SCAN_INTERVAL_PRINTING = 10
+DEFAULT_SCAN_INTERVAL_IDLE = 120
+DEFAULT_MAX_BACKOFF = 600
+# Seconds after which the file list is refreshed even if no job started or ended
+FILES_TTL = 600
+# Changes of the estimated finish time smaller than this are ignored
+FINISH_TIME_TOLERANCE = timedelta(seconds=60)
+# Seconds between estimates of the progress of a job in between polls
+PROGRESS_UPDATE_INTERVAL = timedelta(seconds=5)
+# Weight of the latest layer in the estimated time per layer
+PROGRESS_SMOOTHING = 0.3
+# Maximum number of printers polled at once by the fleet poller
+FLEET_MAX_CONCURRENT = 4
+# Seconds between the first polls of printers registered with the fleet poller
+FLEET_STAGGER = 2
+# Largest subnet that can be scanned for printers
+DISCOVERY_MAX_HOSTS = 1024
+# Every this many jobs, the offset of the job is kept in the index of the history
+HISTORY_INDEX_STRIDE = 256
+# Days for which the number of jobs is kept in the index of the history
+HISTORY_DAYS = 31
+# Days over which the average number of jobs per day is computed
+HISTORY_RATE_DAYS = 7
+# Maximum number of jobs in each event sent in reply to a history query
+HISTORY_QUERY_BATCH = 100
+# Seconds each printer has to carry out a command sent to many printers at once
+DEFAULT_BULK_COMMAND_TIMEOUT = 30
+# Number of decoded previews kept per printer
+PREVIEW_CACHE_MEMORY_SIZE = 8
+PREVIEW_CACHE_DISK_SIZE = 64
+# Maximum number of previews prefetched at once across all printers
+PREVIEW_PREFETCH_MAX_CONCURRENT = 2
 
 STATUS_PRINTING = "print"
 STATUS_FINISHED = "finish"
@@ -24,6 +71,53 @@ EXPOSED_COMMANDS = (COMMAND_PRINT, COMMAND_PAUSE, COMMAND_RESUME, COMMAND_STOP)
 
 CONF_PRINT_FILE_NAME = "file_name"
 CONF_PRINT_CMD = "command"
+CONF_KEEP_ALIVE = "keep_alive"
+CONF_IDLE_TIMEOUT = "idle_timeout"
+CONF_SCAN_INTERVAL_PRINTING = "scan_interval_printing"
+CONF_SCAN_INTERVAL_IDLE = "scan_interval_idle"
+CONF_MAX_BACKOFF = "max_backoff"
+CONF_FLEET_POLLING = "fleet_polling"
+CONF_BREAKER_THRESHOLD = "breaker_threshold"
+CONF_BREAKER_PROBE_INTERVAL = "breaker_probe_interval"
+CONF_PREFETCH_PREVIEWS = "prefetch_previews"
+CONF_MAX_CONCURRENT = "max_concurrent"
+CONF_HISTORY_START = "start"
+CONF_HISTORY_END = "end"
 
 SERVICE_SET_PRINTER_NAME = "set_printer_name"
 SERVICE_SEND_COMMAND = "send_command"
+SERVICE_LIST_FILES = "list_files"
+SERVICE_QUERY_HISTORY = "query_history"
+SERVICE_BULK_COMMAND = "bulk_command"
+
+EVENT_FILE_ADDED = "anycubic_file_added"
+EVENT_FILE_REMOVED = "anycubic_file_removed"
+EVENT_FILE_LIST = "anycubic_file_list"
+EVENT_HISTORY = "anycubic_history"
+EVENT_PRINTER = "anycubic_event"
+EVENT_BULK_COMMAND = "anycubic_bulk_command"
+
+# Types of the events of a printer, which are also device triggers
+JOB_STARTED = "job_started"
+JOB_LAYER_CHANGED = "layer_changed"
+JOB_PAUSED = "paused"
+JOB_RESUMED = "resumed"
+JOB_FINISHED = "finished"
+JOB_STOPPED = "stopped"
+USB_REMOVED = "usb_removed"
+PRINTER_EVENT_TYPES = (
+    JOB_STARTED,
+    JOB_LAYER_CHANGED,
+    JOB_PAUSED,
+    JOB_RESUMED,
+    JOB_FINISHED,
+    JOB_STOPPED,
+    USB_REMOVED,
+)
+CONF_LAYER = "layer"
+
+DATA_POOLS = "pools"
+DATA_FLEET = "fleet"
+DATA_PREFETCH = "prefetch"
+# Profiles of the printer models by model and firmware version
+DATA_PROFILES = "profiles"
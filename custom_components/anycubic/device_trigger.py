@@ -0,0 +1,99 @@
+"""Device triggers for the events of a printer."""
+from __future__ import annotations
+
+from typing import Any, Callable
+
+from homeassistant.components.device_automation import DEVICE_TRIGGER_BASE_SCHEMA
+from homeassistant.components.homeassistant.triggers import event as event_trigger
+from homeassistant.const import CONF_DEVICE_ID, CONF_DOMAIN, CONF_PLATFORM, CONF_TYPE
+from homeassistant.core import CALLBACK_TYPE, Context, HomeAssistant
+from homeassistant.helpers import config_validation as cv
+from homeassistant.helpers.typing import ConfigType
+import voluptuous as vol
+
+from .const import (
+    CONF_LAYER,
+    DOMAIN,
+    EVENT_PRINTER,
+    JOB_LAYER_CHANGED,
+    PRINTER_EVENT_TYPES,
+)
+
+# Only layer changes can be narrowed down to a layer
+TRIGGER_SCHEMA = vol.Any(
+    DEVICE_TRIGGER_BASE_SCHEMA.extend(
+        {
+            vol.Required(CONF_TYPE): JOB_LAYER_CHANGED,
+            vol.Optional(CONF_LAYER): cv.positive_int,
+        },
+    ),
+    DEVICE_TRIGGER_BASE_SCHEMA.extend(
+        {
+            vol.Required(CONF_TYPE): vol.In(
+                [t for t in PRINTER_EVENT_TYPES if t != JOB_LAYER_CHANGED],
+            ),
+        },
+    ),
+)
+
+
+async def async_get_triggers(
+    hass: HomeAssistant,
+    device_id: str,
+) -> list[dict[str, Any]]:
+    """List the triggers of a printer."""
+    return [
+        {
+            CONF_PLATFORM: "device",
+            CONF_DOMAIN: DOMAIN,
+            CONF_DEVICE_ID: device_id,
+            CONF_TYPE: trigger_type,
+        }
+        for trigger_type in PRINTER_EVENT_TYPES
+    ]
+
+
+async def async_get_trigger_capabilities(
+    hass: HomeAssistant,
+    config: ConfigType,
+) -> dict[str, vol.Schema]:
+    """Layer changes can be narrowed down to reaching a given layer."""
+    if config[CONF_TYPE] != JOB_LAYER_CHANGED:
+        return {}
+    return {"extra_fields": vol.Schema({vol.Optional(CONF_LAYER): cv.positive_int})}
+
+
+async def async_attach_trigger(
+    hass: HomeAssistant,
+    config: ConfigType,
+    action: Callable[..., Any],
+    trigger_info: Any,
+) -> CALLBACK_TYPE:
+    """Listen for the events of a printer."""
+    layer = config.get(CONF_LAYER)
+
+    async def layer_action(
+        run_variables: dict[str, Any],
+        context: Context | None = None,
+    ) -> None:
+        """Only run when the layer was printed since the previous status."""
+        data = run_variables["trigger"]["event"].data
+        if data["first_layer"] <= layer <= data["last_layer"]:
+            await action(run_variables, context)
+
+    return await event_trigger.async_attach_trigger(
+        hass,
+        event_trigger.TRIGGER_SCHEMA(
+            {
+                event_trigger.CONF_PLATFORM: "event",
+                event_trigger.CONF_EVENT_TYPE: EVENT_PRINTER,
+                event_trigger.CONF_EVENT_DATA: {
+                    CONF_DEVICE_ID: config[CONF_DEVICE_ID],
+                    CONF_TYPE: config[CONF_TYPE],
+                },
+            },
+        ),
+        action if layer is None else layer_action,
+        trigger_info,
+        platform_type="device",
+    )
@@ -0,0 +1,51 @@
+"""Diagnostics support for component."""
+from __future__ import annotations
+
+from typing import Any
+
+from homeassistant.components.diagnostics import async_redact_data
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import HomeAssistant
+
+from . import AnycubicDataUpdateCoordinator
+from .const import DATA_FLEET, DOMAIN
+
+TO_REDACT = {"identifier", "wifi_ssid"}
+
+
+async def async_get_config_entry_diagnostics(
+    hass: HomeAssistant,
+    config_entry: ConfigEntry,
+) -> dict[str, Any]:
+    """Diagnostics of a config entry, with timings of recent requests to the printer."""
+    coordinator: AnycubicDataUpdateCoordinator = hass.data[DOMAIN][
+        config_entry.entry_id
+    ]["coordinator"]
+    printer = coordinator.printer
+    diagnostics: dict[str, Any] = {
+        "options": dict(config_entry.options),
+        "data": async_redact_data(
+            {**coordinator.data, "files": dict(coordinator.files)},
+            TO_REDACT,
+        ),
+        "last_update_success": coordinator.last_update_success,
+        "stale": coordinator.stale,
+        "failures": coordinator.failures,
+        "poll_interval": coordinator.poll_interval.total_seconds(),
+        "requests": printer.stats.as_dict(),
+        "coalesced_requests": printer.queue.coalesced,
+        "circuit_breaker": printer.breaker.as_dict(),
+        "profile": printer.profile.as_dict(),
+    }
+    if printer.pool is not None:
+        diagnostics["pool"] = {
+            "connects": printer.pool.connects,
+            "reused": printer.pool.reused,
+        }
+    if coordinator.fleet_managed:
+        fleet = hass.data[DOMAIN][DATA_FLEET]
+        diagnostics["fleet"] = {
+            "durations": list(fleet.durations.get(config_entry.entry_id, [])),
+            "failures": fleet.failures.get(config_entry.entry_id, 0),
+        }
+    return diagnostics
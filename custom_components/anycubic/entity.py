@@ -0,0 +1,44 @@
+"""Base entity for component."""
+from __future__ import annotations
+
+from homeassistant.core import callback
+from homeassistant.helpers.entity import DeviceInfo
+from homeassistant.helpers.update_coordinator import CoordinatorEntity
+
+from . import AnycubicDataUpdateCoordinator
+
+
+class AnycubicEntity(CoordinatorEntity):
+    """Base entity for all entities of a printer."""
+
+    coordinator: AnycubicDataUpdateCoordinator
+    # Sections of the coordinator data the state of the entity depends on
+    _data_sections: tuple[str, ...] = ("status",)
+
+    def __init__(self, coordinator: AnycubicDataUpdateCoordinator) -> None:
+        """Set up entity."""
+        super().__init__(coordinator)
+        self._was_available: bool | None = None
+
+    @property
+    def device_info(self) -> DeviceInfo:
+        """Device info."""
+        return self.coordinator.device_info
+
+    @property
+    def available(self) -> bool:
+        """Check availability."""
+        return bool(
+            self.coordinator.last_update_success
+            and self.coordinator.data["status"].code,
+        )
+
+    @callback
+    def _handle_coordinator_update(self) -> None:
+        """Only write state if availability or the data it depends on changed."""
+        available = self.available
+        changed = self.coordinator.changed_sections.intersection(self._data_sections)
+        if available == self._was_available and not changed:
+            return
+        self._was_available = available
+        super()._handle_coordinator_update()
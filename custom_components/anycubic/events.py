@@ -0,0 +1,70 @@
+"""Events of a printer, derived from successive statuses."""
+from __future__ import annotations
+
+from typing import Any, NamedTuple
+
+from .client import PrinterStatus
+from .const import (
+    JOB_FINISHED,
+    JOB_LAYER_CHANGED,
+    JOB_PAUSED,
+    JOB_RESUMED,
+    JOB_STARTED,
+    JOB_STOPPED,
+    STATUS_FINISHED,
+    STATUS_PAUSED,
+    STATUS_PRINTING,
+)
+
+
+class PrinterEvent(NamedTuple):
+    """
+    Something that happened on a printer between two statuses.
+
+    Layer changes cover all layers printed since the previous status, from
+    `first_layer` to `last_layer`, as polls usually skip some.
+    """
+
+    type: str
+    file_name: str | None = None
+    first_layer: int | None = None
+    last_layer: int | None = None
+
+    def as_dict(self) -> dict[str, Any]:
+        """Fields that are set, for event data."""
+        return {k: v for k, v in zip(self._fields, self) if v is not None}
+
+
+def _active(status: PrinterStatus) -> bool:
+    """Check if a job is printing or paused."""
+    return status.code in (STATUS_PRINTING, STATUS_PAUSED)
+
+
+def job_events(previous: PrinterStatus, status: PrinterStatus) -> list[PrinterEvent]:
+    """Events between two statuses of a printer, in the order they happened."""
+    if not previous.code or not status.code or previous == status:
+        return []  # First status, or nothing changed
+    events = []
+    same_job = _active(previous) and previous.file_name == status.file_name
+    if _active(previous) and not same_job:
+        outcome = JOB_FINISHED if status.code == STATUS_FINISHED else JOB_STOPPED
+        events.append(PrinterEvent(outcome, previous.file_name))
+    if not _active(status):
+        return events
+    if not same_job:
+        events.append(PrinterEvent(JOB_STARTED, status.file_name))
+    elif previous.code == STATUS_PRINTING and status.code == STATUS_PAUSED:
+        events.append(PrinterEvent(JOB_PAUSED, status.file_name))
+    elif previous.code == STATUS_PAUSED and status.code == STATUS_PRINTING:
+        events.append(PrinterEvent(JOB_RESUMED, status.file_name))
+    first = (previous.current_layer or 0) + 1 if same_job else 1
+    if status.current_layer is not None and status.current_layer >= first:
+        events.append(
+            PrinterEvent(
+                JOB_LAYER_CHANGED,
+                status.file_name,
+                first,
+                status.current_layer,
+            ),
+        )
+    return events
@@ -0,0 +1,122 @@
+"""Shared poller for large numbers of printers."""
+from __future__ import annotations
+
+import asyncio
+from collections import deque
+from datetime import datetime, timedelta
+import logging
+import time
+from typing import TYPE_CHECKING, Callable
+
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.dispatcher import async_dispatcher_send
+from homeassistant.helpers.event import async_track_time_interval
+
+from .client.printer import percentile
+from .const import FLEET_MAX_CONCURRENT, FLEET_STAGGER
+
+if TYPE_CHECKING:
+    from . import AnycubicDataUpdateCoordinator
+
+_LOGGER = logging.getLogger(__name__)
+
+# Number of poll durations kept per printer
+DURATION_SAMPLES = 50
+SIGNAL_FLEET_POLLED = "anycubic_fleet_polled"
+
+
+class FleetPoller:
+    """
+    Poll all registered printers from a single timer.
+
+    Each printer is polled at the interval chosen by its coordinator, but the
+    number of printers polled at once is limited and the first polls are staggered
+    so they do not all hit the network at the same time.
+    """
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        max_concurrent: int = FLEET_MAX_CONCURRENT,
+        stagger: float = FLEET_STAGGER,
+    ) -> None:
+        """Set up poller."""
+        self.hass = hass
+        self.stagger = stagger
+        self.durations: dict[str, deque[float]] = {}
+        self.failures: dict[str, int] = {}
+        self._coordinators: dict[str, AnycubicDataUpdateCoordinator] = {}
+        self._due: dict[str, float] = {}
+        self._polling: set[str] = set()
+        self._semaphore = asyncio.Semaphore(max_concurrent)
+        self._unsub_tick: Callable[[], None] | None = None
+
+    def register(
+        self,
+        entry_id: str,
+        coordinator: AnycubicDataUpdateCoordinator,
+        poll_now: bool = False,
+    ) -> None:
+        """
+        Start polling the printer of a config entry.
+
+        The first poll is after the poll interval of the printer, or as soon as
+        possible if it was never polled.
+        """
+        offset = len(self._coordinators) * self.stagger
+        self._coordinators[entry_id] = coordinator
+        interval = 0.0 if poll_now else coordinator.poll_interval.total_seconds()
+        self._due[entry_id] = time.monotonic() + interval + offset
+        self.durations.setdefault(entry_id, deque(maxlen=DURATION_SAMPLES))
+        self.failures.setdefault(entry_id, 0)
+        if self._unsub_tick is None:
+            self._unsub_tick = async_track_time_interval(
+                self.hass,
+                self._tick,
+                timedelta(seconds=1),
+            )
+
+    def unregister(self, entry_id: str) -> None:
+        """Stop polling the printer of a config entry."""
+        self._coordinators.pop(entry_id, None)
+        self._due.pop(entry_id, None)
+        self.durations.pop(entry_id, None)
+        self.failures.pop(entry_id, None)
+        if not self._coordinators and self._unsub_tick is not None:
+            self._unsub_tick()
+            self._unsub_tick = None
+
+    @callback
+    def _tick(self, _now: datetime) -> None:
+        """Start polling the printers that are due."""
+        now = time.monotonic()
+        for entry_id, due in self._due.items():
+            if due <= now and entry_id not in self._polling:
+                self._polling.add(entry_id)
+                self.hass.async_create_task(self._async_poll(entry_id))
+
+    async def _async_poll(self, entry_id: str) -> None:
+        """Poll a printer, waiting for a free slot."""
+        try:
+            async with self._semaphore:
+                if (coordinator := self._coordinators.get(entry_id)) is None:
+                    return  # Unregistered while waiting
+                start = time.monotonic()
+                await coordinator.async_refresh()
+                end = time.monotonic()
+            if entry_id not in self._coordinators:
+                return
+            self.durations[entry_id].append(end - start)
+            if not coordinator.last_update_success:
+                self.failures[entry_id] += 1
+            self._due[entry_id] = end + coordinator.poll_interval.total_seconds()
+            async_dispatcher_send(self.hass, f"{SIGNAL_FLEET_POLLED}_{entry_id}")
+        finally:
+            self._polling.discard(entry_id)
+
+    def duration_percentile(self, percent: float) -> float | None:
+        """Percentile of recent poll durations across all printers."""
+        return percentile(
+            [d for durations in self.durations.values() for d in durations],
+            percent,
+        )
@@ -0,0 +1,313 @@
+"""History of the print jobs of a printer."""
+from __future__ import annotations
+
+import asyncio
+from datetime import datetime, timedelta
+import json
+import logging
+import os
+from typing import Any, AsyncIterator, NamedTuple
+
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers.storage import STORAGE_DIR
+import homeassistant.util.dt as dt_util
+
+from .client import PrinterStatus
+from .const import (
+    DOMAIN,
+    HISTORY_DAYS,
+    HISTORY_INDEX_STRIDE,
+    HISTORY_QUERY_BATCH,
+    HISTORY_RATE_DAYS,
+    STATUS_FINISHED,
+    STATUS_PAUSED,
+    STATUS_PRINTING,
+    STATUS_STOP,
+)
+
+_LOGGER = logging.getLogger(__name__)
+
+SIGNAL_HISTORY_UPDATED = "anycubic_history_updated"
+
+
+class JobRecord(NamedTuple):
+    """A print job, as stored in the history."""
+
+    file_name: str
+    total_layers: int
+    layers_printed: int
+    layer_height: float
+    resin: float
+    started: int
+    ended: int
+    outcome: str
+
+
+def _empty_index() -> dict[str, Any]:
+    """Index of an empty history."""
+    return {
+        # Bytes of the history covered by the index
+        "size": 0,
+        "count": 0,
+        "resin": 0.0,
+        "finished_seconds": 0,
+        "finished_layers": 0,
+        # Number of jobs that ended on each of the last days
+        "daily": {},
+        # End time and offset of every `HISTORY_INDEX_STRIDE` jobs, to seek queries
+        "offsets": [],
+    }
+
+
+def _decode(line: bytes) -> JobRecord | None:
+    """Decode a job of the history, if it is not corrupted."""
+    try:
+        return JobRecord(*json.loads(line))
+    except (TypeError, ValueError):
+        _LOGGER.debug(f"Skipping invalid job in history: {line!r}")
+        return None
+
+
+class JobHistory:
+    """
+    Append-only history of the jobs of a printer.
+
+    Each job is a compact JSON array on its own line. A small index next to it keeps
+    the aggregates and the offsets of some of the jobs, so loading the history does
+    not read it all and queries can seek close to the first matching job.
+    """
+
+    def __init__(self, hass: HomeAssistant, identifier: str) -> None:
+        """Set up history of a printer."""
+        self.hass = hass
+        directory = hass.config.path(STORAGE_DIR, DOMAIN, "history")
+        self.path = os.path.join(directory, f"{identifier}.jsonl")
+        self.index_path = os.path.join(directory, f"{identifier}.index.json")
+        self._index = _empty_index()
+        # Last status and start time of the job being printed
+        self._job: tuple[PrinterStatus, datetime] | None = None
+        self._lock = asyncio.Lock()
+
+    @property
+    def job_count(self) -> int:
+        """Number of jobs in the history."""
+        return self._index["count"]
+
+    @property
+    def resin_used(self) -> float:
+        """Resin used by all jobs in mL."""
+        return round(self._index["resin"], 2)
+
+    @property
+    def average_layer_time(self) -> float | None:
+        """Average time to print a layer of finished jobs in seconds."""
+        if not self._index["finished_layers"]:
+            return None
+        return round(
+            self._index["finished_seconds"] / self._index["finished_layers"],
+            2,
+        )
+
+    def jobs_per_day(self) -> float:
+        """Average number of jobs per day over the last days."""
+        today = dt_util.now().date()
+        days = (today - timedelta(days=i) for i in range(HISTORY_RATE_DAYS))
+        daily = self._index["daily"]
+        return round(
+            sum(daily.get(d.isoformat(), 0) for d in days) / HISTORY_RATE_DAYS,
+            2,
+        )
+
+    async def async_load(self) -> None:
+        """Load the index of the history."""
+        self._index = await self.hass.async_add_executor_job(self._load)
+
+    async def async_track(
+        self,
+        status: PrinterStatus,
+        now: datetime,
+    ) -> JobRecord | None:
+        """Follow the jobs through the statuses of the printer, recording those that end."""
+        code = status.code
+        record = None
+        if self._job is not None and (
+            code not in (STATUS_PRINTING, STATUS_PAUSED)
+            or status.file_name != self._job[0].file_name
+        ):
+            job, started = self._job
+            self._job = None
+            total_layers = job.total_layers or 0
+            record = JobRecord(
+                file_name=job.file_name or "",
+                total_layers=total_layers,
+                layers_printed=(
+                    total_layers if code == STATUS_FINISHED else job.current_layer or 0
+                ),
+                layer_height=job.layer_height or 0.0,
+                resin=job.resin or 0.0,
+                started=int(started.timestamp()),
+                ended=int(now.timestamp()),
+                outcome=STATUS_FINISHED if code == STATUS_FINISHED else STATUS_STOP,
+            )
+            await self.async_append(record)
+        if code in (STATUS_PRINTING, STATUS_PAUSED):
+            if self._job is None:
+                # May have started before the printer was first seen printing it
+                elapsed = (status.time_total or 0) - (status.time_remaining or 0)
+                started = now - timedelta(seconds=max(elapsed, 0))
+            else:
+                started = self._job[1]
+            self._job = (status, started)
+        return record
+
+    async def async_append(self, record: JobRecord) -> None:
+        """Add a job to the history."""
+        async with self._lock:
+            await self.hass.async_add_executor_job(self._append, record)
+
+    async def async_remove(self) -> None:
+        """Delete the history and its index."""
+        async with self._lock:
+            await self.hass.async_add_executor_job(self._remove)
+            self._index = _empty_index()
+
+    async def async_query(
+        self,
+        start: datetime | None = None,
+        end: datetime | None = None,
+        file_name: str | None = None,
+        batch_size: int = HISTORY_QUERY_BATCH,
+    ) -> AsyncIterator[list[JobRecord]]:
+        """Find jobs that ended between two times, in batches of at most `batch_size`."""
+        start_time = 0 if start is None else start.timestamp()
+        end_time = None if end is None else end.timestamp()
+        offset: int | None = 0
+        for ended, job_offset in self._index["offsets"]:
+            if ended >= start_time:
+                break
+            offset = job_offset
+        while offset is not None:
+            records, offset = await self.hass.async_add_executor_job(
+                self._read,
+                offset,
+                start_time,
+                end_time,
+                file_name,
+                batch_size,
+            )
+            if records:
+                yield records
+
+    def _load(self) -> dict[str, Any]:
+        """Read the index, bringing it up to date with the history if needed."""
+        try:
+            with open(self.index_path, encoding="utf8") as file:
+                index = json.load(file)
+        except (OSError, ValueError):
+            index = _empty_index()
+        try:
+            size = os.path.getsize(self.path)
+        except OSError:
+            return _empty_index()
+        if index.get("size", 0) > size:
+            index = _empty_index()  # History was replaced, reindex it
+        if index["size"] < size:
+            _LOGGER.debug(f"Indexing history {self.path} from {index['size']}")
+            with open(self.path, "rb") as file:
+                file.seek(index["size"])
+                while line := file.readline():
+                    if line.endswith(b"\n"):
+                        self._add_to_index(index, line, file.tell() - len(line))
+            try:
+                self._write_index(index)
+            except OSError as e:
+                _LOGGER.warning(f"Failed to save index of job history: {e}")
+        return index
+
+    def _append(self, record: JobRecord) -> None:
+        """Write a job at the end of the history and update the index."""
+        line = (
+            json.dumps(list(record), ensure_ascii=False, separators=(",", ":")) + "\n"
+        ).encode("utf8")
+        try:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            with open(self.path, "a+b") as file:
+                offset = file.seek(0, os.SEEK_END)
+                if offset:
+                    file.seek(offset - 1)
+                    if file.read(1) != b"\n":
+                        # Previous write was cut off, do not join the job to it
+                        line = b"\n" + line
+                file.write(line)
+            if offset != self._index["size"]:
+                self._index = self._load()  # Index is out of date
+            else:
+                self._add_to_index(self._index, line, offset)
+                self._write_index(self._index)
+        except OSError as e:
+            _LOGGER.warning(f"Failed to save job history: {e}")
+
+    def _remove(self) -> None:
+        """Delete the history and its index from disk."""
+        for path in (self.path, self.index_path):
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            except OSError as e:
+                _LOGGER.warning(f"Failed to remove job history: {e}")
+
+    @staticmethod
+    def _add_to_index(index: dict[str, Any], line: bytes, offset: int) -> None:
+        """Add a job of the history to the index."""
+        index["size"] = offset + len(line)
+        if (record := _decode(line)) is None:
+            return
+        if index["count"] % HISTORY_INDEX_STRIDE == 0:
+            index["offsets"].append([record.ended, offset])
+        index["count"] += 1
+        index["resin"] += record.resin
+        if record.outcome == STATUS_FINISHED:
+            index["finished_seconds"] += record.ended - record.started
+            index["finished_layers"] += record.layers_printed
+        day = dt_util.as_local(dt_util.utc_from_timestamp(record.ended)).date()
+        daily = index["daily"]
+        daily[day.isoformat()] = daily.get(day.isoformat(), 0) + 1
+        for old in sorted(daily)[:-HISTORY_DAYS]:
+            del daily[old]
+
+    def _write_index(self, index: dict[str, Any]) -> None:
+        """Replace the index on disk."""
+        temporary = f"{self.index_path}.tmp"
+        with open(temporary, "w", encoding="utf8") as file:
+            json.dump(index, file, separators=(",", ":"))
+        os.replace(temporary, self.index_path)
+
+    def _read(
+        self,
+        offset: int,
+        start_time: float,
+        end_time: float | None,
+        file_name: str | None,
+        batch_size: int,
+    ) -> tuple[list[JobRecord], int | None]:
+        """Read matching jobs from the offset, returning where to continue from."""
+        records: list[JobRecord] = []
+        try:
+            file = open(self.path, "rb")
+        except FileNotFoundError:
+            return records, None
+        with file:
+            file.seek(offset)
+            while line := file.readline():
+                if not line.endswith(b"\n"):
+                    break  # Still being written
+                if (record := _decode(line)) is None:
+                    continue
+                if end_time is not None and record.ended > end_time:
+                    break  # Jobs are in the order they ended
+                if record.ended >= start_time and file_name in (None, record.file_name):
+                    records.append(record)
+                    if len(records) >= batch_size:
+                        return records, file.tell()
+        return records, None
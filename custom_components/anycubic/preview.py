@@ -0,0 +1,189 @@
+"""Decoding and caching of print previews."""
+from __future__ import annotations
+
+import asyncio
+from collections import OrderedDict
+from functools import partial
+import hashlib
+from itertools import islice
+import logging
+import os
+import shutil
+import struct
+from typing import Awaitable, Callable, Iterable
+import zlib
+
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers.storage import STORAGE_DIR
+
+from .client import AnycubicError
+from .client.printer import PREVIEW_HEIGHT, PREVIEW_WIDTH
+from .const import DOMAIN, PREVIEW_CACHE_DISK_SIZE, PREVIEW_CACHE_MEMORY_SIZE
+
+_LOGGER = logging.getLogger(__name__)
+
+# Lookup tables to expand the channels of little endian RGB565 pixels to 8 bits
+_RED = bytes((h & 0xF8) | (h >> 5) for h in range(256))
+_GREEN_HIGH = bytes(((h & 0x07) << 5) | ((h & 0x07) >> 1) for h in range(256))
+_GREEN_LOW = bytes((low >> 5) << 2 for low in range(256))
+_BLUE = bytes(((low & 0x1F) << 3) | ((low & 0x1F) >> 2) for low in range(256))
+
+
+def _png_chunk(tag: bytes, data: bytes) -> bytes:
+    """Build a PNG chunk."""
+    return (
+        struct.pack(">I", len(data))
+        + tag
+        + data
+        + struct.pack(">I", zlib.crc32(tag + data) & 0xFFFFFFFF)
+    )
+
+
+def decode_preview(
+    data: bytes,
+    width: int = PREVIEW_WIDTH,
+    height: int = PREVIEW_HEIGHT,
+) -> bytes:
+    """
+    Convert the RGB565 pixel buffer of a preview to a PNG.
+
+    Channels are converted for the whole buffer at once with lookup tables
+    rather than pixel by pixel.
+    """
+    size = width * height
+    if len(data) < size * 2:
+        raise ValueError(f"Expected {size * 2} bytes of preview, got {len(data)}")
+    low, high = data[0 : size * 2 : 2], data[1 : size * 2 : 2]
+    # Green is spread over both bytes, the bits from each are distinct so OR them
+    green = (
+        int.from_bytes(high.translate(_GREEN_HIGH), "big")
+        | int.from_bytes(low.translate(_GREEN_LOW), "big")
+    ).to_bytes(size, "big")
+    rgb = bytearray(size * 3)
+    rgb[0::3] = high.translate(_RED)
+    rgb[1::3] = green
+    rgb[2::3] = low.translate(_BLUE)
+    stride = width * 3
+    # Each row is prefixed with filter type 0 (None)
+    raw = b"".join(
+        b"\x00" + rgb[row : row + stride] for row in range(0, size * 3, stride)
+    )
+    return b"".join(
+        (
+            b"\x89PNG\r\n\x1a\n",
+            _png_chunk(b"IHDR", struct.pack(">IIBBBBB", width, height, 8, 2, 0, 0, 0)),
+            _png_chunk(b"IDAT", zlib.compress(raw)),
+            _png_chunk(b"IEND", b""),
+        ),
+    )
+
+
+class PreviewCache:
+    """
+    Least recently used cache of decoded previews.
+
+    Previews are kept in memory and on disk, keyed by file number and name,
+    so each preview is only fetched from the printer and decoded once.
+    """
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        identifier: str,
+        memory_size: int = PREVIEW_CACHE_MEMORY_SIZE,
+        disk_size: int = PREVIEW_CACHE_DISK_SIZE,
+    ) -> None:
+        """Set up cache for a printer."""
+        self.hass = hass
+        self.memory_size = memory_size
+        self.disk_size = disk_size
+        self.path = hass.config.path(STORAGE_DIR, DOMAIN, "previews", identifier)
+        self._memory: OrderedDict[str, bytes] = OrderedDict()
+        self._lock = asyncio.Lock()
+
+    @staticmethod
+    def _key(file_number: str, file_name: str) -> str:
+        """Key of the preview of a file."""
+        digest = hashlib.sha256(file_name.encode()).hexdigest()[:16]
+        return f"{file_number}-{digest}"
+
+    async def async_get(
+        self,
+        file_number: str,
+        file_name: str,
+        fetch: Callable[[str], Awaitable[bytes]],
+    ) -> bytes:
+        """Get the PNG preview of a file, fetching it from the printer if needed."""
+        key = self._key(file_number, file_name)
+        async with self._lock:
+            if (image := self._memory.get(key)) is None:
+                image = await self.hass.async_add_executor_job(self._read, key)
+            if image is None:
+                data = await fetch(file_number)
+                image = await self.hass.async_add_executor_job(decode_preview, data)
+                await self.hass.async_add_executor_job(self._write, key, image)
+            self._memory[key] = image
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.memory_size:
+                self._memory.popitem(last=False)
+        return image
+
+    async def async_prefetch(
+        self,
+        files: Iterable[tuple[str, str]],
+        fetch: Callable[[str], Awaitable[bytes]],
+        semaphore: asyncio.Semaphore,
+    ) -> None:
+        """
+        Fetch the previews of files that are not cached yet, one at a time.
+
+        Previews are only written to disk, leaving the previews in memory alone, and
+        no more are fetched than fit on disk. `semaphore` is shared by all printers
+        to bound how many previews are prefetched at once.
+        """
+        for file_name, file_number in islice(files, self.disk_size):
+            key = self._key(file_number, file_name)
+            async with semaphore, self._lock:
+                if key in self._memory or await self.hass.async_add_executor_job(
+                    os.path.exists,
+                    os.path.join(self.path, f"{key}.png"),
+                ):
+                    continue
+                try:
+                    data = await fetch(file_number)
+                    image = await self.hass.async_add_executor_job(decode_preview, data)
+                except (asyncio.TimeoutError, OSError, AnycubicError, ValueError) as e:
+                    _LOGGER.debug(f'Failed to prefetch preview of "{file_name}": {e}')
+                    continue
+                await self.hass.async_add_executor_job(self._write, key, image)
+
+    async def async_remove(self) -> None:
+        """Delete the cached previews."""
+        async with self._lock:
+            self._memory.clear()
+            await self.hass.async_add_executor_job(
+                partial(shutil.rmtree, self.path, ignore_errors=True),
+            )
+
+    def _read(self, key: str) -> bytes | None:
+        """Read a preview from disk, marking it as recently used."""
+        path = os.path.join(self.path, f"{key}.png")
+        try:
+            with open(path, "rb") as file:
+                image = file.read()
+            os.utime(path)
+        except FileNotFoundError:
+            return None
+        return image
+
+    def _write(self, key: str, image: bytes) -> None:
+        """Write a preview to disk, removing the least recently used ones."""
+        try:
+            os.makedirs(self.path, exist_ok=True)
+            with open(os.path.join(self.path, f"{key}.png"), "wb") as file:
+                file.write(image)
+            entries = sorted(os.scandir(self.path), key=lambda e: e.stat().st_mtime)
+            for entry in entries[: max(0, len(entries) - self.disk_size)]:
+                os.remove(entry.path)
+        except OSError as e:
+            _LOGGER.warning(f"Failed to cache preview on disk: {e}")
@@ -0,0 +1,76 @@
+"""Estimation of job progress between polls of the printer."""
+from __future__ import annotations
+
+from typing import NamedTuple
+
+from .client import UNKNOWN_STATUS, PrinterStatus
+from .const import PROGRESS_SMOOTHING, STATUS_PRINTING
+
+SIGNAL_PROGRESS = "anycubic_progress"
+
+
+class ProgressEstimate(NamedTuple):
+    """Estimated progress of a job."""
+
+    progress: int
+    time_remaining: float
+
+
+class ProgressModel:
+    """
+    Estimate the progress of a job from the time it takes to print each layer.
+
+    The time per layer is measured from the layer changes seen in successive
+    statuses, and smoothed so a single slow or fast layer does not throw it off.
+    Between polls, the layer being printed is extrapolated from the last status.
+    """
+
+    def __init__(self, smoothing: float = PROGRESS_SMOOTHING) -> None:
+        """Set up model without any job."""
+        self.smoothing = smoothing
+        self.layer_time: float | None = None
+        self._status = UNKNOWN_STATUS
+        self._synced = 0.0
+        # Layer being printed and when it was first seen, while printing
+        self._anchor: tuple[int, float] | None = None
+
+    def resync(self, status: PrinterStatus, now: float) -> None:
+        """Update the model with a fresh status from the printer."""
+        if status.file_name != self._status.file_name:
+            self.layer_time, self._anchor = None, None  # New job
+        layer = status.current_layer
+        if status.code != STATUS_PRINTING or layer is None:
+            self._anchor = None  # Pauses should not count towards the layer time
+        elif self._anchor is None:
+            self._anchor = (layer, now)
+        elif layer > self._anchor[0]:
+            anchor_layer, anchor_time = self._anchor
+            sample = (now - anchor_time) / (layer - anchor_layer)
+            if self.layer_time is None:
+                self.layer_time = sample
+            else:
+                self.layer_time += self.smoothing * (sample - self.layer_time)
+            self._anchor = (layer, now)
+        self._status = status
+        self._synced = now
+
+    def estimate(self, now: float) -> ProgressEstimate | None:
+        """Estimate the progress of the job at the given time."""
+        status = self._status
+        if status.progress is None or status.time_remaining is None:
+            return None
+        progress, remaining = status.progress, float(status.time_remaining)
+        if status.code != STATUS_PRINTING:
+            return ProgressEstimate(progress, remaining)
+        elapsed = now - self._synced
+        total, current = status.total_layers or 0, status.current_layer or 0
+        if self.layer_time is None or self._anchor is None or total <= current:
+            # Only count down the time remaining reported by the printer
+            return ProgressEstimate(progress, max(remaining - elapsed, 0))
+        layer = min(current + (now - self._anchor[1]) / self.layer_time, total)
+        # Scale to the progress reported by the printer, which may not be by layer
+        progress += int((layer - current) / (total - current) * (100 - progress))
+        return ProgressEstimate(
+            min(progress, 99),
+            max((total - layer) * self.layer_time, 0),
+        )
@@ -1,21 +1,34 @@
 """Sensor entities for component."""
 from __future__ import annotations
 
+from abc import ABC, abstractmethod
 from datetime import datetime, timedelta
+import time
 from typing import Any
 
-from homeassistant.components.sensor import SensorDeviceClass, SensorEntity
+from homeassistant.components.sensor import (
+    SensorDeviceClass,
+    SensorEntity,
+    SensorStateClass,
+)
 from homeassistant.config_entries import ConfigEntry
-from homeassistant.const import PERCENTAGE
-from homeassistant.core import HomeAssistant
+from homeassistant.const import PERCENTAGE, UnitOfLength, UnitOfTime, UnitOfVolume
+from homeassistant.core import HomeAssistant, callback
 from homeassistant.helpers import entity_platform
-from homeassistant.helpers.entity import DeviceInfo
+from homeassistant.helpers.dispatcher import async_dispatcher_connect
+from homeassistant.helpers.entity import EntityCategory
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
-from homeassistant.helpers.update_coordinator import CoordinatorEntity
+import homeassistant.util.dt as dt_util
 
-from . import _LOGGER, AnycubicDataUpdateCoordinator
+from . import AnycubicDataUpdateCoordinator
+from .client import PrinterStatus
+from .client.printer import percentile
 from .const import (
+    DATA_FLEET,
     DOMAIN,
+    FINISH_TIME_TOLERANCE,
+    SERVICE_LIST_FILES,
+    SERVICE_QUERY_HISTORY,
     SERVICE_SEND_COMMAND,
     SERVICE_SET_PRINTER_NAME,
     STATUS_FINISHED,
@@ -23,19 +36,24 @@ from .const import (
     STATUS_PAUSED,
     STATUS_PRINTING,
 )
+from .entity import AnycubicEntity
+from .fleet import SIGNAL_FLEET_POLLED, FleetPoller
+from .history import SIGNAL_HISTORY_UPDATED, JobHistory
+from .progress import SIGNAL_PROGRESS
 from .services import (
+    QUERY_HISTORY_SCHEMA,
     SEND_COMMAND_SCHEMA,
     SET_PRINTER_NAME_SCHEMA,
+    list_files,
+    query_history,
     send_command,
     set_printer_name,
 )
 
 
-class AnycubicSensorBase(CoordinatorEntity):
+class AnycubicSensorBase(AnycubicEntity):
     """Base entity for all sensors."""
 
-    coordinator: AnycubicDataUpdateCoordinator
-
     def __init__(
         self,
         coordinator: AnycubicDataUpdateCoordinator,
@@ -48,21 +66,18 @@ class AnycubicSensorBase(CoordinatorEntity):
         self._attr_name = f"Anycubic Printer {sensor_type}"
         self._attr_unique_id = f"{sensor_type}-{device_id}".lower()
 
-    @property
-    def device_info(self) -> DeviceInfo:
-        """Device info."""
-        return self.coordinator.device_info
-
-    @property
-    def available(self) -> bool:
-        """Check availability."""
-        return self.coordinator.last_update_success and self.coordinator.data["status"]
-
 
 class AnycubicPrintStatusSensor(AnycubicSensorBase):
     """Anycubic Printer State."""
 
     _attr_icon = "mdi:printer-3d"
+    _data_sections = ("info", "name", "status")
+    # Change with every poll, numeric values are recorded by their own sensors
+    _unrecorded_attributes = frozenset(
+        {"name", "model", "firmware_version", "identifier", "wifi_ssid"}.union(
+            PrinterStatus._fields,
+        ),
+    )
 
     def __init__(
         self,
@@ -75,8 +90,7 @@ class AnycubicPrintStatusSensor(AnycubicSensorBase):
     @property
     def state(self) -> str | None:
         """State of printer."""
-        status: dict[str, Any] = self.coordinator.data["status"]
-        status_code = status.get("code")
+        status_code: str = self.coordinator.data["status"].code
         return STATUS_LABELS.get(status_code, status_code) or None
 
     @property
@@ -84,13 +98,61 @@ class AnycubicPrintStatusSensor(AnycubicSensorBase):
         """Return a list of attributes."""
         return {
             "name": self.coordinator.data["name"],
-            "file_list": list(self.coordinator.data["files"]),
             **self.coordinator.data["info"],
-            **self.coordinator.data["status"],
+            **self.coordinator.data["status"].as_dict(),
+            "stale": self.coordinator.stale,
         }
 
 
-class AnycubicPrintJobPercentageSensor(AnycubicSensorBase, SensorEntity):
+class AnycubicProgressSensorBase(AnycubicSensorBase, SensorEntity, ABC):
+    """Base for sensors estimating the progress of a job in between polls."""
+
+    def __init__(
+        self,
+        coordinator: AnycubicDataUpdateCoordinator,
+        sensor_type: str,
+        device_id: str,
+    ) -> None:
+        """Set up progress sensor."""
+        super().__init__(coordinator, sensor_type, device_id)
+        self._attr_native_value = self._estimate()
+
+    @abstractmethod
+    def _estimate(self) -> Any:
+        """Estimate the value of the sensor."""
+
+    async def async_added_to_hass(self) -> None:
+        """Update the estimate in between polls."""
+        await super().async_added_to_hass()
+        self.async_on_remove(
+            async_dispatcher_connect(
+                self.hass,
+                f"{SIGNAL_PROGRESS}_{self.coordinator.entry_id}",
+                self._handle_progress_update,
+            ),
+        )
+
+    @callback
+    def _handle_progress_update(self) -> None:
+        """Write state if the estimate changed."""
+        value = self._estimate()
+        if value != self._attr_native_value:
+            self._attr_native_value = value
+            self.async_write_ha_state()
+
+    @callback
+    def _handle_coordinator_update(self) -> None:
+        """Resync the estimate with the new status from the printer."""
+        value = self._estimate()
+        if value == self._attr_native_value:
+            super()._handle_coordinator_update()
+            return
+        self._attr_native_value = value
+        self._was_available = self.available
+        self.async_write_ha_state()
+
+
+class AnycubicPrintJobPercentageSensor(AnycubicProgressSensorBase):
     """Printer Progress Sensor."""
 
     _attr_native_unit_of_measurement = PERCENTAGE
@@ -104,19 +166,19 @@ class AnycubicPrintJobPercentageSensor(AnycubicSensorBase, SensorEntity):
         """Set up printer progress sensor."""
         super().__init__(coordinator, "Job Percentage", device_id)
 
-    @property
-    def native_value(self) -> int | None:
-        """Job progress value."""
-        status: dict[str, Any] = self.coordinator.data["status"]
-        _LOGGER.info(f"{status}")
-        if status["code"] not in (STATUS_PRINTING, STATUS_PAUSED, STATUS_FINISHED):
+    def _estimate(self) -> int | None:
+        """Job progress value, estimated in between polls while printing."""
+        status: PrinterStatus = self.coordinator.data["status"]
+        if status.code not in (STATUS_PRINTING, STATUS_PAUSED, STATUS_FINISHED):
             return None
-        if status["code"] == STATUS_FINISHED:
+        if status.code == STATUS_FINISHED:
             return 100
-        return status.get("progress", 0)
+        if estimate := self.coordinator.progress.estimate(time.monotonic()):
+            return estimate.progress
+        return status.progress or 0
 
 
-class AnycubicPrintEstimatedFinishTimeSensor(AnycubicSensorBase, SensorEntity):
+class AnycubicPrintEstimatedFinishTimeSensor(AnycubicProgressSensorBase):
     """Estimated Print End Time Sensor."""
 
     _attr_device_class = SensorDeviceClass.TIMESTAMP
@@ -129,14 +191,388 @@ class AnycubicPrintEstimatedFinishTimeSensor(AnycubicSensorBase, SensorEntity):
         """Set up Estimated Print End Time Sensor."""
         super().__init__(coordinator, "Estimated Finish Time", device_id)
 
-    @property
-    def native_value(self) -> datetime | None:
-        """Return Estimated print time."""
-        status: dict[str, Any] = self.coordinator.data["status"]
-        if status["code"] not in (STATUS_PRINTING, STATUS_PAUSED):
+    def _estimate(self) -> datetime | None:
+        """
+        Estimate print finish time.
+
+        The previous estimate is kept if the new one is within the tolerance,
+        to avoid changing the state on every update due to rounding of the
+        remaining time reported by the printer.
+        """
+        status: PrinterStatus = self.coordinator.data["status"]
+        if status.code not in (STATUS_PRINTING, STATUS_PAUSED):
             return None
-        read_time = self.coordinator.data["last_read_time"]
-        return read_time + timedelta(seconds=status.get("time_remaining", 0))
+        if estimate := self.coordinator.progress.estimate(time.monotonic()):
+            remaining = estimate.time_remaining
+        else:
+            remaining = status.time_remaining or 0
+        estimate = dt_util.utcnow() + timedelta(seconds=remaining)
+        previous: datetime | None = self._attr_native_value
+        if previous is not None and abs(estimate - previous) <= FINISH_TIME_TOLERANCE:
+            return previous
+        return estimate
+
+
+class AnycubicJobSensorBase(AnycubicSensorBase, SensorEntity):
+    """Base for sensors of a value of the job, only known while printing or paused."""
+
+    _attr_state_class = SensorStateClass.MEASUREMENT
+    # Field of the status of the printer
+    _field: str
+
+    @property
+    def native_value(self) -> int | float | None:
+        """Value of the job, as last reported by the printer."""
+        return getattr(self.coordinator.data["status"], self._field)
+
+
+class AnycubicCurrentLayerSensor(AnycubicJobSensorBase):
+    """Layer being printed."""
+
+    _attr_icon = "mdi:layers-triple"
+    _field = "current_layer"
+
+    def __init__(
+        self,
+        coordinator: AnycubicDataUpdateCoordinator,
+        device_id: str,
+    ) -> None:
+        """Set up current layer sensor."""
+        super().__init__(coordinator, "Current Layer", device_id)
+
+
+class AnycubicTotalLayersSensor(AnycubicJobSensorBase):
+    """Number of layers of the job."""
+
+    _attr_icon = "mdi:layers-triple-outline"
+    _field = "total_layers"
+
+    def __init__(
+        self,
+        coordinator: AnycubicDataUpdateCoordinator,
+        device_id: str,
+    ) -> None:
+        """Set up total layers sensor."""
+        super().__init__(coordinator, "Total Layers", device_id)
+
+
+class AnycubicTimeRemainingSensor(AnycubicJobSensorBase):
+    """Time left until the job is done."""
+
+    _attr_device_class = SensorDeviceClass.DURATION
+    _attr_native_unit_of_measurement = UnitOfTime.SECONDS
+    _field = "time_remaining"
+
+    def __init__(
+        self,
+        coordinator: AnycubicDataUpdateCoordinator,
+        device_id: str,
+    ) -> None:
+        """Set up time remaining sensor."""
+        super().__init__(coordinator, "Time Remaining", device_id)
+
+
+class AnycubicLayerHeightSensor(AnycubicJobSensorBase):
+    """Height of the layers of the job."""
+
+    _attr_icon = "mdi:arrow-expand-vertical"
+    _attr_native_unit_of_measurement = UnitOfLength.MILLIMETERS
+    _field = "layer_height"
+
+    def __init__(
+        self,
+        coordinator: AnycubicDataUpdateCoordinator,
+        device_id: str,
+    ) -> None:
+        """Set up layer height sensor."""
+        super().__init__(coordinator, "Layer Height", device_id)
+
+
+class AnycubicResinVolumeSensor(AnycubicJobSensorBase):
+    """Resin used by the job."""
+
+    _attr_icon = "mdi:water"
+    _attr_native_unit_of_measurement = UnitOfVolume.MILLILITERS
+    _field = "resin"
+
+    def __init__(
+        self,
+        coordinator: AnycubicDataUpdateCoordinator,
+        device_id: str,
+    ) -> None:
+        """Set up resin volume sensor."""
+        super().__init__(coordinator, "Resin Volume", device_id)
+
+
+class AnycubicFleetSensorBase(AnycubicSensorBase, SensorEntity):
+    """Base for diagnostic sensors of the fleet poller."""
+
+    _attr_entity_category = EntityCategory.DIAGNOSTIC
+
+    def __init__(
+        self,
+        coordinator: AnycubicDataUpdateCoordinator,
+        sensor_type: str,
+        device_id: str,
+        fleet: FleetPoller,
+    ) -> None:
+        """Set up fleet sensor."""
+        super().__init__(coordinator, sensor_type, device_id)
+        self._fleet = fleet
+        self._entry_id = coordinator.config_entry.entry_id
+
+    @property
+    def available(self) -> bool:
+        """Stats remain available while the printer is unreachable."""
+        return True
+
+    async def async_added_to_hass(self) -> None:
+        """Update once the fleet poller has recorded a poll of the printer."""
+        await super().async_added_to_hass()
+        self.async_on_remove(
+            async_dispatcher_connect(
+                self.hass,
+                f"{SIGNAL_FLEET_POLLED}_{self._entry_id}",
+                self.async_write_ha_state,
+            ),
+        )
+
+    @callback
+    def _handle_coordinator_update(self) -> None:
+        """Stats are only updated by the fleet poller."""
+
+
+class AnycubicFleetPollDurationSensor(AnycubicFleetSensorBase):
+    """Duration of recent polls of the printer."""
+
+    _attr_icon = "mdi:timer-outline"
+    _attr_native_unit_of_measurement = UnitOfTime.SECONDS
+    _attr_state_class = SensorStateClass.MEASUREMENT
+
+    def __init__(
+        self,
+        coordinator: AnycubicDataUpdateCoordinator,
+        device_id: str,
+        fleet: FleetPoller,
+    ) -> None:
+        """Set up poll duration sensor."""
+        super().__init__(coordinator, "Poll Duration", device_id, fleet)
+
+    @property
+    def native_value(self) -> float | None:
+        """Median duration of recent polls of the printer."""
+        median = percentile(list(self._fleet.durations.get(self._entry_id, [])), 50)
+        return None if median is None else round(median, 3)
+
+    @property
+    def extra_state_attributes(self) -> dict[str, Any]:
+        """Poll durations across all printers."""
+        return {
+            "fleet_p50": self._fleet.duration_percentile(50),
+            "fleet_p95": self._fleet.duration_percentile(95),
+            "fleet_size": len(self._fleet.durations),
+        }
+
+
+class AnycubicFleetPollFailuresSensor(AnycubicFleetSensorBase):
+    """Number of failed polls of the printer."""
+
+    _attr_icon = "mdi:lan-disconnect"
+    _attr_state_class = SensorStateClass.TOTAL_INCREASING
+
+    def __init__(
+        self,
+        coordinator: AnycubicDataUpdateCoordinator,
+        device_id: str,
+        fleet: FleetPoller,
+    ) -> None:
+        """Set up poll failures sensor."""
+        super().__init__(coordinator, "Poll Failures", device_id, fleet)
+
+    @property
+    def native_value(self) -> int:
+        """Failed polls since the printer was registered."""
+        return self._fleet.failures.get(self._entry_id, 0)
+
+
+class AnycubicRequestSensorBase(AnycubicSensorBase, SensorEntity):
+    """Base for diagnostic sensors of the requests to the printer."""
+
+    _attr_entity_category = EntityCategory.DIAGNOSTIC
+    _attr_entity_registry_enabled_default = False
+    _attr_state_class = SensorStateClass.MEASUREMENT
+
+    @property
+    def available(self) -> bool:
+        """Stats remain available while the printer is unreachable."""
+        return True
+
+    @callback
+    def _handle_coordinator_update(self) -> None:
+        """Stats change with every request, so always write state."""
+        self.async_write_ha_state()
+
+
+class AnycubicRoundTripSensor(AnycubicRequestSensorBase):
+    """Percentile of the round-trip time of recent requests to the printer."""
+
+    _attr_icon = "mdi:timer-outline"
+    _attr_native_unit_of_measurement = UnitOfTime.MILLISECONDS
+
+    def __init__(
+        self,
+        coordinator: AnycubicDataUpdateCoordinator,
+        device_id: str,
+        percent: int,
+    ) -> None:
+        """Set up round-trip sensor."""
+        super().__init__(coordinator, f"Round Trip P{percent}", device_id)
+        self._percent = percent
+
+    @property
+    def native_value(self) -> float | None:
+        """Round-trip time in milliseconds."""
+        value = self.coordinator.printer.stats.round_trip_percentile(self._percent)
+        return None if value is None else round(value * 1000, 1)
+
+
+class AnycubicErrorRateSensor(AnycubicRequestSensorBase):
+    """Share of recent requests to the printer that failed."""
+
+    # Enabled as it shows whether the circuit breaker is open
+    _attr_entity_registry_enabled_default = True
+    _attr_icon = "mdi:lan-disconnect"
+    _attr_native_unit_of_measurement = PERCENTAGE
+
+    def __init__(
+        self,
+        coordinator: AnycubicDataUpdateCoordinator,
+        device_id: str,
+    ) -> None:
+        """Set up error rate sensor."""
+        super().__init__(coordinator, "Error Rate", device_id)
+
+    @property
+    def native_value(self) -> float | None:
+        """Percentage of recent requests that failed or got an error reply."""
+        rate = self.coordinator.printer.stats.error_rate
+        return None if rate is None else round(rate * 100, 1)
+
+    @property
+    def extra_state_attributes(self) -> dict[str, Any]:
+        """Request and error counts since the printer was set up."""
+        stats = self.coordinator.printer.stats
+        return {
+            "requests": stats.requests,
+            "timeouts": stats.timeouts,
+            "errors": dict(stats.errors),
+            "circuit_breaker": self.coordinator.printer.breaker.state,
+        }
+
+
+class AnycubicHistorySensorBase(AnycubicSensorBase, SensorEntity):
+    """Base for sensors of statistics from the job history."""
+
+    def __init__(
+        self,
+        coordinator: AnycubicDataUpdateCoordinator,
+        sensor_type: str,
+        device_id: str,
+        history: JobHistory,
+    ) -> None:
+        """Set up history sensor."""
+        super().__init__(coordinator, sensor_type, device_id)
+        self._history = history
+
+    @property
+    def available(self) -> bool:
+        """History remains available while the printer is unreachable."""
+        return True
+
+    async def async_added_to_hass(self) -> None:
+        """Update when a job is added to the history."""
+        await super().async_added_to_hass()
+        self.async_on_remove(
+            async_dispatcher_connect(
+                self.hass,
+                f"{SIGNAL_HISTORY_UPDATED}_{self.coordinator.entry_id}",
+                self.async_write_ha_state,
+            ),
+        )
+
+    @callback
+    def _handle_coordinator_update(self) -> None:
+        """Statistics only change when a job is added to the history."""
+
+
+class AnycubicJobsPerDaySensor(AnycubicHistorySensorBase):
+    """Average number of jobs per day."""
+
+    _attr_icon = "mdi:calendar-check"
+    _attr_state_class = SensorStateClass.MEASUREMENT
+
+    def __init__(
+        self,
+        coordinator: AnycubicDataUpdateCoordinator,
+        device_id: str,
+        history: JobHistory,
+    ) -> None:
+        """Set up jobs per day sensor."""
+        super().__init__(coordinator, "Jobs Per Day", device_id, history)
+
+    @property
+    def native_value(self) -> float:
+        """Average number of jobs per day over the last week."""
+        return self._history.jobs_per_day()
+
+    @property
+    def extra_state_attributes(self) -> dict[str, Any]:
+        """Number of jobs in the history."""
+        return {"total_jobs": self._history.job_count}
+
+
+class AnycubicResinUsedSensor(AnycubicHistorySensorBase):
+    """Resin used by all jobs."""
+
+    _attr_icon = "mdi:water"
+    _attr_native_unit_of_measurement = UnitOfVolume.MILLILITERS
+    _attr_state_class = SensorStateClass.TOTAL_INCREASING
+
+    def __init__(
+        self,
+        coordinator: AnycubicDataUpdateCoordinator,
+        device_id: str,
+        history: JobHistory,
+    ) -> None:
+        """Set up resin used sensor."""
+        super().__init__(coordinator, "Resin Used", device_id, history)
+
+    @property
+    def native_value(self) -> float:
+        """Resin used by all jobs in the history."""
+        return self._history.resin_used
+
+
+class AnycubicAverageLayerTimeSensor(AnycubicHistorySensorBase):
+    """Average time to print a layer."""
+
+    _attr_icon = "mdi:layers-outline"
+    _attr_native_unit_of_measurement = UnitOfTime.SECONDS
+    _attr_state_class = SensorStateClass.MEASUREMENT
+
+    def __init__(
+        self,
+        coordinator: AnycubicDataUpdateCoordinator,
+        device_id: str,
+        history: JobHistory,
+    ) -> None:
+        """Set up average layer time sensor."""
+        super().__init__(coordinator, "Average Layer Time", device_id, history)
+
+    @property
+    def native_value(self) -> float | None:
+        """Average time to print a layer of the finished jobs in the history."""
+        return self._history.average_layer_time
 
 
 async def async_setup_entry(
@@ -154,7 +590,27 @@ async def async_setup_entry(
         AnycubicPrintStatusSensor(coordinator, device_id),
         AnycubicPrintJobPercentageSensor(coordinator, device_id),
         AnycubicPrintEstimatedFinishTimeSensor(coordinator, device_id),
+        AnycubicCurrentLayerSensor(coordinator, device_id),
+        AnycubicTotalLayersSensor(coordinator, device_id),
+        AnycubicTimeRemainingSensor(coordinator, device_id),
+        AnycubicLayerHeightSensor(coordinator, device_id),
+        AnycubicResinVolumeSensor(coordinator, device_id),
+        AnycubicRoundTripSensor(coordinator, device_id, 50),
+        AnycubicRoundTripSensor(coordinator, device_id, 95),
+        AnycubicErrorRateSensor(coordinator, device_id),
     ]
+    if (history := coordinator.history) is not None:
+        entities += [
+            AnycubicJobsPerDaySensor(coordinator, device_id, history),
+            AnycubicResinUsedSensor(coordinator, device_id, history),
+            AnycubicAverageLayerTimeSensor(coordinator, device_id, history),
+        ]
+    if coordinator.fleet_managed:
+        fleet: FleetPoller = hass.data[DOMAIN][DATA_FLEET]
+        entities += [
+            AnycubicFleetPollDurationSensor(coordinator, device_id, fleet),
+            AnycubicFleetPollFailuresSensor(coordinator, device_id, fleet),
+        ]
     async_add_entities(entities)
 
     # Setup Services
@@ -169,3 +625,9 @@ async def async_setup_entry(
         SEND_COMMAND_SCHEMA,
         send_command,
     )
+    platform.async_register_entity_service(SERVICE_LIST_FILES, {}, list_files)
+    platform.async_register_entity_service(
+        SERVICE_QUERY_HISTORY,
+        QUERY_HISTORY_SCHEMA,
+        query_history,
+    )
@@ -2,16 +2,35 @@
 from __future__ import annotations
 
 import logging
-import re
-from typing import TYPE_CHECKING
+from typing import TYPE_CHECKING, Any, Awaitable, Callable
 
-from homeassistant.const import CONF_NAME
-from homeassistant.core import ServiceCall
+from homeassistant.const import CONF_NAME, CONF_TIMEOUT
+from homeassistant.core import HomeAssistant, ServiceCall
+from homeassistant.helpers import config_validation as cv
+from homeassistant.helpers.service import async_extract_config_entry_ids
+import homeassistant.util.dt as dt_util
 import voluptuous as vol
 
-from .const import COMMAND_PRINT, CONF_PRINT_CMD, CONF_PRINT_FILE_NAME, EXPOSED_COMMANDS
+from .client import AnycubicPrinter, fan_out
+from .const import (
+    COMMAND_PRINT,
+    CONF_HISTORY_END,
+    CONF_HISTORY_START,
+    CONF_MAX_CONCURRENT,
+    CONF_PRINT_CMD,
+    CONF_PRINT_FILE_NAME,
+    DEFAULT_BULK_COMMAND_TIMEOUT,
+    DOMAIN,
+    EVENT_BULK_COMMAND,
+    EVENT_FILE_LIST,
+    EVENT_HISTORY,
+    EXPOSED_COMMANDS,
+    FAN_OUT_MAX_CONCURRENT,
+)
+from .history import JobRecord
 
 if TYPE_CHECKING:
+    from . import AnycubicDataUpdateCoordinator
     from .sensor import AnycubicPrintStatusSensor
 
 
@@ -26,6 +45,28 @@ SEND_COMMAND_SCHEMA = {
     vol.Optional(CONF_PRINT_FILE_NAME, default=""): str,
 }
 
+BULK_COMMAND_SCHEMA = vol.Schema(
+    {
+        **cv.ENTITY_SERVICE_FIELDS,
+        vol.Required(CONF_PRINT_CMD): vol.In(EXPOSED_COMMANDS),
+        vol.Optional(CONF_PRINT_FILE_NAME, default=""): str,
+        vol.Optional(
+            CONF_MAX_CONCURRENT,
+            default=FAN_OUT_MAX_CONCURRENT,
+        ): cv.positive_int,
+        vol.Optional(
+            CONF_TIMEOUT,
+            default=DEFAULT_BULK_COMMAND_TIMEOUT,
+        ): vol.All(vol.Coerce(float), vol.Range(min=1)),
+    },
+)
+
+QUERY_HISTORY_SCHEMA = {
+    vol.Optional(CONF_HISTORY_START): cv.datetime,
+    vol.Optional(CONF_HISTORY_END): cv.datetime,
+    vol.Optional(CONF_PRINT_FILE_NAME): str,
+}
+
 
 async def set_printer_name(
     entity: AnycubicPrintStatusSensor,
@@ -34,7 +75,26 @@ async def set_printer_name(
     """Set name of Printer."""
     name: str = service_call.data[CONF_NAME]
     _LOGGER.debug(f"Service called to set name to '{name}'")
-    await entity.coordinator.printer.set_name(name)
+    if await entity.coordinator.printer.set_name(name):
+        entity.coordinator.invalidate("name")
+        await entity.coordinator.async_request_refresh()
+
+
+def _command(
+    coordinator: AnycubicDataUpdateCoordinator,
+    command: str,
+    file_name: str,
+) -> Callable[[AnycubicPrinter], Awaitable[bool]]:
+    """Resolve a command for a printer, looking up the file to print in its files."""
+    if command != COMMAND_PRINT:
+        return lambda printer: printer.set_status(command)
+    # Ensure filename was provided
+    if not file_name:
+        raise ValueError("File name is required to start a print")
+    # Lookup the numeric version of the filename if that's not what was provided
+    if (file_number := coordinator.files.number(file_name)) is None:
+        raise ValueError(f'File "{file_name}" not found on the printer')
+    return lambda printer: printer.start_print(file_number)
 
 
 async def send_command(
@@ -45,14 +105,148 @@ async def send_command(
     command: str = service_call.data[CONF_PRINT_CMD]
     current_status = entity.coordinator.data["status"]
     _LOGGER.debug(f"Service called run command: '{command}'")
-    assert current_status.get("code", None) != command, "Already in desired state"
-    if command == COMMAND_PRINT:
-        # Ensure filename was provided
-        if not (file_name := service_call.data.get(CONF_PRINT_FILE_NAME)):
-            raise ValueError("File name is required to start a print")
-        # Lookup the numeric version of the filename if that's not what was provided
-        if not re.match(r"[0-9]+.pwms", file_name):
-            file_name = entity.coordinator.data["files"][file_name]
-        await entity.coordinator.printer.start_print(file_name)
-    else:
-        await entity.coordinator.printer.set_status(command)
+    assert current_status.code != command, "Already in desired state"
+    run = _command(
+        entity.coordinator,
+        command,
+        service_call.data.get(CONF_PRINT_FILE_NAME, ""),
+    )
+    if await run(entity.coordinator.printer):
+        # Show the new state right away rather than at the next poll
+        await entity.coordinator.async_request_refresh()
+
+
+async def bulk_command(
+    hass: HomeAssistant,
+    service_call: ServiceCall,
+) -> dict[str, Any]:
+    """
+    Send a command to many printers at once, and report how it went on each.
+
+    Targets all printers if none are given. Commands are sent concurrently, each
+    printer having `timeout` seconds to carry it out. The result of each printer is
+    both returned and fired as an event, for automations triggered by it.
+    """
+    command: str = service_call.data[CONF_PRINT_CMD]
+    file_name: str = service_call.data[CONF_PRINT_FILE_NAME]
+    if command == COMMAND_PRINT and not file_name:
+        raise ValueError("File name is required to start a print")
+    entry_ids = await async_extract_config_entry_ids(hass, service_call)
+    coordinators: list[AnycubicDataUpdateCoordinator] = [
+        data["coordinator"]
+        for entry_id, data in hass.data.get(DOMAIN, {}).items()
+        if isinstance(data, dict)
+        and "coordinator" in data
+        and (not entry_ids or entry_id in entry_ids)
+    ]
+    _LOGGER.debug(f"Service called to {command} {len(coordinators)} printers")
+    results: dict[str, dict[str, Any]] = {}
+    commands: dict[int, Callable[[AnycubicPrinter], Awaitable[bool]]] = {}
+    for coordinator in coordinators:
+        results[coordinator.entry_id] = {
+            "entry_id": coordinator.entry_id,
+            "name": coordinator.data.get("name"),
+            "success": False,
+        }
+        try:
+            if coordinator.data["status"].code == command:
+                raise ValueError("Already in desired state")
+            commands[id(coordinator.printer)] = _command(
+                coordinator,
+                command,
+                file_name,
+            )
+        except ValueError as e:
+            results[coordinator.entry_id]["error"] = str(e)
+    by_printer = {id(c.printer): c for c in coordinators}
+    succeeded = []
+    async for printer, outcome in fan_out(
+        (c.printer for c in coordinators if id(c.printer) in commands),
+        lambda printer: commands[id(printer)](printer),
+        service_call.data[CONF_MAX_CONCURRENT],
+        service_call.data[CONF_TIMEOUT],
+    ):
+        coordinator = by_printer[id(printer)]
+        result = results[coordinator.entry_id]
+        if outcome is True:
+            result["success"] = True
+            succeeded.append(coordinator)
+        elif isinstance(outcome, Exception):
+            result["error"] = str(outcome) or type(outcome).__name__
+        else:
+            result["error"] = "Refused by the printer"
+    # Show the new states right away rather than at the next poll, without holding
+    # up the results of the other printers
+    for coordinator in succeeded:
+        hass.async_create_task(coordinator.async_request_refresh())
+    response = {"command": command, "printers": list(results.values())}
+    hass.bus.async_fire(EVENT_BULK_COMMAND, response)
+    return response
+
+
+async def list_files(
+    entity: AnycubicPrintStatusSensor,
+    service_call: ServiceCall,
+) -> None:
+    """Fire an event with the files on the USB key of the printer."""
+    entity.hass.bus.async_fire(
+        EVENT_FILE_LIST,
+        {
+            "entry_id": entity.coordinator.entry_id,
+            "files": [
+                {"file_name": file_name, "file_number": file_number}
+                for file_name, file_number in entity.coordinator.files.items()
+            ],
+        },
+    )
+
+
+def _job_data(record: JobRecord) -> dict[str, Any]:
+    """Data of a job for events."""
+    return {
+        **record._asdict(),
+        "started": dt_util.utc_from_timestamp(record.started).isoformat(),
+        "ended": dt_util.utc_from_timestamp(record.ended).isoformat(),
+    }
+
+
+async def query_history(
+    entity: AnycubicPrintStatusSensor,
+    service_call: ServiceCall,
+) -> None:
+    """
+    Fire events with the jobs in the history of the printer.
+
+    Jobs are sent in batches as they are read, the last event has `last` set.
+    """
+    history = entity.coordinator.history
+    assert history is not None, "History is not loaded"
+    start = service_call.data.get(CONF_HISTORY_START)
+    end = service_call.data.get(CONF_HISTORY_END)
+    batches = history.async_query(
+        None if start is None else dt_util.as_utc(start),
+        None if end is None else dt_util.as_utc(end),
+        service_call.data.get(CONF_PRINT_FILE_NAME),
+    )
+    previous: list[JobRecord] = []
+    async for records in batches:
+        if previous:
+            _fire_history(entity, previous, False)
+        previous = records
+    _fire_history(entity, previous, True)
+
+
+def _fire_history(
+    entity: AnycubicPrintStatusSensor,
+    records: list[JobRecord],
+    last: bool,
+) -> None:
+    """Fire an event with a batch of jobs from the history."""
+    entity.hass.bus.async_fire(
+        EVENT_HISTORY,
+        {
+            "entry_id": entity.coordinator.entry_id,
+            "jobs": [_job_data(record) for record in records],
+            "last": last,
+        },
+    )
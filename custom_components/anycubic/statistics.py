@@ -0,0 +1,76 @@
+"""Long-term statistics of the jobs of a printer."""
+from __future__ import annotations
+
+from typing import Any
+
+from homeassistant.const import UnitOfVolume
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.util import slugify
+import homeassistant.util.dt as dt_util
+
+from .const import DOMAIN
+from .history import JobHistory, JobRecord
+
+
+def job_statistics(
+    unique_id: str,
+    name: str,
+    history: JobHistory,
+    record: JobRecord,
+) -> list[tuple[dict[str, Any], list[dict[str, Any]]]]:
+    """
+    Metadata and rows of the statistics of the jobs, once a job was added to the history.
+
+    Statistics are the running totals of the history, in the hour the job ended. Jobs
+    ending in the same hour replace the row of the previous one with the new totals.
+    """
+    start = dt_util.utc_from_timestamp(record.ended).replace(
+        minute=0,
+        second=0,
+        microsecond=0,
+    )
+    object_id = slugify(unique_id)
+    return [
+        (
+            {
+                "has_mean": False,
+                "has_sum": True,
+                "name": f"{name} jobs",
+                "source": DOMAIN,
+                "statistic_id": f"{DOMAIN}:{object_id}_jobs",
+                "unit_of_measurement": None,
+            },
+            [{"start": start, "state": history.job_count, "sum": history.job_count}],
+        ),
+        (
+            {
+                "has_mean": False,
+                "has_sum": True,
+                "name": f"{name} resin used",
+                "source": DOMAIN,
+                "statistic_id": f"{DOMAIN}:{object_id}_resin_used",
+                "unit_of_measurement": UnitOfVolume.MILLILITERS,
+            },
+            [{"start": start, "state": history.resin_used, "sum": history.resin_used}],
+        ),
+    ]
+
+
+@callback
+def async_import_job_statistics(
+    hass: HomeAssistant,
+    unique_id: str,
+    name: str,
+    history: JobHistory,
+    record: JobRecord,
+) -> None:
+    """Import the statistics of the jobs into the recorder, if it is set up."""
+    if "recorder" not in hass.config.components:
+        return
+    # Only loaded with the recorder, which is slow to import
+    from homeassistant.components.recorder.statistics import (
+        async_add_external_statistics,
+    )
+
+    for metadata, rows in job_statistics(unique_id, name, history, record):
+        async_add_external_statistics(hass, metadata, rows)
@@ -0,0 +1,43 @@
+"""Fixtures shared by the tests."""
+from unittest import mock
+
+import pytest
+from pytest_homeassistant_custom_component.common import MockConfigEntry
+
+from custom_components.anycubic import AnycubicDataUpdateCoordinator
+from custom_components.anycubic.client.printer import AnycubicPrinter
+from custom_components.anycubic.client.profiles import DEFAULT_PROFILE
+from custom_components.anycubic.client.protocol import PrinterStatus
+from custom_components.anycubic.const import DOMAIN
+
+# Replies of a mocked printer to all queries
+QUERY_DATA = {
+    "info": {"model": "Photon Mono SE", "identifier": "ABC123"},
+    "name": "Printer",
+    "status": PrinterStatus("stop"),
+    "files": [("test.pwms", "0.pwms")],
+}
+
+
+@pytest.fixture
+def probe():
+    """Answer capability probes of the mocked printers."""
+    profile = DEFAULT_PROFILE._replace(model="Photon Mono SE")
+    with mock.patch.object(AnycubicPrinter, "probe", return_value=profile) as probe:
+        yield probe
+
+
+@pytest.fixture
+def create_coordinator(hass, probe):
+    """Create coordinators for mocked printers."""
+
+    def create(**options):
+        entry = MockConfigEntry(
+            domain=DOMAIN,
+            data={"ip_address": "192.168.0.10", "port": 6000},
+            options=options,
+        )
+        entry.add_to_hass(hass)
+        return AnycubicDataUpdateCoordinator(hass, entry)
+
+    return create
@@ -0,0 +1,180 @@
+"""Fake printer speaking the printer protocol over TCP for tests."""
+from __future__ import annotations
+
+import asyncio
+
+from custom_components.anycubic.client.printer import BINARY_REPLY_SIZES
+
+# Number of arguments following each command
+COMMAND_ARGUMENTS = {"gostart": 1, "setname": 1, "getPreview2": 1}
+
+DEFAULT_REPLIES = {
+    "getsysinfo": "Photon Mono SE,V0.1.2,ABC123,MyWifi",
+    "getwifi": "MyWifi",
+    "getmode": "0",
+    "getpara": "6,0.5,25.0,1.7,6.0,4.0,6.0,8",
+}
+DEFAULT_FILES = {"test print.pwms": "0.pwms", "其他.pwms": "1.pwms"}
+
+
+class FakePrinter:
+    """
+    Fake printer accepting comma separated commands.
+
+    Keeps track of the print status so control commands behave like a printer,
+    and can simulate a slow or unreliable printer.
+    """
+
+    def __init__(
+        self,
+        name: str = "Fake Printer",
+        files: dict[str, str] | None = None,
+        usb_key: bool = True,
+        replies: dict[str, str] | None = None,
+        errors: dict[str, int] | None = None,
+        latency: float = 0,
+        drip_size: int | None = None,
+        drip_delay: float = 0.001,
+        drop_commands: set[str] | None = None,
+        cut_replies: int = 0,
+    ) -> None:
+        """
+        Set up the fake printer.
+
+        `usb_key` is whether there is a USB key holding the `files`, `latency` delays
+        each reply, `drip_size` sends replies in chunks of that many bytes, `errors`
+        replies with `ERROR<code>` to commands, `drop_commands` closes the connection
+        without replying and `cut_replies` closes it halfway through that many binary
+        replies.
+        """
+        self.name = name
+        self.files = DEFAULT_FILES.copy() if files is None else files
+        self.usb_key = usb_key
+        self.replies = {**DEFAULT_REPLIES, **(replies or {})}
+        self.errors = errors or {}
+        self.latency = latency
+        self.drip_size = drip_size
+        self.drip_delay = drip_delay
+        self.drop_commands = drop_commands or set()
+        self.cut_replies = cut_replies
+        self.status = "stop"
+        self.file: tuple[str, str] | None = None
+        self.connections = 0
+        self.commands: list[str] = []
+        self.port = 0
+        self._server: asyncio.AbstractServer | None = None
+
+    async def __aenter__(self) -> FakePrinter:
+        """Start listening on a random local port."""
+        self._server = await asyncio.start_server(self._handle, "127.0.0.1", 0)
+        self.port = self._server.sockets[0].getsockname()[1]
+        return self
+
+    async def __aexit__(self, *args) -> None:
+        """Stop listening."""
+        assert self._server is not None
+        self._server.close()
+        await self._server.wait_closed()
+
+    def _status(self) -> str:
+        """Reply to `getstatus`."""
+        if self.status not in ("print", "pause") or self.file is None:
+            return self.status
+        name, number = self.file
+        return f"{self.status},{name}/{number},2338,20,1263,60829,48746,~143mL,UV,36.16,0.05,0"
+
+    def _run(self, command: str, *args: str) -> str:
+        """Run a command and return the payload of the reply."""
+        if command == "getstatus":
+            return self._status()
+        if command == "getname":
+            return self.name
+        if command == "setname":
+            self.name = args[0]
+        elif command == "getfile":
+            if not self.usb_key:
+                raise KeyError("ERROR1")  # No USB key
+            return ",".join(f"{name}/{number}" for name, number in self.files.items())
+        elif command == "gostart":
+            if self.status in ("print", "pause"):
+                raise KeyError("ERROR2")
+            if (
+                file := next((f for f in self.files.items() if f[1] == args[0]), None)
+            ) is None:
+                raise KeyError("ERROR3")
+            self.status, self.file = "print", file
+        elif command == "gopause":
+            self.status = "pause"
+        elif command == "goresume":
+            self.status = "print"
+        elif command == "gostop":
+            self.status, self.file = "stop", None
+        elif command in self.replies:
+            return self.replies[command]
+        else:
+            raise KeyError("ERROR1")
+        return "ok"
+
+    def reply(self, command: str, *args: str) -> bytes:
+        """Build the reply to a command."""
+        echo = ",".join((command, *args)).encode("gbk") + b","
+        if command in self.errors:
+            # Error replies are not terminated
+            return echo + f"ERROR{self.errors[command]},".encode()
+        if command in BINARY_REPLY_SIZES:
+            # Binary replies are not terminated either
+            return echo + bytes(BINARY_REPLY_SIZES[command])
+        try:
+            payload = self._run(command, *args)
+        except KeyError as e:
+            return echo + f"{e.args[0]},".encode()
+        return echo + payload.encode("gbk") + b",end"
+
+    async def _send(self, writer: asyncio.StreamWriter, data: bytes) -> None:
+        """Send a reply, optionally delayed and in small chunks."""
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        if self.drip_size is None:
+            writer.write(data)
+        else:
+            for i in range(0, len(data), self.drip_size):
+                writer.write(data[i : i + self.drip_size])
+                await writer.drain()
+                await asyncio.sleep(self.drip_delay)
+        await writer.drain()
+
+    async def _handle(
+        self,
+        reader: asyncio.StreamReader,
+        writer: asyncio.StreamWriter,
+    ) -> None:
+        """Reply to commands until the client disconnects."""
+        self.connections += 1
+        buffer = b""
+        try:
+            while data := await reader.read(1024):
+                *tokens, buffer = (buffer + data).split(b",")
+                while tokens:
+                    command = tokens[0].decode("gbk")
+                    count = COMMAND_ARGUMENTS.get(command, 0)
+                    if len(tokens) <= count:
+                        # Wait for the rest of the arguments
+                        buffer = b",".join((*tokens, buffer))
+                        break
+                    args, tokens = tokens[1 : count + 1], tokens[count + 1 :]
+                    self.commands.append(command)
+                    if command in self.drop_commands:
+                        return
+                    if self.cut_replies and command in BINARY_REPLY_SIZES:
+                        self.cut_replies -= 1
+                        reply = self.reply(command, *(a.decode("gbk") for a in args))
+                        await self._send(writer, reply[: len(reply) // 2])
+                        return
+                    await self._send(
+                        writer,
+                        self.reply(command, *(a.decode("gbk") for a in args)),
+                    )
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
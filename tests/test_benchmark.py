@@ -0,0 +1,235 @@
+"""Benchmarks of communication with the printer."""
+import asyncio
+from functools import partial
+import os
+import subprocess  # nosec
+import sys
+
+from pytest_homeassistant_custom_component.common import MockConfigEntry
+
+from custom_components.anycubic import AnycubicDataUpdateCoordinator
+from custom_components.anycubic.client.printer import AnycubicPrinter
+from custom_components.anycubic.client.protocol import QUERY_PARSERS
+from custom_components.anycubic.const import DOMAIN
+from custom_components.anycubic.fleet import FleetPoller
+
+from .fake_printer import FakePrinter
+
+FLEET_SIZE = 20
+# Modules Home Assistant has imported by the time it loads the integration
+HASS_MODULES = (
+    "homeassistant.components.binary_sensor",
+    "homeassistant.components.camera",
+    "homeassistant.components.sensor",
+    "homeassistant.config_entries",
+    "homeassistant.helpers.config_validation",
+    "homeassistant.helpers.entity_platform",
+    "homeassistant.helpers.update_coordinator",
+)
+INTEGRATION_MODULES = (
+    "custom_components.anycubic.binary_sensor",
+    "custom_components.anycubic.camera",
+    "custom_components.anycubic.config_flow",
+    "custom_components.anycubic.sensor",
+)
+# Modules the integration only imports once it needs them
+DEFERRED_MODULES = ("homeassistant.components.recorder",)
+
+
+async def _async_benchmark(hass, benchmark, make_coroutine, rounds=10):
+    """
+    Benchmark a coroutine running in the event loop of Home Assistant.
+
+    The benchmark runs in the executor, so the event loop is free to run the
+    coroutine while the benchmark waits for it.
+    """
+
+    def run():
+        return asyncio.run_coroutine_threadsafe(make_coroutine(), hass.loop).result()
+
+    return await hass.async_add_executor_job(
+        partial(benchmark.pedantic, run, rounds=rounds),
+    )
+
+
+def _coordinator(hass, fake_printer, **options):
+    """Create a coordinator for a fake printer."""
+    entry = MockConfigEntry(
+        domain=DOMAIN,
+        data={"ip_address": "127.0.0.1", "port": fake_printer.port},
+        options=options,
+    )
+    entry.add_to_hass(hass)
+    return AnycubicDataUpdateCoordinator(hass, entry)
+
+
+def _import_time() -> float:
+    """
+    Seconds spent importing the modules of the integration in a new interpreter.
+
+    Bytecode is cached like in an installation of Home Assistant, so it is only
+    compiled on the first run.
+    """
+    imports = "; ".join(f"import {m}" for m in (*HASS_MODULES, *INTEGRATION_MODULES))
+    env = {k: v for k, v in os.environ.items() if k != "PYTHONDONTWRITEBYTECODE"}
+    result = subprocess.run(  # nosec
+        [sys.executable, "-X", "importtime", "-c", imports],
+        capture_output=True,
+        check=True,
+        env=env,
+        text=True,
+    )
+    # Lines are "import time: self [us] | cumulative | module"
+    return sum(
+        int(line.split("|")[0].rsplit(":", 1)[1]) / 1e6
+        for line in result.stderr.splitlines()
+        if line.startswith("import time:")
+        and line.split("|")[2].strip().startswith("custom_components")
+    )
+
+
+def test_benchmark_import_time(benchmark):
+    """Benchmark importing the integration on top of Home Assistant."""
+    benchmark.extra_info["import_time"] = benchmark.pedantic(
+        _import_time,
+        rounds=3,
+        warmup_rounds=1,
+    )
+
+
+def test_deferred_imports():
+    """Test importing the integration does not import the modules it defers."""
+    hass_imports = "; ".join(f"import {m}" for m in HASS_MODULES)
+    imports = "; ".join(f"import {m}" for m in INTEGRATION_MODULES)
+    result = subprocess.run(  # nosec
+        [
+            sys.executable,
+            "-c",
+            f"import sys; {hass_imports}; before = set(sys.modules); {imports}; "
+            "print(*set(sys.modules) - before, sep=chr(10))",
+        ],
+        capture_output=True,
+        check=True,
+        text=True,
+    )
+    imported = result.stdout.split()
+    assert "custom_components.anycubic.sensor" in imported
+    assert not [m for m in imported if m.startswith(DEFERRED_MODULES)]
+
+
+def test_benchmark_parse_full_refresh(benchmark):
+    """Benchmark parsing the replies of a refresh fetching everything."""
+    replies = {
+        "info": [b"Photon Mono SE", b"V0.1.2", b"ABC123", b"MyWifi"],
+        "name": [b"My Printer"],
+        "files": [f"file {i}.pwms/{i}.pwms".encode("gbk") for i in range(50)],
+        "status": [
+            b"print",
+            b"file 0.pwms/0.pwms",
+            *(b"2338", b"20", b"1263", b"60829", b"48746", b"~143mL", b"UV"),
+            *(b"36.16", b"0.05", b"0"),
+        ],
+    }
+
+    def parse():
+        return {query: QUERY_PARSERS[query](reply) for query, reply in replies.items()}
+
+    data = benchmark(parse)
+    assert data["status"].current_layer == 1263
+    assert len(data["files"]) == 50
+
+
+async def test_benchmark_send_cmd(hass, benchmark, socket_enabled):
+    """Benchmark a single command."""
+    async with FakePrinter() as fake_printer:
+        printer = AnycubicPrinter("127.0.0.1", fake_printer.port)
+        status = await _async_benchmark(
+            hass,
+            benchmark,
+            lambda: printer.send_cmd("getstatus"),
+        )
+    assert status == "stop"
+    assert printer.stats.timeouts == 0
+
+
+async def test_benchmark_preview_latency(hass, benchmark, socket_enabled):
+    """Test unterminated preview replies do not wait for the read timeout."""
+    async with FakePrinter() as fake_printer:
+        printer = AnycubicPrinter("127.0.0.1", fake_printer.port)
+        preview = await _async_benchmark(
+            hass,
+            benchmark,
+            lambda: printer.get_preview("0.pwms"),
+        )
+    assert len(preview) == 224 * 168 * 2
+    assert printer.stats.timeouts == 0
+
+
+async def test_benchmark_slow_drip_preview(hass, benchmark, socket_enabled):
+    """Benchmark a preview arriving in many small chunks."""
+    async with FakePrinter(drip_size=1460, drip_delay=0) as fake_printer:
+        printer = AnycubicPrinter("127.0.0.1", fake_printer.port)
+        preview = await _async_benchmark(
+            hass,
+            benchmark,
+            lambda: printer.get_preview("0.pwms"),
+        )
+    assert len(preview) == 224 * 168 * 2
+
+
+async def test_benchmark_error_latency(hass, benchmark, socket_enabled):
+    """Test unterminated error replies do not wait for the read timeout."""
+    async with FakePrinter(errors={"getmode": 1}) as fake_printer:
+        printer = AnycubicPrinter("127.0.0.1", fake_printer.port)
+        await _async_benchmark(
+            hass,
+            benchmark,
+            lambda: printer.send_batch(("getmode",)),
+        )
+    assert printer.stats.timeouts == 0
+    assert set(printer.stats.errors) == {"getmode: ERROR1"}
+
+
+async def test_benchmark_full_refresh(hass, benchmark, socket_enabled):
+    """Benchmark a coordinator refresh fetching everything from the printer."""
+    async with FakePrinter() as fake_printer:
+        coordinator = _coordinator(hass, fake_printer)
+
+        async def refresh():
+            coordinator.invalidate("info", "name", "files")
+            await coordinator.async_refresh()
+
+        await _async_benchmark(hass, benchmark, refresh)
+        await coordinator.async_shutdown()
+    assert coordinator.last_update_success
+    assert coordinator.data["files"] == {
+        "test print.pwms": "0.pwms",
+        "其他.pwms": "1.pwms",
+    }
+    assert coordinator.printer.stats.timeouts == 0
+
+
+async def test_benchmark_fleet_poll(hass, benchmark, socket_enabled):
+    """Benchmark polling a fleet of printers with limited concurrency."""
+    fake_printers = [FakePrinter(latency=0.01) for _ in range(FLEET_SIZE)]
+    for fake_printer in fake_printers:
+        await fake_printer.__aenter__()
+    fleet = FleetPoller(hass)
+    coordinators = {}
+    for index, fake_printer in enumerate(fake_printers):
+        coordinator = _coordinator(hass, fake_printer, fleet_polling=True)
+        coordinators[str(index)] = coordinator
+        fleet.register(str(index), coordinator)
+
+    async def poll_all():
+        await asyncio.gather(
+            *(fleet._async_poll(entry_id) for entry_id in coordinators),
+        )
+
+    await _async_benchmark(hass, benchmark, poll_all, rounds=5)
+    for entry_id, coordinator in coordinators.items():
+        fleet.unregister(entry_id)
+        await coordinator.async_shutdown()
+    for fake_printer in fake_printers:
+        await fake_printer.__aexit__()
+    assert all(c.last_update_success for c in coordinators.values())
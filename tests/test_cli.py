@@ -0,0 +1,53 @@
+"""Test the command line interface of the client."""
+import asyncio
+import json
+import os
+from pathlib import Path
+import sys
+
+from .fake_printer import FakePrinter
+
+# Put first on the module search path, like the README does
+CLIENT_PATH = Path(__file__).parents[1] / "custom_components" / "anycubic"
+
+
+async def _cli(*argv):
+    """Run a command as documented and return the exit code and the lines of JSON."""
+    process = await asyncio.create_subprocess_exec(
+        sys.executable,
+        "-m",
+        "client",
+        *argv,
+        stdout=asyncio.subprocess.PIPE,
+        env={**os.environ, "PYTHONPATH": str(CLIENT_PATH)},
+    )
+    stdout, _ = await process.communicate()
+    return process.returncode, [json.loads(line) for line in stdout.splitlines()]
+
+
+async def test_cli_fan_out(socket_enabled):
+    """Test a command is sent to all printers, with a line per printer."""
+    async with FakePrinter() as first, FakePrinter() as second:
+        printers = [f"127.0.0.1:{first.port}", f"127.0.0.1:{second.port}"]
+        exit_code, lines = await _cli("print", "TEST PRINT", *printers)
+        assert exit_code == 0
+        assert sorted(line["printer"] for line in lines) == sorted(printers)
+        assert all(line["result"] == "0.pwms" for line in lines)
+
+        exit_code, lines = await _cli("status", *printers)
+    assert [line["result"]["status"]["code"] for line in lines] == ["print"] * 2
+    assert first.commands == ["getfile", "gostart", "getname", "getstatus"]
+
+
+async def test_cli_failures(socket_enabled):
+    """Test printers that fail are reported without stopping the others."""
+    async with FakePrinter() as fake_printer:
+        port = fake_printer.port
+        exit_code, lines = await _cli("print", "missing.pwms", f"127.0.0.1:{port}")
+    assert exit_code == 1
+    assert lines == [
+        {
+            "printer": f"127.0.0.1:{port}",
+            "error": 'No file "missing.pwms" on the printer',
+        },
+    ]
@@ -2,9 +2,12 @@
 from unittest import mock
 
 from homeassistant import config_entries
+from pytest_homeassistant_custom_component.common import MockConfigEntry
 
 from custom_components.anycubic import config_flow
 
+from .fake_printer import FakePrinter
+
 
 async def test_flow_user_init(hass, enable_custom_integrations):
     """Test the initialization of the form in the first step of the config flow."""
@@ -36,3 +39,72 @@ async def test_flow_user_step_no_input(hass, enable_custom_integrations):
         user_input={"ip_address": "", "port": 6000},
     )
     assert {"base": "invalid_ip"} == result["errors"]
+
+
+async def test_options_flow(hass, enable_custom_integrations):
+    """Test updating the polling options."""
+    entry = MockConfigEntry(
+        domain=config_flow.DOMAIN,
+        data={"ip_address": "192.168.0.10", "port": 6000},
+    )
+    entry.add_to_hass(hass)
+    with mock.patch("custom_components.anycubic.async_setup_entry", return_value=True):
+        _result = await hass.config_entries.options.async_init(entry.entry_id)
+        result = await hass.config_entries.options.async_configure(
+            _result["flow_id"],
+            user_input={
+                "scan_interval_printing": 5,
+                "scan_interval_idle": 300,
+                "max_backoff": 900,
+                "keep_alive": True,
+                "idle_timeout": 30,
+                "fleet_polling": False,
+            },
+        )
+    assert result["type"] == "create_entry"
+    assert entry.options["scan_interval_idle"] == 300
+
+
+async def test_flow_discovery(hass, enable_custom_integrations, socket_enabled):
+    """Test searching a subnet for printers and adding the ones found."""
+    async with FakePrinter() as fake_printer:
+        _result = await hass.config_entries.flow.async_init(
+            config_flow.DOMAIN,
+            context={"source": config_entries.SOURCE_USER},
+        )
+        result = await hass.config_entries.flow.async_configure(
+            _result["flow_id"],
+            user_input={"ip_address": "127.0.0.1/32", "port": fake_printer.port},
+        )
+        assert result["step_id"] == "pick_printers"
+        with mock.patch(
+            "custom_components.anycubic.async_setup_entry",
+            return_value=True,
+        ):
+            result = await hass.config_entries.flow.async_configure(
+                result["flow_id"],
+                user_input={"printers": ["127.0.0.1"]},
+            )
+    assert result["type"] == "create_entry"
+    assert result["result"].unique_id == "ABC123"
+    assert result["data"] == {"ip_address": "127.0.0.1", "port": fake_printer.port}
+
+
+async def test_flow_discovery_skips_configured(
+    hass,
+    enable_custom_integrations,
+    socket_enabled,
+):
+    """Test printers that are already configured are not offered again."""
+    MockConfigEntry(domain=config_flow.DOMAIN, unique_id="ABC123").add_to_hass(hass)
+    async with FakePrinter() as fake_printer:
+        _result = await hass.config_entries.flow.async_init(
+            config_flow.DOMAIN,
+            context={"source": config_entries.SOURCE_USER},
+        )
+        result = await hass.config_entries.flow.async_configure(
+            _result["flow_id"],
+            user_input={"ip_address": "127.0.0.1/32", "port": fake_printer.port},
+        )
+    assert result["type"] == "abort"
+    assert result["reason"] == "no_devices_found"
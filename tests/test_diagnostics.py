@@ -0,0 +1,25 @@
+"""Test the diagnostics."""
+import json
+from unittest import mock
+
+from homeassistant.helpers.json import JSONEncoder
+
+from custom_components.anycubic.const import DOMAIN
+from custom_components.anycubic.diagnostics import async_get_config_entry_diagnostics
+
+from .conftest import QUERY_DATA
+
+
+async def test_diagnostics_serializable(hass, create_coordinator):
+    """Test the diagnostics of a printer with files serialize to JSON."""
+    coordinator = create_coordinator()
+    with mock.patch.object(coordinator.printer, "query", return_value=QUERY_DATA):
+        await coordinator.async_refresh()
+    entry = hass.config_entries.async_get_entry(coordinator.entry_id)
+    hass.data.setdefault(DOMAIN, {})[entry.entry_id] = {"coordinator": coordinator}
+
+    diagnostics = await async_get_config_entry_diagnostics(hass, entry)
+    decoded = json.loads(json.dumps(diagnostics, cls=JSONEncoder))
+    assert decoded["data"]["files"] == {"test.pwms": "0.pwms"}
+    assert decoded["data"]["info"]["identifier"] == "**REDACTED**"
+    await coordinator.async_shutdown()
@@ -0,0 +1,81 @@
+"""Test the events derived from the statuses of a printer."""
+import pytest
+import voluptuous as vol
+
+from custom_components.anycubic import device_trigger
+from custom_components.anycubic.client.protocol import UNKNOWN_STATUS, PrinterStatus
+from custom_components.anycubic.const import PRINTER_EVENT_TYPES
+from custom_components.anycubic.events import PrinterEvent, job_events
+
+
+def _status(code, layer, file_name="test.pwms"):
+    """Status of a job at a layer."""
+    return PrinterStatus(code, file_name, current_layer=layer, total_layers=100)
+
+
+def test_job_lifecycle():
+    """Test each change of a job is reported once."""
+    stopped = PrinterStatus("stop")
+    assert job_events(UNKNOWN_STATUS, _status("print", 5)) == []
+    assert job_events(stopped, _status("print", 2)) == [
+        PrinterEvent("job_started", "test.pwms"),
+        PrinterEvent("layer_changed", "test.pwms", 1, 2),
+    ]
+    assert job_events(_status("print", 2), _status("print", 2)) == []
+    assert job_events(_status("print", 2), _status("print", 9)) == [
+        PrinterEvent("layer_changed", "test.pwms", 3, 9),
+    ]
+    assert job_events(_status("print", 9), _status("pause", 9)) == [
+        PrinterEvent("paused", "test.pwms"),
+    ]
+    assert job_events(_status("pause", 9), _status("print", 10)) == [
+        PrinterEvent("resumed", "test.pwms"),
+        PrinterEvent("layer_changed", "test.pwms", 10, 10),
+    ]
+    assert job_events(_status("print", 99), PrinterStatus("finish")) == [
+        PrinterEvent("finished", "test.pwms"),
+    ]
+    assert job_events(_status("pause", 50), stopped) == [
+        PrinterEvent("stopped", "test.pwms"),
+    ]
+
+
+def test_next_job():
+    """Test a job replaced by another between two statuses ends the first one."""
+    assert job_events(_status("print", 99), _status("print", 1, "next.pwms")) == [
+        PrinterEvent("stopped", "test.pwms"),
+        PrinterEvent("job_started", "next.pwms"),
+        PrinterEvent("layer_changed", "next.pwms", 1, 1),
+    ]
+
+
+async def test_device_triggers(hass):
+    """Test a trigger is listed for each event, and layer changes take a layer."""
+    triggers = await device_trigger.async_get_triggers(hass, "device")
+    assert [t["type"] for t in triggers] == list(PRINTER_EVENT_TYPES)
+    capabilities = await device_trigger.async_get_trigger_capabilities(
+        hass,
+        {"type": "layer_changed"},
+    )
+    assert capabilities["extra_fields"]({"layer": 10}) == {"layer": 10}
+    assert (
+        await device_trigger.async_get_trigger_capabilities(
+            hass,
+            {"type": "paused"},
+        )
+        == {}
+    )
+
+
+def test_trigger_schema():
+    """Test only layer change triggers take a layer."""
+    config = {"platform": "device", "domain": "anycubic", "device_id": "device"}
+    assert (
+        device_trigger.TRIGGER_SCHEMA(
+            {**config, "type": "layer_changed", "layer": 10},
+        )["layer"]
+        == 10
+    )
+    assert device_trigger.TRIGGER_SCHEMA({**config, "type": "paused"})
+    with pytest.raises(vol.Invalid):
+        device_trigger.TRIGGER_SCHEMA({**config, "type": "paused", "layer": 10})
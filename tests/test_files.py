@@ -0,0 +1,34 @@
+"""Test the file index."""
+from custom_components.anycubic.client.files import FileIndex
+
+
+def test_lookup():
+    """Test files are found by name or number, ignoring case and extension."""
+    index = FileIndex()
+    index.update([("My Print.pwms", "0.pwms"), ("other.pwms", "1.pwms")])
+    assert index == {"My Print.pwms": "0.pwms", "other.pwms": "1.pwms"}
+    assert index.number("My Print.pwms") == "0.pwms"
+    assert index.number("my print") == "0.pwms"
+    assert index.number("1.pwms") == "1.pwms"
+    assert index.number("missing.pwms") is None
+    assert index.name("1.pwms") == "other.pwms"
+
+
+def test_update_diff():
+    """Test new listings report the files added and removed."""
+    index = FileIndex()
+    assert index.update([("a.pwms", "0.pwms"), ("b.pwms", "1.pwms")]) == (
+        [("a.pwms", "0.pwms"), ("b.pwms", "1.pwms")],
+        [],
+    )
+    version = index.version
+    assert index.update([("a.pwms", "0.pwms"), ("b.pwms", "1.pwms")]) == ([], [])
+    assert index.version == version
+    assert index.update([("B.pwmx", "0.pwms"), ("b.pwms", "1.pwms")]) == (
+        [("B.pwmx", "0.pwms")],
+        [("a.pwms", "0.pwms")],
+    )
+    assert index.version == version + 1
+    assert index.name("0.pwms") == "B.pwmx"
+    index.update([("B.pwmx", "0.pwms")])
+    assert index.number("b") == "0.pwms"
@@ -0,0 +1,37 @@
+"""Test the fleet poller."""
+import asyncio
+from datetime import timedelta
+from unittest import mock
+
+from custom_components.anycubic.fleet import FleetPoller
+
+
+async def test_fleet_bounded_concurrency(hass):
+    """Test printers are polled with a limited number at once."""
+    running = 0
+    max_running = 0
+
+    async def refresh():
+        nonlocal running, max_running
+        running += 1
+        max_running = max(max_running, running)
+        await asyncio.sleep(0.01)
+        running -= 1
+
+    fleet = FleetPoller(hass, max_concurrent=2, stagger=0)
+    for entry_id in ("a", "b", "c", "d", "e"):
+        coordinator = mock.Mock(
+            poll_interval=timedelta(seconds=0),
+            last_update_success=entry_id != "e",
+            async_refresh=refresh,
+        )
+        fleet.register(entry_id, coordinator)
+    fleet._tick(None)
+    await hass.async_block_till_done()
+
+    assert max_running == 2
+    assert all(len(durations) == 1 for durations in fleet.durations.values())
+    assert fleet.failures == {"a": 0, "b": 0, "c": 0, "d": 0, "e": 1}
+    for entry_id in ("a", "b", "c", "d", "e"):
+        fleet.unregister(entry_id)
+    assert fleet._unsub_tick is None
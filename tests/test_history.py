@@ -0,0 +1,117 @@
+"""Test the job history."""
+from datetime import timedelta
+
+import homeassistant.util.dt as dt_util
+
+from custom_components.anycubic.client.protocol import PrinterStatus
+from custom_components.anycubic.history import JobHistory
+from custom_components.anycubic.statistics import job_statistics
+
+PRINTING = PrinterStatus(
+    "print",
+    "test.pwms",
+    current_layer=50,
+    total_layers=100,
+    time_total=6000,
+    time_remaining=3000,
+    layer_height=0.05,
+    resin=12.5,
+)
+
+
+async def _history(hass, tmp_path):
+    """Load a history stored in a temporary directory."""
+    history = JobHistory(hass, "ABC123")
+    history.path = str(tmp_path / "ABC123.jsonl")
+    history.index_path = str(tmp_path / "ABC123.index.json")
+    await history.async_load()
+    return history
+
+
+async def _print_jobs(history, count, code="finish"):
+    """Track jobs through a printing and a final status."""
+    now = dt_util.utcnow()
+    for i in range(count):
+        printing = PRINTING._replace(file_name=f"{i}.pwms")
+        assert await history.async_track(printing, now) is None
+        now += timedelta(seconds=3000)
+        record = await history.async_track(PrinterStatus(code), now)
+        assert record.file_name == f"{i}.pwms"
+    return record
+
+
+async def test_track_jobs(hass, tmp_path):
+    """Test jobs are recorded when they end and aggregated."""
+    history = await _history(hass, tmp_path)
+    record = await _print_jobs(history, 2)
+    assert record.ended - record.started == 6000
+    assert record.layers_printed == 100
+    stopped = await _print_jobs(history, 1, "stop")
+    assert (stopped.outcome, stopped.layers_printed) == ("stop", 50)
+    assert history.job_count == 3
+    assert history.resin_used == 37.5
+    assert history.average_layer_time == 60
+    assert history.jobs_per_day() == round(3 / 7, 2)
+
+    # Index is loaded from disk rather than rebuilt
+    reloaded = await _history(hass, tmp_path)
+    assert reloaded.job_count == 3
+
+
+async def test_query(hass, tmp_path):
+    """Test queries return matching jobs in batches."""
+    history = await _history(hass, tmp_path)
+    await _print_jobs(history, 5)
+    batches = [
+        [record.file_name for record in records]
+        async for records in history.async_query(batch_size=2)
+    ]
+    assert batches == [["0.pwms", "1.pwms"], ["2.pwms", "3.pwms"], ["4.pwms"]]
+    assert [
+        records
+        async for records in history.async_query(
+            start=dt_util.utcnow() + timedelta(days=1),
+        )
+    ] == []
+    (records,) = [r async for r in history.async_query(file_name="3.pwms")]
+    assert records[0].file_name == "3.pwms"
+
+
+async def test_reindex_after_interrupted_write(hass, tmp_path):
+    """Test a job cut off while being written does not corrupt the history."""
+    history = await _history(hass, tmp_path)
+    await _print_jobs(history, 1)
+    with open(history.path, "ab") as file:
+        file.write(b'["cut off",')
+    await _print_jobs(history, 1)
+    reloaded = await _history(hass, tmp_path)
+    assert reloaded.job_count == 2
+
+
+async def test_remove(hass, tmp_path):
+    """Test removing the history deletes it and its index."""
+    history = await _history(hass, tmp_path)
+    await _print_jobs(history, 1)
+    await history.async_remove()
+    assert history.job_count == 0
+    assert not list(tmp_path.iterdir())
+    # Removing a history never written is fine
+    await history.async_remove()
+
+
+async def test_job_statistics(hass, tmp_path):
+    """Test the totals of the history are imported as of the hour the job ended."""
+    history = await _history(hass, tmp_path)
+    record = await _print_jobs(history, 2)
+    (jobs, jobs_rows), (resin, resin_rows) = job_statistics(
+        "ABC-123",
+        "Printer",
+        history,
+        record,
+    )
+    assert jobs["statistic_id"] == "anycubic:abc_123_jobs"
+    assert resin["statistic_id"] == "anycubic:abc_123_resin_used"
+    assert (jobs_rows[0]["sum"], resin_rows[0]["sum"]) == (2, 25.0)
+    start = jobs_rows[0]["start"]
+    assert (start.minute, start.second) == (0, 0)
+    assert 0 <= record.ended - start.timestamp() < 3600
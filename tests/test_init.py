@@ -0,0 +1,399 @@
+"""Test the update coordinator."""
+from datetime import timedelta
+import os
+from unittest import mock
+
+from homeassistant.config_entries import ConfigEntryState
+import homeassistant.util.dt as dt_util
+import pytest
+from pytest_homeassistant_custom_component.common import (
+    MockConfigEntry,
+    async_capture_events,
+    async_fire_time_changed,
+)
+
+from custom_components.anycubic import AnycubicDataUpdateCoordinator, async_setup
+from custom_components.anycubic.client.printer import AnycubicPrinter
+from custom_components.anycubic.client.protocol import NO_USB_KEY, PrinterStatus
+from custom_components.anycubic.const import (
+    DATA_POOLS,
+    DOMAIN,
+    EVENT_BULK_COMMAND,
+    EVENT_FILE_ADDED,
+    EVENT_FILE_REMOVED,
+    EVENT_PRINTER,
+)
+from custom_components.anycubic.history import JobRecord
+from custom_components.anycubic.preview import PreviewCache
+
+from .conftest import QUERY_DATA
+from .fake_printer import FakePrinter
+
+# Not answered by the mock of the probe fixture
+PROBE = AnycubicPrinter.probe
+
+# Probes are answered in all tests, including those setting up entries
+pytestmark = pytest.mark.usefixtures("probe")
+
+
+async def test_update_interval_follows_status(hass, create_coordinator):
+    """Test polling is faster while printing."""
+    coordinator = create_coordinator(scan_interval_printing=5, scan_interval_idle=300)
+    with mock.patch.object(coordinator.printer, "query", return_value=QUERY_DATA):
+        await coordinator.async_refresh()
+    assert coordinator.update_interval == timedelta(seconds=300)
+
+    printing = {**QUERY_DATA, "status": PrinterStatus("print")}
+    with mock.patch.object(coordinator.printer, "query", return_value=printing):
+        await coordinator.async_refresh()
+    assert coordinator.update_interval == timedelta(seconds=5)
+    await coordinator.async_shutdown()
+
+
+async def test_update_interval_backoff(hass, create_coordinator):
+    """Test failed updates are retried with exponential backoff."""
+    coordinator = create_coordinator(scan_interval_printing=10, max_backoff=30)
+    with mock.patch.object(coordinator.printer, "query", side_effect=OSError):
+        await coordinator.async_refresh()
+        assert (
+            timedelta(seconds=8) <= coordinator.update_interval <= timedelta(seconds=12)
+        )
+        await coordinator.async_refresh()
+        assert (
+            timedelta(seconds=16)
+            <= coordinator.update_interval
+            <= timedelta(seconds=24)
+        )
+        await coordinator.async_refresh()
+        await coordinator.async_refresh()
+        assert coordinator.update_interval <= timedelta(seconds=36)
+    assert not coordinator.last_update_success
+    await coordinator.async_shutdown()
+
+
+async def test_update_interval_breaker_open(hass, create_coordinator):
+    """Test unreachable printers are polled at the probe interval."""
+    coordinator = create_coordinator(
+        scan_interval_printing=100,
+        breaker_probe_interval=20,
+    )
+    assert coordinator.printer.breaker.probe_interval == 20
+    coordinator.printer.breaker.state = "open"
+    with mock.patch.object(coordinator.printer, "query", side_effect=OSError):
+        await coordinator.async_refresh()
+    assert coordinator.update_interval == timedelta(seconds=20)
+    await coordinator.async_shutdown()
+
+
+async def test_tiered_refresh(hass, create_coordinator):
+    """Test only the status is fetched once everything else is known."""
+    coordinator = create_coordinator()
+    status = PrinterStatus("stop")
+
+    async def query(*sections):
+        return {s: status if s == "status" else QUERY_DATA[s] for s in sections}
+
+    with mock.patch.object(coordinator.printer, "query", side_effect=query) as mocked:
+        await coordinator.async_refresh()
+        # Printers that were never probed are probed from their model first
+        assert mocked.call_args_list == [
+            mock.call("info"),
+            mock.call("status", "name", "files"),
+        ]
+        await coordinator.async_refresh()
+        assert mocked.call_args == mock.call("status")
+
+        coordinator.invalidate("name")
+        await coordinator.async_refresh()
+        assert mocked.call_args == mock.call("status", "name")
+
+        # File list is refreshed when a job starts
+        status = PrinterStatus("print", "test.pwms")
+        await coordinator.async_refresh()
+        assert mocked.call_args_list[-2:] == [mock.call("status"), mock.call("files")]
+    assert coordinator.data["files"] == {"test.pwms": "0.pwms"}
+    await coordinator.async_shutdown()
+
+
+async def test_changed_sections(hass, create_coordinator):
+    """Test only sections that changed are reported."""
+    coordinator = create_coordinator()
+    with mock.patch.object(coordinator.printer, "query", return_value=QUERY_DATA):
+        await coordinator.async_refresh()
+        assert coordinator.changed_sections == {"info", "name", "status", "files"}
+        await coordinator.async_refresh()
+        assert coordinator.changed_sections == set()
+    printing = {**QUERY_DATA, "status": PrinterStatus("print")}
+    with mock.patch.object(coordinator.printer, "query", return_value=printing):
+        await coordinator.async_refresh()
+        assert coordinator.changed_sections == {"status"}
+    await coordinator.async_shutdown()
+
+
+async def test_file_events(hass, create_coordinator):
+    """Test events are fired for files added or removed after the first listing."""
+    coordinator = create_coordinator()
+    added = async_capture_events(hass, EVENT_FILE_ADDED)
+    removed = async_capture_events(hass, EVENT_FILE_REMOVED)
+    with mock.patch.object(coordinator.printer, "query", return_value=QUERY_DATA):
+        await coordinator.async_refresh()
+    assert not added
+    files = {**QUERY_DATA, "files": [("new.pwms", "0.pwms")]}
+    coordinator.invalidate("files")
+    with mock.patch.object(coordinator.printer, "query", return_value=files):
+        await coordinator.async_refresh()
+    await hass.async_block_till_done()
+    assert [e.data["file_name"] for e in added] == ["new.pwms"]
+    assert [e.data["file_name"] for e in removed] == ["test.pwms"]
+    assert "files" in coordinator.changed_sections
+
+    # Files that could not be listed are kept, and listed again on next update
+    failed = {**QUERY_DATA, "files": None}
+    coordinator.invalidate("files")
+    with mock.patch.object(coordinator.printer, "query", return_value=failed) as query:
+        await coordinator.async_refresh()
+        await coordinator.async_refresh()
+    await hass.async_block_till_done()
+    assert "files" in query.call_args.args
+    assert coordinator.files.number("new") == "0.pwms"
+    assert len(removed) == 1
+    await coordinator.async_shutdown()
+
+
+async def test_printer_events(hass, create_coordinator):
+    """Test job changes and removal of the USB key are fired as events."""
+    coordinator = create_coordinator()
+    events = async_capture_events(hass, EVENT_PRINTER)
+    with mock.patch.object(coordinator.printer, "query", return_value=QUERY_DATA):
+        await coordinator.async_refresh()
+    printing = {
+        **QUERY_DATA,
+        "status": PrinterStatus("print", "test.pwms", current_layer=3),
+        "files": NO_USB_KEY,
+    }
+    with mock.patch.object(coordinator.printer, "query", return_value=printing):
+        await coordinator.async_refresh()
+    await hass.async_block_till_done()
+    assert [e.data["type"] for e in events] == [
+        "usb_removed",
+        "job_started",
+        "layer_changed",
+    ]
+    assert events[2].data["entry_id"] == coordinator.entry_id
+    assert (events[2].data["first_layer"], events[2].data["last_layer"]) == (1, 3)
+    assert coordinator.usb_present is False
+    await coordinator.async_shutdown()
+
+
+async def test_restore_from_cache(hass, hass_storage, probe):
+    """Test the last known state is saved after a delay and restored as stale."""
+    entry = MockConfigEntry(
+        domain=DOMAIN,
+        unique_id="ABC123",
+        data={"ip_address": "192.168.0.10", "port": 6000},
+    )
+    entry.add_to_hass(hass)
+    coordinator = AnycubicDataUpdateCoordinator(hass, entry)
+    assert not await coordinator.async_restore()
+    printing = {**QUERY_DATA, "status": PrinterStatus("print", "test.pwms", "0.pwms")}
+    with mock.patch.object(coordinator.printer, "query", return_value=printing):
+        await coordinator.async_refresh()
+    await hass.async_block_till_done()
+    assert f"{DOMAIN}.{entry.entry_id}" not in hass_storage
+    async_fire_time_changed(hass, dt_util.utcnow() + timedelta(seconds=61))
+    await hass.async_block_till_done()
+    assert hass_storage[f"{DOMAIN}.{entry.entry_id}"]["data"] == {
+        "name": "Printer",
+        "info": QUERY_DATA["info"],
+        "files": [["test.pwms", "0.pwms"]],
+        "status": list(printing["status"]),
+        "profile": probe.return_value.as_dict(),
+    }
+    await coordinator.async_shutdown()
+
+    restored = AnycubicDataUpdateCoordinator(hass, entry)
+    assert await restored.async_restore()
+    assert restored.stale
+    assert restored.data["name"] == "Printer"
+    assert restored.data["info"] == QUERY_DATA["info"]
+    assert restored.data["status"] == printing["status"]
+    assert restored.files.number("test") == "0.pwms"
+    assert restored.printer.profile == probe.return_value
+    # Changes since the snapshot was saved are not events
+    events = async_capture_events(hass, EVENT_PRINTER)
+    stopped = {**QUERY_DATA, "files": NO_USB_KEY}
+    with mock.patch.object(restored.printer, "query", return_value=stopped):
+        await restored.async_refresh()
+    await hass.async_block_till_done()
+    assert not restored.stale
+    assert not events
+    # Probed once, the profile is restored along with the rest
+    assert probe.await_count == 1
+    await restored.async_shutdown()
+
+
+async def test_setup_not_ready_without_cache(hass, enable_custom_integrations):
+    """Test printers never reached are retried by Home Assistant."""
+    entry = MockConfigEntry(
+        domain=DOMAIN,
+        unique_id="ABC123",
+        data={"ip_address": "192.168.0.10", "port": 6000},
+    )
+    entry.add_to_hass(hass)
+    with mock.patch.object(AnycubicPrinter, "query", side_effect=OSError):
+        assert not await hass.config_entries.async_setup(entry.entry_id)
+    assert entry.state is ConfigEntryState.SETUP_RETRY
+
+
+async def test_state_attributes_not_recorded(hass, enable_custom_integrations):
+    """Test the attributes of the state sensor are left out of the recorder."""
+    entry = MockConfigEntry(
+        domain=DOMAIN,
+        unique_id="ABC123",
+        data={"ip_address": "192.168.0.10", "port": 6000},
+    )
+    entry.add_to_hass(hass)
+    printing = {**QUERY_DATA, "status": PrinterStatus("print", "test.pwms", "0.pwms")}
+    with mock.patch.object(AnycubicPrinter, "query", return_value=printing):
+        assert await hass.config_entries.async_setup(entry.entry_id)
+        await hass.async_block_till_done()
+    state = hass.states.get("sensor.anycubic_printer_state")
+    assert state.attributes["file_name"] == "test.pwms"
+    unrecorded = state.state_info["unrecorded_attributes"]
+    assert {"file_name", "model", "identifier"} <= unrecorded
+    assert not set(state.attributes) - unrecorded - {"friendly_name", "icon", "stale"}
+    assert await hass.config_entries.async_unload(entry.entry_id)
+
+
+async def test_circuit_breaker_shown(hass, enable_custom_integrations):
+    """Test the circuit breaker state is shown by an entity enabled by default."""
+    entry = MockConfigEntry(
+        domain=DOMAIN,
+        unique_id="ABC123",
+        data={"ip_address": "192.168.0.10", "port": 6000},
+    )
+    entry.add_to_hass(hass)
+    with mock.patch.object(AnycubicPrinter, "query", return_value=QUERY_DATA):
+        assert await hass.config_entries.async_setup(entry.entry_id)
+        await hass.async_block_till_done()
+    coordinator = hass.data[DOMAIN][entry.entry_id]["coordinator"]
+    state = hass.states.get("sensor.anycubic_printer_error_rate")
+    assert state.attributes["circuit_breaker"] == "closed"
+    coordinator.printer.breaker.state = "open"
+    with mock.patch.object(AnycubicPrinter, "query", side_effect=OSError):
+        await coordinator.async_refresh()
+    await hass.async_block_till_done()
+    state = hass.states.get("sensor.anycubic_printer_error_rate")
+    assert state.attributes["circuit_breaker"] == "open"
+    assert await hass.config_entries.async_unload(entry.entry_id)
+
+
+async def test_remove_entry(hass, enable_custom_integrations):
+    """Test removing a printer deletes what was stored about it."""
+    entry = MockConfigEntry(
+        domain=DOMAIN,
+        unique_id="ABC123",
+        data={"ip_address": "192.168.0.10", "port": 6000},
+    )
+    entry.add_to_hass(hass)
+    with mock.patch.object(AnycubicPrinter, "query", return_value=QUERY_DATA):
+        assert await hass.config_entries.async_setup(entry.entry_id)
+        await hass.async_block_till_done()
+    history = hass.data[DOMAIN][entry.entry_id]["coordinator"].history
+    await history.async_append(
+        JobRecord("test.pwms", 100, 100, 0.05, 12.5, 0, 6000, "finish"),
+    )
+    assert os.path.exists(history.path)
+    previews = PreviewCache(hass, "ABC123")
+    await previews.async_get(
+        "0.pwms",
+        "test.pwms",
+        mock.AsyncMock(return_value=bytes(224 * 168 * 2)),
+    )
+    assert os.listdir(previews.path)
+    await hass.config_entries.async_remove(entry.entry_id)
+    assert not os.path.exists(history.path)
+    assert not os.path.exists(history.index_path)
+    assert not os.path.exists(previews.path)
+
+
+async def test_bulk_command(hass, create_coordinator):
+    """Test a print is started on all printers, reporting how it went on each."""
+    assert await async_setup(hass, {})
+    coordinators = [create_coordinator() for _ in range(3)]
+    hass.data[DOMAIN] = {DATA_POOLS: {}}
+    for coordinator in coordinators:
+        with mock.patch.object(coordinator.printer, "query", return_value=QUERY_DATA):
+            await coordinator.async_refresh()
+        hass.data[DOMAIN][coordinator.entry_id] = {"coordinator": coordinator}
+    coordinators[1].files.update([("other.pwms", "0.pwms")])
+    events = async_capture_events(hass, EVENT_BULK_COMMAND)
+    with mock.patch.object(
+        AnycubicPrinter,
+        "start_print",
+        side_effect=[True, OSError("Unreachable")],
+    ) as start_print, mock.patch.object(
+        AnycubicDataUpdateCoordinator,
+        "async_request_refresh",
+    ) as request_refresh:
+        response = await hass.services.async_call(
+            DOMAIN,
+            "bulk_command",
+            {"command": "print", "file_name": "TEST", "timeout": 5},
+            blocking=True,
+            return_response=True,
+        )
+        await hass.async_block_till_done()
+    assert start_print.call_count == 2
+    # Only the printer that started printing is refreshed
+    assert request_refresh.await_count == 1
+    results = {r["entry_id"]: r for r in response["printers"]}
+    assert sorted(r["success"] for r in results.values()) == [False, False, True]
+    assert results[coordinators[1].entry_id]["error"] == (
+        'File "TEST" not found on the printer'
+    )
+    assert "Unreachable" in [r.get("error") for r in results.values()]
+    await hass.async_block_till_done()
+    assert events[0].data == response
+    for coordinator in coordinators:
+        await coordinator.async_shutdown()
+
+
+async def test_unsupported_sections(hass, create_coordinator, probe):
+    """Test only the commands supported by the model are sent."""
+    probe.return_value = probe.return_value._replace(
+        commands=frozenset({"getsysinfo", "getstatus"}),
+    )
+    coordinator = create_coordinator()
+    with mock.patch.object(
+        coordinator.printer,
+        "query",
+        return_value=QUERY_DATA,
+    ) as query:
+        await coordinator.async_refresh()
+        coordinator.invalidate("info", "name", "files")
+        await coordinator.async_refresh()
+    assert query.call_args_list == [
+        mock.call("info"),
+        mock.call("status"),
+        mock.call("status", "info"),
+    ]
+    await coordinator.async_shutdown()
+
+
+async def test_first_poll_of_unsupported_commands(
+    hass,
+    create_coordinator,
+    socket_enabled,
+):
+    """Test printers leaving commands unanswered are probed before being polled."""
+    coordinator = create_coordinator()
+    async with FakePrinter(drop_commands={"getname"}) as fake_printer:
+        coordinator.printer.ip = "127.0.0.1"
+        coordinator.printer.port = fake_printer.port
+        with mock.patch.object(AnycubicPrinter, "probe", PROBE):
+            await coordinator.async_refresh()
+    assert coordinator.last_update_success
+    assert not coordinator.printer.profile.supports("getname")
+    assert coordinator.data["status"] == PrinterStatus("stop")
+    await coordinator.async_shutdown()
@@ -0,0 +1,62 @@
+"""Test print previews."""
+import asyncio
+import os
+import struct
+from unittest import mock
+import zlib
+
+from custom_components.anycubic.preview import PreviewCache, decode_preview
+
+
+def test_decode_preview():
+    """Test RGB565 pixels are expanded to RGB in a PNG."""
+    # White, red, green and blue pixels
+    data = struct.pack("<4H", 0xFFFF, 0xF800, 0x07E0, 0x001F)
+    png = decode_preview(data, width=2, height=2)
+    assert png.startswith(b"\x89PNG\r\n\x1a\n")
+    idat = png.index(b"IDAT")
+    (length,) = struct.unpack(">I", png[idat - 4 : idat])
+    assert zlib.decompress(png[idat + 4 : idat + 4 + length]) == (
+        b"\x00\xff\xff\xff\xff\x00\x00" b"\x00\x00\xff\x00\x00\x00\xff"
+    )
+
+
+async def test_preview_cache(hass, tmp_path):
+    """Test previews are only fetched once."""
+    fetch = mock.AsyncMock(return_value=bytes(224 * 168 * 2))
+    cache = PreviewCache(hass, "ABC123", memory_size=1)
+    cache.path = str(tmp_path)
+
+    image = await cache.async_get("0.pwms", "test.pwms", fetch)
+    assert await cache.async_get("0.pwms", "test.pwms", fetch) == image
+    await cache.async_get("1.pwms", "other.pwms", fetch)
+    # Evicted from memory, but still on disk
+    assert await cache.async_get("0.pwms", "test.pwms", fetch) == image
+    assert fetch.await_args_list == [mock.call("0.pwms"), mock.call("1.pwms")]
+
+
+async def test_preview_prefetch(hass, tmp_path):
+    """Test previews not cached yet are fetched to disk, skipping failures."""
+    data = bytes(224 * 168 * 2)
+    fetch = mock.AsyncMock(side_effect=[data, ValueError, data])
+    cache = PreviewCache(hass, "ABC123", disk_size=3)
+    cache.path = str(tmp_path)
+    await cache.async_get("0.pwms", "test.pwms", mock.AsyncMock(return_value=data))
+
+    files = [(f"{i}.pwms", f"{i}.pwms") for i in range(4)] + [("test.pwms", "0.pwms")]
+    await cache.async_prefetch(files, fetch, asyncio.Semaphore(1))
+    assert fetch.await_args_list == [mock.call(f"{i}.pwms") for i in range(3)]
+    assert len(os.listdir(tmp_path)) == 3
+    assert len(cache._memory) == 1
+
+
+async def test_preview_cache_remove(hass, tmp_path):
+    """Test removing the cache deletes the previews on disk and in memory."""
+    cache = PreviewCache(hass, "ABC123")
+    cache.path = str(tmp_path / "ABC123")
+    fetch = mock.AsyncMock(return_value=bytes(224 * 168 * 2))
+    await cache.async_get("0.pwms", "test.pwms", fetch)
+    await cache.async_remove()
+    assert not os.path.exists(cache.path)
+    await cache.async_get("0.pwms", "test.pwms", fetch)
+    assert fetch.await_count == 2
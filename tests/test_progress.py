@@ -0,0 +1,46 @@
+"""Test the estimation of job progress."""
+from custom_components.anycubic.client.protocol import PrinterStatus
+from custom_components.anycubic.progress import ProgressModel
+
+
+def _status(layer, progress, code="print"):
+    """Status of a 100 layer job with a minute left per layer."""
+    return PrinterStatus(
+        code,
+        "test.pwms",
+        progress=progress,
+        current_layer=layer,
+        total_layers=100,
+        time_remaining=(100 - layer) * 60,
+    )
+
+
+def test_interpolates_between_polls():
+    """Test progress advances by the measured time per layer."""
+    model = ProgressModel(smoothing=0.5)
+    assert model.estimate(0) is None
+    model.resync(_status(10, 10), 0)
+    # Time per layer is unknown until a layer change is seen
+    assert model.estimate(30) == (10, 90 * 60 - 30)
+    model.resync(_status(12, 12), 20)
+    assert model.layer_time == 10
+    assert model.estimate(20) == (12, 88 * 10)
+    assert model.estimate(64) == (16, 84 * 10 - 4)
+    # Estimates never reach the end before the printer does
+    assert model.estimate(10_000) == (99, 0)
+    model.resync(_status(14, 14), 60)
+    assert model.layer_time == 15
+
+
+def test_pause_and_new_job():
+    """Test pauses do not count towards the time per layer and new jobs reset it."""
+    model = ProgressModel(smoothing=1)
+    model.resync(_status(10, 10), 0)
+    model.resync(_status(11, 11), 10)
+    model.resync(_status(11, 11, "pause"), 20)
+    assert model.estimate(1000) == (11, 89 * 60)
+    model.resync(_status(11, 11), 1000)
+    model.resync(_status(12, 12), 1005)
+    assert model.layer_time == 5
+    model.resync(_status(0, 0)._replace(file_name="other.pwms"), 1010)
+    assert model.layer_time is None
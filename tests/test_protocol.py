@@ -0,0 +1,114 @@
+"""Test parsing of the replies of the printer."""
+import pytest
+
+from custom_components.anycubic.client.profiles import PrinterProfile, probed_profile
+from custom_components.anycubic.client.protocol import (
+    NO_USB_KEY,
+    PHOTON_STATUS_LAYOUT,
+    QUERY_PARSERS,
+    AnycubicError,
+    PrinterStatus,
+    parse_name,
+    parse_status,
+    parse_sys_info,
+)
+
+PRINTING_REPLY = [
+    b"print",
+    "测试/print.pwms/0.pwms".encode("gbk"),
+    b"2338",
+    b"20",
+    b"1263",
+    b"60829",
+    b"48746",
+    b"~143mL",
+    b"UV",
+    b"36.16",
+    b"0.05",
+    b"0",
+]
+
+
+def test_parse_status_printing():
+    """Test numbers are parsed and the file number is split off the file name."""
+    status = parse_status(PRINTING_REPLY)
+    assert status == PrinterStatus(
+        "print",
+        "测试/print.pwms",
+        "0.pwms",
+        progress=20,
+        current_layer=1263,
+        total_layers=2338,
+        time_total=60829,
+        time_remaining=48746,
+        resin=36.16,
+        type="UV",
+        layer_height=0.05,
+    )
+    assert status.as_dict()["resin"] == 36.16
+
+
+def test_parse_status_idle():
+    """Test only the code is set when not printing."""
+    assert parse_status([b"stop"]) == PrinterStatus("stop")
+    assert parse_status([b"stop"]).as_dict() == {"code": "stop"}
+    with pytest.raises(AnycubicError):
+        parse_status(AnycubicError("Failed", "ERROR1"))
+
+
+def test_parse_status_empty():
+    """Test an empty status is an error rather than an idle printer."""
+    with pytest.raises(AnycubicError):
+        parse_status([])
+
+
+def test_parse_name():
+    """Test names set from the app are decoded as UTF-8."""
+    assert parse_name(["Imprimante à résine".encode("utf8")]) == "Imprimante à résine"
+    assert parse_name([b""]) is None
+
+
+def test_parse_files_no_usb():
+    """Test no USB key is told apart from other errors, and from no files."""
+    assert QUERY_PARSERS["files"](AnycubicError("Failed", "ERROR1")) is NO_USB_KEY
+    assert QUERY_PARSERS["files"](AnycubicError("Failed", "ERROR2")) is None
+    assert QUERY_PARSERS["files"]([]) == []
+
+
+def test_parse_status_unknown_layout():
+    """Test only the code and file are kept from statuses not laid out as expected."""
+    expected = PrinterStatus("print", "测试/print.pwms", "0.pwms")
+    assert parse_status(PRINTING_REPLY[:5]) == expected
+    assert parse_status(PRINTING_REPLY, layout=None) == expected
+    assert parse_status([*PRINTING_REPLY[:3], b"n/a", *PRINTING_REPLY[4:]]) == expected
+
+
+def test_parse_sys_info_fields():
+    """Test system information without the Wi-Fi network or with extra values."""
+    assert parse_sys_info([b"Photon", b"V1", b"ABC"])["wifi_ssid"] == ""
+    info = parse_sys_info([b"Photon", b"V1", b"ABC", b"Wifi", b"extra"])
+    assert info["wifi_ssid"] == "Wifi"
+    with pytest.raises(AnycubicError):
+        parse_sys_info([b"Photon"])
+
+
+def test_probed_profile():
+    """Test commands are supported unless they fail, or get no reply at all."""
+    info = {"model": "Photon", "firmware_version": "V1"}
+    profile = probed_profile(
+        info,
+        {
+            "getstatus": PRINTING_REPLY,
+            "getname": [b"Printer"],
+            "getfile": AnycubicError("Failed", "ERROR1"),
+            "getmode": AnycubicError("Failed", "ERROR1"),
+            "getwifi": [],
+        },
+    )
+    # Empty replies are supported, unlike replies missing altogether
+    assert profile.commands == {"getstatus", "getname", "getfile", "getwifi"}
+    assert profile.status_layout == PHOTON_STATUS_LAYOUT
+    assert PrinterProfile.from_dict(profile.as_dict()) == profile
+    short = probed_profile(info, {"getstatus": PRINTING_REPLY[:5]})
+    assert short.status_layout is None
+    assert PrinterProfile.from_dict(short.as_dict()) == short
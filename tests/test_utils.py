@@ -0,0 +1,246 @@
+"""Test printer communication utils."""
+import asyncio
+
+import pytest
+
+from custom_components.anycubic.client.printer import (
+    AnycubicPrinter,
+    CircuitBreaker,
+    CircuitOpenError,
+    ConnectionPool,
+    IncompleteReplyError,
+    ReplyFramer,
+    percentile,
+)
+from custom_components.anycubic.client.protocol import PrinterStatus
+
+from .fake_printer import FakePrinter
+
+
+def _split_replies(data, commands, **kwargs):
+    """Frame data received in chunks and return the replies."""
+    framer = ReplyFramer(commands, **kwargs)
+    for i in range(0, len(data), 7):
+        framer.feed(data[i : i + 7])
+    return framer.replies()
+
+
+def test_framer_batch():
+    """Test a batched reply is split back into one reply per command."""
+    data = (
+        b"getsysinfo,Photon Mono SE,V0.1.2,ABC123,MyWifi,end"
+        b"getname,My Printer,end"
+        b"getfile,ERROR1,"
+        b"getstatus,stop,end"
+    )
+    commands = [("getsysinfo",), ("getname",), ("getfile",), ("getstatus",)]
+    assert _split_replies(data, commands) == [
+        [b"Photon Mono SE", b"V0.1.2", b"ABC123", b"MyWifi"],
+        [b"My Printer"],
+        [b"ERROR1"],
+        [b"stop"],
+    ]
+
+
+def test_framer_with_arguments():
+    """Test arguments echoed by the printer are not part of the reply."""
+    assert _split_replies(b"gostart,3.pwms,ok,end", [("gostart", "3.pwms")]) == [
+        [b"ok"],
+    ]
+
+
+def test_framer_complete():
+    """Test replies are complete as soon as the last frame is received."""
+    framer = ReplyFramer([("getname",), ("getstatus",)])
+    assert not framer.feed(b"getname,endeavour,en")
+    assert not framer.feed(b"d,getstatus,sto")
+    assert framer.feed(b"p,end")
+    assert framer.replies() == [[b"endeavour"], [b"stop"]]
+
+
+def test_framer_binary_payload():
+    """Test fixed size binary replies are complete without a terminator."""
+    framer = ReplyFramer([("getPreview2", "1.pwms")], binary_sizes={"getPreview2": 7})
+    assert not framer.feed(b"getPreview2,1.pwms,\x00,e")
+    assert framer.feed(b"nd\x01\x02")
+    assert framer.payloads() == [b"\x00,end\x01\x02"]
+
+
+def test_percentile():
+    """Test nearest-rank percentiles."""
+    assert percentile([], 50) is None
+    assert percentile([3.0, 1.0, 2.0], 50) == 2.0
+    assert percentile([float(i) for i in range(1, 101)], 95) == 95.0
+
+
+async def test_pool_reconnects(socket_enabled):
+    """Test pooled connections are reused and reopened when dropped."""
+    async with FakePrinter(drop_commands={"getmode"}) as fake_printer:
+        pool = ConnectionPool("127.0.0.1", fake_printer.port)
+        printer = AnycubicPrinter("127.0.0.1", fake_printer.port, pool=pool)
+        assert await printer.get_name() == "Fake Printer"
+        assert await printer.get_status() == PrinterStatus("stop")
+        assert (pool.connects, pool.reused) == (1, 1)
+        with pytest.raises(ConnectionResetError):
+            await printer.send_cmd("getmode")
+        assert await printer.get_name() == "Fake Printer"
+        assert fake_printer.connections == 3
+        pool.close()
+
+
+async def test_query_without_status(socket_enabled):
+    """Test replies that were never received count as failures of the printer."""
+    async with FakePrinter(drop_commands={"getstatus"}) as fake_printer:
+        printer = AnycubicPrinter("127.0.0.1", fake_printer.port)
+        with pytest.raises(IncompleteReplyError):
+            await printer.query("status", "name")
+        assert printer.breaker.failures == 1
+
+        pool = ConnectionPool("127.0.0.1", fake_printer.port)
+        printer = AnycubicPrinter("127.0.0.1", fake_printer.port, pool=pool)
+        with pytest.raises(ConnectionResetError):
+            await printer.query("status", "name")
+        assert printer.breaker.failures == 1
+        pool.close()
+
+
+async def test_gbk_file_names(socket_enabled):
+    """Test file names are decoded from GBK."""
+    async with FakePrinter() as fake_printer:
+        printer = AnycubicPrinter("127.0.0.1", fake_printer.port)
+        assert await printer.get_files() == [
+            ("test print.pwms", "0.pwms"),
+            ("其他.pwms", "1.pwms"),
+        ]
+
+
+async def test_request_stats(socket_enabled):
+    """Test timings and errors of requests are recorded."""
+    async with FakePrinter(errors={"getmode": 1}) as fake_printer:
+        printer = AnycubicPrinter("127.0.0.1", fake_printer.port)
+        await printer.get_status()
+        await printer.send_batch(("getname",), ("getmode",))
+    with pytest.raises(OSError):
+        await printer.get_status()  # Fake printer is gone
+    stats = printer.stats
+    assert stats.requests == 3
+    ok, error_reply, failed = stats.samples
+    assert ok.commands == "getstatus"
+    assert ok.error is None
+    assert ok.bytes_read == len(b"getstatus,stop,end")
+    assert 0 <= ok.connect_time <= ok.first_byte_time <= ok.round_trip
+    assert error_reply.error == "ERROR1"
+    assert failed.first_byte_time is None
+    assert stats.errors == {"getmode: ERROR1": 1, f"getstatus: {failed.error}": 1}
+    assert stats.error_rate == 2 / 3
+    assert stats.round_trip_percentile(100) == max(s.round_trip for s in stats.samples)
+
+
+async def test_circuit_breaker(socket_enabled):
+    """Test requests are short-circuited while the printer is unreachable."""
+    async with FakePrinter() as fake_printer:
+        port = fake_printer.port
+    breaker = CircuitBreaker(threshold=2, probe_interval=0.05)
+    printer = AnycubicPrinter("127.0.0.1", port, breaker=breaker)
+    for _ in range(2):
+        assert breaker.state == "closed"
+        with pytest.raises(ConnectionRefusedError):
+            await printer.get_status()
+    assert breaker.state == "open"
+    with pytest.raises(CircuitOpenError):
+        await printer.get_status()
+    assert breaker.short_circuited == 1
+    assert printer.stats.requests == 2
+
+    async with FakePrinter() as fake_printer:
+        printer.port = fake_printer.port
+        await asyncio.sleep(0.05)
+        assert await printer.get_status() == PrinterStatus("stop")
+    assert breaker.state == "closed"
+    assert fake_printer.connections == 2  # Probe and request
+    assert fake_printer.commands == ["getstatus"]
+
+
+async def test_queue_coalesces_reads(socket_enabled):
+    """Test concurrent identical reads share a single request."""
+    async with FakePrinter(latency=0.01) as fake_printer:
+        printer = AnycubicPrinter("127.0.0.1", fake_printer.port)
+        statuses = await asyncio.gather(*(printer.get_status() for _ in range(5)))
+    assert statuses == [PrinterStatus("stop")] * 5
+    assert fake_printer.commands == ["getstatus"]
+    assert printer.queue.coalesced == 4
+
+
+async def test_queue_priority(socket_enabled):
+    """Test control commands go before queued polls and previews."""
+    async with FakePrinter(latency=0.01) as fake_printer:
+        printer = AnycubicPrinter("127.0.0.1", fake_printer.port)
+        busy = asyncio.create_task(printer.get_name())
+        await asyncio.sleep(0)
+        await asyncio.gather(
+            busy,
+            printer.get_preview("0.pwms"),
+            printer.get_status(),
+            printer.start_print("0.pwms"),
+        )
+    assert fake_printer.commands == ["getname", "gostart", "getstatus", "getPreview2"]
+
+
+async def test_preview_cut_off(socket_enabled):
+    """Test previews cut off are requested again, up to a limit."""
+    async with FakePrinter(cut_replies=1) as fake_printer:
+        printer = AnycubicPrinter("127.0.0.1", fake_printer.port)
+        preview = await printer.get_preview("0.pwms")
+        assert len(preview) == 224 * 168 * 2
+        assert fake_printer.commands == ["getPreview2"] * 2
+
+        fake_printer.cut_replies = 3
+        with pytest.raises(IncompleteReplyError):
+            await printer.get_preview("0.pwms")
+        # The printer is still polled
+        assert printer.breaker.state == "closed"
+        assert await printer.get_status() == PrinterStatus("stop")
+
+
+async def test_probe(socket_enabled):
+    """Test unsupported commands are found, and not confused with a missing USB key."""
+    async with FakePrinter(usb_key=False, errors={"getmode": 1}) as fake_printer:
+        printer = AnycubicPrinter("127.0.0.1", fake_printer.port)
+        profile = await printer.probe()
+    assert profile.model == "Photon Mono SE"
+    assert profile.firmware_version == "V0.1.2"
+    assert profile.supports("getfile")
+    assert not profile.supports("getmode")
+
+
+async def test_probe_empty_replies(socket_enabled):
+    """Test commands with an empty reply are supported, unlike those not answered."""
+    async with FakePrinter(
+        name="",
+        files={},
+        drop_commands={"getwifi"},
+    ) as fake_printer:
+        printer = AnycubicPrinter("127.0.0.1", fake_printer.port)
+        profile = await printer.probe()
+        assert await printer.get_name() is None
+        assert await printer.get_files() == []
+    assert profile.commands == {
+        "getsysinfo",
+        "getstatus",
+        "getname",
+        "getfile",
+        "getmode",
+        "getpara",
+    }
+    # Commands after the one not answered were sent again
+    assert fake_printer.commands[4:7] == ["getwifi", "getmode", "getpara"]
+
+
+async def test_probe_misses_are_not_failures(socket_enabled):
+    """Test commands left unanswered do not open the circuit."""
+    async with FakePrinter(drop_commands={"getwifi", "getmode", "getpara"}) as fake:
+        breaker = CircuitBreaker(threshold=2)
+        printer = AnycubicPrinter("127.0.0.1", fake.port, breaker=breaker)
+        profile = await printer.probe()
+    assert not profile.supports("getpara")
+    assert (breaker.state, breaker.failures) == ("closed", 0)